@@ -0,0 +1,165 @@
+"""Evaluation and playback benchmarks of DvRootNodes against extension roots, run in maya.
+
+For each scene size and root kind, a new scene of animated roots is built, each root holding a
+cube. Evaluation steps through the frame range under each evaluation manager mode ("off" is
+the DG) and pulls the world matrix of every cube, so every root matrix is evaluated on every
+frame. In interactive sessions playback is timed too, with the viewport drawing every frame.
+Every benchmark reports its frames per second, and the speedup of extension roots over
+DvRootNodes, whose Python DvRootMatrix takes part in every evaluation.
+
+Usage:
+    mayapy -m br2.benchmarks.bench_evaluation [-s SIZE [SIZE ...]] [-f FRAMES] [-m MODE [MODE ...]] [-o OUTPUT]
+
+    # In maya:
+    from br2.benchmarks.bench_evaluation import run
+    run(sizes=(1000,))
+"""
+
+
+import argparse
+import json
+import logging
+import sys
+import time
+
+
+LOGGER = logging.getLogger(__name__)
+SIZES = (100, 1000, 10000)
+FRAMES = 100
+EVALUATION_MODES = ("off", "serial", "parallel")
+ROOT_KINDS = ("native", "extension")
+
+
+def build_scene(size, extension, frames=FRAMES):
+    """Builds a new scene of animated roots, each holding a cube.
+
+    Args:
+        size (int): Number of roots.
+        extension (bool): If True build extension roots, otherwise DvRootNodes.
+        frames (int): Length of the animation. Defaults to FRAMES.
+    Returns:
+        list[str]: World matrix plugs of the cubes.
+    """
+    from br2.dv_root_node.cmds_trace import cmds
+    from br2.dv_root_node.node_handler import MayaRootHandler
+
+    cmds.file(new=True, force=True)
+    plugs = []
+    for index in range(size):
+        root = MayaRootHandler.create(f"asset_{index}", extension=extension)
+        cube = cmds.polyCube(name=f"content_{index}", constructionHistory=False)[0]
+        cmds.parent(cube, root.dag_path, relative=True)
+        cmds.setKeyframe(root.dag_path, attribute="rotateY", time=1, value=0)
+        cmds.setKeyframe(root.dag_path, attribute="rotateY", time=frames, value=360)
+        cmds.setAttr(f"{root.dag_path}.translateX", index % 100)
+        cmds.setAttr(f"{root.dag_path}.translateZ", index // 100)
+        plugs.append(f"{root.dag_path}|{cube}.worldMatrix[0]")
+    cmds.playbackOptions(minTime=1, maxTime=frames)
+    return plugs
+
+
+def bench_evaluation(plugs, frames=FRAMES, mode="parallel"):
+    """Steps through the frame range, pulling the given plugs on every frame.
+
+    Args:
+        plugs (list[str]): Plugs to evaluate.
+        frames (int): Number of frames. Defaults to FRAMES.
+        mode (str): Evaluation manager mode, see EVALUATION_MODES. Defaults to "parallel".
+    Returns:
+        dict: Seconds and fps.
+    """
+    from br2.dv_root_node.cmds_trace import cmds
+
+    cmds.evaluationManager(mode=mode)
+    # The first frame builds the evaluation graph.
+    cmds.currentTime(1, update=True)
+    cmds.dgeval(plugs)
+    start = time.perf_counter()
+    for frame in range(2, frames + 1):
+        cmds.currentTime(frame, update=True)
+        cmds.dgeval(plugs)
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "fps": (frames - 1) / seconds}
+
+
+def bench_playback(frames=FRAMES, mode="parallel"):
+    """Plays the frame range once in the viewport, drawing every frame. Interactive sessions only.
+
+    Args:
+        frames (int): Number of frames. Defaults to FRAMES.
+        mode (str): Evaluation manager mode, see EVALUATION_MODES. Defaults to "parallel".
+    Returns:
+        dict: Seconds and fps.
+    """
+    from br2.dv_root_node.cmds_trace import cmds
+
+    cmds.evaluationManager(mode=mode)
+    cmds.playbackOptions(minTime=1, maxTime=frames, loop="once", playbackSpeed=0, maxPlaybackSpeed=0)
+    cmds.currentTime(1, update=True)
+    start = time.perf_counter()
+    cmds.play(wait=True)
+    seconds = time.perf_counter() - start
+    return {"seconds": seconds, "fps": frames / seconds}
+
+
+def run(sizes=SIZES, frames=FRAMES, modes=EVALUATION_MODES):
+    """Runs the benchmarks of both root kinds.
+
+    Args:
+        sizes (tuple[int]): Numbers of roots. Defaults to SIZES.
+        frames (int): Number of frames. Defaults to FRAMES.
+        modes (tuple[str]): Evaluation manager modes, see EVALUATION_MODES. Defaults to all modes.
+    Returns:
+        dict: Results by size, then benchmark, then root kind, with the speedup of extension roots.
+    """
+    from br2.dv_root_node.cmds_trace import cmds
+
+    playback = not cmds.about(batch=True)
+    initial_mode = cmds.evaluationManager(query=True, mode=True)[0]
+    results = {}
+    try:
+        for size in sizes:
+            size_results = results.setdefault(str(size), {})
+            for kind in ROOT_KINDS:
+                plugs = build_scene(size, kind == "extension", frames)
+                for mode in modes:
+                    size_results.setdefault(f"evaluation {mode}", {})[kind] = bench_evaluation(plugs, frames, mode)
+                    if playback:
+                        size_results.setdefault(f"playback {mode}", {})[kind] = bench_playback(frames, mode)
+            for name, bench in sorted(size_results.items()):
+                bench["speedup"] = bench["extension"]["fps"] / bench["native"]["fps"]
+                LOGGER.info("%7d roots %-22s native %9.2f fps  extension %9.2f fps  speedup %.2fx", size, name,
+                            bench["native"]["fps"], bench["extension"]["fps"], bench["speedup"])
+    finally:
+        cmds.evaluationManager(mode=initial_mode)
+    return results
+
+
+def main(argv=None):
+    """Command line entry point, run with mayapy.
+
+    Args:
+        argv (list[str]|None): Arguments. Defaults to sys.argv.
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the evaluation of DvRootNodes against extension roots.")
+    parser.add_argument("-s", "--sizes", type=int, nargs="+", default=SIZES, help="Numbers of roots.")
+    parser.add_argument("-f", "--frames", type=int, default=FRAMES, help="Number of frames.")
+    parser.add_argument("-m", "--modes", nargs="+", choices=EVALUATION_MODES, default=EVALUATION_MODES,
+                        help="Evaluation manager modes.")
+    parser.add_argument("-o", "--output", help="Write the results to a JSON file.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    results = run(args.sizes, args.frames, args.modes)
+    if args.output:
+        with open(args.output, "w") as stream:
+            json.dump(results, stream, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,281 @@
+"""Wall time and maya.cmds call count benchmarks of MayaRootHandler, run without maya.
+
+The repository is loaded as the br2 package from this file's location, and maya.cmds is
+replaced by the in-memory stand-in of br2.benchmarks.fake_maya. For each scene size, a scene
+of nested roots is built and every benchmark reports its time and number of cmds calls per
+operation. Results are compared to the stored baselines: more cmds calls per operation than
+the baseline is a regression, as is a time per operation above the time threshold. Call
+counts do not depend on the machine, times do, so store the baseline on the machine running
+the comparison.
+
+Usage:
+    python benchmarks/bench_node_handler.py [-s SIZE [SIZE ...]] [--update-baseline]
+"""
+
+
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import random
+import sys
+import time
+from collections import namedtuple
+
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARKS_DIR)
+BASELINE_FILE = os.path.join(BENCHMARKS_DIR, "baselines", "node_handler.json")
+SIZES = (10, 100, 1000, 10000, 100000)
+SAMPLE_SIZE = 1000
+# Roots per world root: the world root itself and its nested roots.
+GROUP_SIZE = 10
+REPEAT = 3
+# Allowed ratios to the baseline.
+CALL_THRESHOLD = 1.0
+TIME_THRESHOLD = 1.5
+# Timing noise ignored on top of TIME_THRESHOLD, in microseconds per operation.
+TIME_SLACK_US = 2.0
+
+
+def load_package(name="br2", path=REPO_DIR):
+    """Imports the repository as a package, whatever the name of its directory.
+
+    Args:
+        name (str): Package name. Defaults to "br2".
+        path (str): Package directory. Defaults to REPO_DIR.
+    Returns:
+        module: Package.
+    """
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            name, os.path.join(path, "__init__.py"), submodule_search_locations=[path])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+load_package()
+from br2.benchmarks.fake_maya import install  # noqa: E402
+
+CMDS = install()
+from br2.dv_root_node.node_handler import MayaRootHandler, ROOT_NODE_TYPE  # noqa: E402
+
+
+LOGGER = logging.getLogger(__name__)
+
+Scene = namedtuple("Scene", ["size", "world_roots", "names", "handlers", "nested_handlers", "pairs"])
+
+
+def build_scene(size, seed=0):
+    """Builds a scene of roots directly in the stand-in, without counting calls.
+    Each world root holds a group of nested roots.
+
+    Args:
+        size (int): Number of roots.
+        seed (int): Seed of the sampled roots. Defaults to 0.
+    Returns:
+        Scene: Scene, with handlers of a sample of its roots.
+    """
+    CMDS.new_scene()
+    CMDS.loaded_plugins.add(ROOT_NODE_TYPE)
+    world_roots = []
+    nested = []
+    for index in range(size):
+        if index % GROUP_SIZE == 0:
+            node = CMDS.add_node(f"asset_{index}", ROOT_NODE_TYPE)
+            group = CMDS.add_node(f"asset_{index}_grp", parent=node.name)
+            world_roots.append(node)
+        else:
+            node = CMDS.add_node(f"asset_{index}", ROOT_NODE_TYPE, parent=group.name)
+            nested.append(node)
+        node.attrs.update(asset_name=node.name, dpack_id=index, fc_id=index, version="v001")
+        node.locked.update(node.attrs)
+
+    sampler = random.Random(seed)
+    nodes = world_roots + nested
+    names = [node.name for node in sampler.sample(nodes, min(SAMPLE_SIZE, len(nodes)))]
+    handlers = [MayaRootHandler(name) for name in names]
+    nested_handlers = [MayaRootHandler(node.name) for node in sampler.sample(nested, min(SAMPLE_SIZE, len(nested)))]
+    pairs = [(handler, MayaRootHandler(handler.dag_path)) for handler in handlers]
+    return Scene(size, world_roots, names, handlers, nested_handlers, pairs)
+
+
+def bench_init(scene):
+    """Handler initialization from a node name."""
+    for name in scene.names:
+        MayaRootHandler(name)
+    return len(scene.names)
+
+
+def bench_get_attributes(scene):
+    """Attribute reads."""
+    for handler in scene.handlers:
+        handler.asset_name
+        handler.dpack_id
+        handler.fc_id
+        handler.version
+    return len(scene.handlers) * 4
+
+
+def bench_set_attributes(scene):
+    """Writes of locked attributes."""
+    for handler in scene.handlers:
+        handler.status = "current"
+        handler.version = "v002"
+    return len(scene.handlers) * 2
+
+
+def bench_iter_world_roots(scene):
+    """Traversal of the world roots of the scene, per root."""
+    return max(1, sum(1 for _ in MayaRootHandler.iter_world_roots()))
+
+
+def bench_iter_child_roots(scene):
+    """Recursive traversal of the nested roots of every world root, per root."""
+    count = 0
+    for node in scene.world_roots:
+        count += sum(1 for _ in MayaRootHandler(node.name).iter_child_roots(recursive=True))
+    return max(1, count)
+
+
+def bench_iter_parent_roots(scene):
+    """Recursive traversal of the parent roots of nested roots."""
+    for handler in scene.nested_handlers:
+        list(handler.iter_parent_roots(recursive=True))
+    return max(1, len(scene.nested_handlers))
+
+
+def bench_equality(scene):
+    """Comparison of handlers of the same root."""
+    for handler, other in scene.pairs:
+        handler == other
+    return len(scene.pairs)
+
+
+def bench_create(scene):
+    """Root creation, adding to the scene, so it runs last."""
+    count = min(SAMPLE_SIZE, scene.size)
+    for index in range(count):
+        MayaRootHandler.create(f"created_{index}", dpack_id=index, fc_id=index, version="v001")
+    return count
+
+
+BENCHMARKS = (
+    ("init", bench_init),
+    ("get_attributes", bench_get_attributes),
+    ("set_attributes", bench_set_attributes),
+    ("iter_world_roots", bench_iter_world_roots),
+    ("iter_child_roots", bench_iter_child_roots),
+    ("iter_parent_roots", bench_iter_parent_roots),
+    ("equality", bench_equality),
+    ("create", bench_create),
+)
+
+
+def run(sizes=SIZES, repeat=REPEAT):
+    """Runs the benchmarks.
+
+    Args:
+        sizes (list[int]): Numbers of roots in the benchmark scenes. Defaults to SIZES.
+        repeat (int): Runs per benchmark, the fastest is kept. Defaults to REPEAT.
+    Returns:
+        dict: Scene sizes mapped to benchmark names, mapped to their ops, us_per_op and
+            calls_per_op.
+    """
+    results = {}
+    for size in sizes:
+        scene = build_scene(size)
+        results[str(size)] = size_results = {}
+        for name, bench in BENCHMARKS:
+            best = None
+            for _ in range(repeat):
+                CMDS.reset_calls()
+                start = time.perf_counter()
+                ops = bench(scene)
+                seconds = time.perf_counter() - start
+                if best is None or seconds < best[0]:
+                    best = (seconds, ops, sum(CMDS.calls.values()))
+            seconds, ops, calls = best
+            size_results[name] = {
+                "ops": ops,
+                "us_per_op": round(seconds / ops * 1e6, 3),
+                "calls_per_op": round(calls / ops, 3),
+            }
+            LOGGER.info("%7d roots %-18s %10.3f us/op %8.3f calls/op", size, name, seconds / ops * 1e6, calls / ops)
+    return results
+
+
+def compare(results, baselines, call_threshold=CALL_THRESHOLD, time_threshold=TIME_THRESHOLD):
+    """Finds the benchmarks that regressed from their baseline.
+
+    Args:
+        results (dict): Benchmark results, see run.
+        baselines (dict): Baseline results, see run.
+        call_threshold (float): Allowed ratio of calls per operation. Defaults to CALL_THRESHOLD.
+        time_threshold (float): Allowed ratio of time per operation. Defaults to TIME_THRESHOLD.
+    Returns:
+        list[str]: Regression descriptions.
+    """
+    regressions = []
+    for size, size_results in results.items():
+        for name, result in size_results.items():
+            baseline = baselines.get(size, {}).get(name)
+            if baseline is None:
+                continue
+            if result["calls_per_op"] > baseline["calls_per_op"] * call_threshold + 1e-9:
+                regressions.append(f'{name} at {size} roots: {result["calls_per_op"]} cmds calls/op, '
+                                   f'baseline {baseline["calls_per_op"]}')
+            if result["us_per_op"] > baseline["us_per_op"] * time_threshold + TIME_SLACK_US:
+                regressions.append(f'{name} at {size} roots: {result["us_per_op"]} us/op, '
+                                   f'baseline {baseline["us_per_op"]}')
+    return regressions
+
+
+def main(argv=None):
+    """Command line entry point.
+
+    Args:
+        argv (list[str]|None): Arguments. Defaults to sys.argv.
+    Returns:
+        int: Exit code, 1 if any benchmark regressed.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark MayaRootHandler against an in-memory maya.cmds.")
+    parser.add_argument("-s", "--sizes", type=int, nargs="+", default=SIZES, help="Numbers of roots.")
+    parser.add_argument("-r", "--repeat", type=int, default=REPEAT, help="Runs per benchmark.")
+    parser.add_argument("-b", "--baseline", default=BASELINE_FILE, help="Baseline file.")
+    parser.add_argument("--update-baseline", action="store_true", help="Store the results as the baseline.")
+    parser.add_argument("--time-threshold", type=float, default=TIME_THRESHOLD,
+                        help="Allowed ratio of time per operation to the baseline.")
+    parser.add_argument("-o", "--output", help="Write the results to a JSON file.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    results = run(args.sizes, args.repeat)
+    if args.output:
+        with open(args.output, "w") as stream:
+            json.dump(results, stream, indent=2)
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as stream:
+            baselines = json.load(stream)
+    if args.update_baseline:
+        baselines.update(results)
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as stream:
+            json.dump(baselines, stream, indent=2, sort_keys=True)
+            stream.write("\n")
+        LOGGER.info('Updated "%s"', args.baseline)
+        return 0
+
+    regressions = compare(results, baselines, time_threshold=args.time_threshold)
+    for regression in regressions:
+        LOGGER.error("REGRESSION %s", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
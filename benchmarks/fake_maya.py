@@ -0,0 +1,290 @@
+"""In-memory stand-in for the parts of maya.cmds used by MayaRootHandler.
+
+Models nodes with UUIDs, DAG parenting, typed and locked attributes and plug-in state, and
+counts every call by command name. Node names are unique scene-wide, and nodes can be
+looked up by name, full DAG path or UUID. Commands raise RuntimeError where maya would,
+e.g. when setting a locked attribute or creating a root node before its plug-in is loaded.
+"""
+
+
+import sys
+import types
+import uuid as uuid_module
+from collections import Counter
+
+from br2.dv_root_node.ma_reader import INT_ATTRIBUTES, ROOT_NODE_TYPE, STRING_ATTRIBUTES
+
+
+class FakeNode(object):
+    """A node of the in-memory scene."""
+    __slots__ = ("name", "node_type", "uuid", "parent", "children", "attrs", "locked")
+
+    def __init__(self, name, node_type, parent=None):
+        """Initializer.
+
+        Args:
+            name (str): Unique node name.
+            node_type (str): Node type.
+            parent (FakeNode|None): Parent node, None for world. Defaults to None.
+        """
+        self.name = name
+        self.node_type = node_type
+        self.uuid = str(uuid_module.uuid4()).upper()
+        self.parent = parent
+        self.children = []
+        self.attrs = {}
+        self.locked = set()
+        if node_type == ROOT_NODE_TYPE:
+            self.attrs.update(STRING_ATTRIBUTES)
+            self.attrs.update(INT_ATTRIBUTES)
+        if parent is not None:
+            parent.children.append(self)
+
+    @property
+    def path(self):
+        """The full DAG path of the node.
+
+        Returns:
+            str: DAG path.
+        """
+        names = []
+        node = self
+        while node is not None:
+            names.append(node.name)
+            node = node.parent
+        return "|" + "|".join(reversed(names))
+
+    def iter_descendants(self):
+        """An iterator over the descendants of the node, depth first.
+
+        Yields:
+            FakeNode: Descendant.
+        """
+        for child in self.children:
+            yield child
+            yield from child.iter_descendants()
+
+
+class FakeCmds(object):
+    """In-memory maya.cmds, holding a single scene."""
+
+    def __init__(self):
+        """Initializer."""
+        self.calls = Counter()
+        self.nodes = {}
+        self.uuids = {}
+        self.loaded_plugins = set()
+        self.scene_name = ""
+
+    def new_scene(self):
+        """Removes all nodes, keeping plug-ins loaded as maya does."""
+        self.nodes = {}
+        self.uuids = {}
+        self.scene_name = ""
+
+    def reset_calls(self):
+        """Resets the call counts."""
+        self.calls.clear()
+
+    def add_node(self, name, node_type="transform", parent=None):
+        """Adds a node to the scene without counting a call, e.g. to build benchmark scenes.
+
+        Args:
+            name (str): Node name, made unique by appending a number.
+            node_type (str): Node type. Defaults to "transform".
+            parent (str|None): Parent node name or path, None for world. Defaults to None.
+        Returns:
+            FakeNode: Node.
+        """
+        base = name
+        index = 1
+        while name in self.nodes:
+            name = f"{base.rstrip('0123456789')}{index}"
+            index += 1
+        node = FakeNode(name, node_type, self._node(parent) if parent else None)
+        self.nodes[name] = node
+        self.uuids[node.uuid] = node
+        return node
+
+    # maya.cmds
+
+    def about(self, batch=False, **kwargs):
+        self.calls["about"] += 1
+        return True
+
+    def createNode(self, node_type, name=None, parent=None, p=None, skipSelect=False, ss=False, **kwargs):
+        self.calls["createNode"] += 1
+        if node_type == ROOT_NODE_TYPE and ROOT_NODE_TYPE not in self.loaded_plugins:
+            raise RuntimeError(f"Unknown object type: {node_type}")
+        return self.add_node(name or f"{node_type}1", node_type, parent or p).name
+
+    def delete(self, *nodes, **kwargs):
+        self.calls["delete"] += 1
+        for name in _flatten(nodes):
+            node = self._node(name)
+            for doomed in [node] + list(node.iter_descendants()):
+                self.nodes.pop(doomed.name, None)
+                self.uuids.pop(doomed.uuid, None)
+            if node.parent is not None:
+                node.parent.children.remove(node)
+
+    def file(self, *args, query=False, q=False, sceneName=False, sn=False, **kwargs):
+        self.calls["file"] += 1
+        return self.scene_name
+
+    def getAttr(self, attr, **kwargs):
+        self.calls["getAttr"] += 1
+        node, name = self._attr(attr)
+        return node.attrs[name]
+
+    def listRelatives(self, node, parent=False, p=False, children=False, c=False, allDescendents=False, ad=False,
+                      type=None, fullPath=False, f=False, **kwargs):
+        self.calls["listRelatives"] += 1
+        node = self._node(node)
+        if parent or p:
+            relatives = [node.parent] if node.parent is not None else []
+        elif allDescendents or ad:
+            relatives = list(node.iter_descendants())
+        else:
+            relatives = list(node.children)
+        if type:
+            relatives = [relative for relative in relatives if relative.node_type == type]
+        if not relatives:
+            return None
+        return [relative.path if fullPath or f else relative.name for relative in relatives]
+
+    def loadPlugin(self, plugin, **kwargs):
+        self.calls["loadPlugin"] += 1
+        self.loaded_plugins.add(plugin)
+        return [plugin]
+
+    def ls(self, *args, uuid=False, long=False, l=False, type=None, typ=None, **kwargs):
+        self.calls["ls"] += 1
+        node_type = type or typ
+        if args:
+            nodes = [node for node in (self._find(name) for name in _flatten(args)) if node is not None]
+        else:
+            nodes = list(self.nodes.values())
+        if node_type:
+            nodes = [node for node in nodes if node.node_type == node_type]
+        if uuid:
+            return [node.uuid for node in nodes]
+        return [node.path if long or l else node.name for node in nodes]
+
+    def nodeType(self, node, **kwargs):
+        self.calls["nodeType"] += 1
+        return self._node(node).node_type
+
+    def objExists(self, node):
+        self.calls["objExists"] += 1
+        return self._find(node) is not None
+
+    def pluginInfo(self, plugin, query=False, q=False, loaded=False, l=False, **kwargs):
+        self.calls["pluginInfo"] += 1
+        return plugin in self.loaded_plugins
+
+    def rename(self, node, new_name, **kwargs):
+        self.calls["rename"] += 1
+        node = self._node(node)
+        if new_name in self.nodes and self.nodes[new_name] is not node:
+            raise RuntimeError(f'"{new_name}" already exists.')
+        del self.nodes[node.name]
+        node.name = new_name
+        self.nodes[new_name] = node
+        return new_name
+
+    def setAttr(self, attr, *values, lock=None, l=None, type=None, typ=None, **kwargs):
+        self.calls["setAttr"] += 1
+        node, name = self._attr(attr)
+        lock = lock if lock is not None else l
+        if values:
+            if name in node.locked:
+                raise RuntimeError(f"The attribute '{attr}' is locked or connected and cannot be modified.")
+            node.attrs[name] = values[0]
+        if lock is not None:
+            if lock:
+                node.locked.add(name)
+            else:
+                node.locked.discard(name)
+
+    def unloadPlugin(self, plugin, **kwargs):
+        self.calls["unloadPlugin"] += 1
+        self.loaded_plugins.discard(plugin)
+        return [plugin]
+
+    def _attr(self, attr):
+        """The node and attribute name of an attribute path.
+
+        Args:
+            attr (str): "<node>.<attribute>".
+        Returns:
+            tuple[FakeNode, str]: Node and attribute name.
+        Raises:
+            RuntimeError: If the node or attribute does not exist.
+        """
+        node_name, _, name = attr.rpartition(".")
+        node = self._node(node_name)
+        if name not in node.attrs:
+            raise RuntimeError(f"No object matches name: {attr}")
+        return node, name
+
+    def _find(self, name):
+        """The node with a name, DAG path or UUID.
+
+        Args:
+            name (str): Node name, DAG path or UUID.
+        Returns:
+            FakeNode|None: Node, None if no node matches.
+        """
+        node = self.uuids.get(name) or self.nodes.get(name.rsplit("|", 1)[-1])
+        if node is not None and name.startswith("|") and node.path != name:
+            return None
+        return node
+
+    def _node(self, name):
+        """The node with a name, DAG path or UUID.
+
+        Args:
+            name (str): Node name, DAG path or UUID.
+        Returns:
+            FakeNode: Node.
+        Raises:
+            RuntimeError: If no node matches.
+        """
+        node = self._find(name)
+        if node is None:
+            raise RuntimeError(f"No object matches name: {name}")
+        return node
+
+
+def install(cmds=None):
+    """Installs a FakeCmds as maya.cmds, so modules importing maya.cmds run without maya.
+
+    Args:
+        cmds (FakeCmds|None): Instance to install. Defaults to a new, empty scene.
+    Returns:
+        FakeCmds: Installed instance.
+    """
+    cmds = cmds or FakeCmds()
+    maya = sys.modules.get("maya") or types.ModuleType("maya")
+    maya.cmds = cmds
+    sys.modules["maya"] = maya
+    sys.modules["maya.cmds"] = cmds
+    return cmds
+
+
+def _flatten(args):
+    """Flattens command arguments given as strings and/or lists of strings.
+
+    Args:
+        args (tuple): Arguments.
+    Returns:
+        list[str]: Names.
+    """
+    names = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            names.extend(arg)
+        else:
+            names.append(arg)
+    return names
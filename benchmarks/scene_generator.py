@@ -0,0 +1,406 @@
+"""Seeded generator of synthetic catalogs and Maya ASCII scenes for load and scale testing.
+
+Writes to the output directory:
+    catalog.json: File Collection records, in the format of br2.update_assets.test_db, for
+        every version of every synthetic dpack. Point BR2_CATALOG at it to use it as the catalog.
+    assets/<dpack>/<dpack>_V###.ma: One Maya ASCII file per version, holding a grid mesh of the
+        requested number of faces and references to the latest versions of other dpacks.
+    shot.ma: A scene of nested DvRoots pointing at catalog versions, some of them outdated,
+        without their content, e.g. for ma_reader, where_used and the Update dialog.
+    shot.json: The roots of shot.ma and their catalog records, from which load_shot builds the
+        same scene in maya through MayaRootHandler and reference_and_reparent.
+
+The same seed and settings always generate the same files.
+
+Usage:
+    python benchmarks/scene_generator.py <output dir> [--roots N] [--depth N] [--dpacks N]
+        [--versions N] [--faces N] [--fanout N] [--seed N]
+
+    # In maya:
+    from br2.benchmarks.scene_generator import load_shot
+    load_shot("<output dir>/shot.json")
+"""
+
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+
+LOGGER = logging.getLogger(__name__)
+ROOT_NODE_TYPE = "br2DvRootNode"
+ASSET_TYPES = ("Character", "Prop", "Set", "Vehicle", "Camera")
+STATUSES = ("wip", "review", "approved")
+USERS = ("Ada Park", "Ben Ortiz", "Chloe Nakamura", "Dev Patel", "Eli Novak")
+TASKS = ("Model", "LookDev", "Rig")
+PROJECT = "Synthetic"
+PROJECT_ID = 1
+FIRST_DPACK_ID = 10000
+FIRST_FC_ID = 100000
+FIRST_DATE = datetime(2021, 1, 4, tzinfo=timezone.utc)
+# Values per setAttr statement of mesh data.
+MESH_CHUNK_SIZE = 1000
+
+GeneratorSettings = namedtuple("GeneratorSettings", [
+    "roots", "depth", "dpacks", "versions", "faces", "fanout", "outdated", "seed"])
+GeneratorSettings.__new__.__defaults__ = (1000, 3, 100, 5, 100, 0, 0.3, 0)
+
+
+def generate(output_dir, settings=GeneratorSettings()):
+    """Generates a synthetic catalog, its asset files and a shot scene.
+
+    Args:
+        output_dir (str): Output directory. Created if it does not exist.
+        settings (GeneratorSettings): Counts and seed. Defaults to GeneratorSettings().
+    Returns:
+        dict: Paths of the generated catalog, shot scene and shot plan, and the number of files written.
+    """
+    rng = random.Random(settings.seed)
+    output_dir = os.path.abspath(output_dir)
+    catalog = generate_catalog(rng, output_dir, settings)
+    latest = {}
+    for record in catalog:
+        latest[record["id_dpack"]] = record
+
+    dpack_ids = sorted(latest)
+    for record in catalog:
+        # References only go to dpacks further down the list, so there are no reference cycles.
+        index = dpack_ids.index(record["id_dpack"])
+        candidates = dpack_ids[index + 1:]
+        referenced = rng.sample(candidates, min(settings.fanout, len(candidates)))
+        write_asset_file(record, [latest[dpack_id] for dpack_id in referenced], settings.faces,
+                         random.Random(f'{settings.seed}:{record["id_fc"]}'))
+
+    roots = generate_roots(rng, catalog, settings)
+    paths = {
+        "catalog": os.path.join(output_dir, "catalog.json"),
+        "scene": os.path.join(output_dir, "shot.ma"),
+        "plan": os.path.join(output_dir, "shot.json"),
+    }
+    with open(paths["catalog"], "w") as stream:
+        json.dump(catalog, stream, indent=2)
+    write_shot_file(paths["scene"], roots)
+    with open(paths["plan"], "w") as stream:
+        json.dump({"settings": settings._asdict(), "roots": roots}, stream, indent=2)
+    paths["files"] = len(catalog) + 3
+    return paths
+
+
+def generate_catalog(rng, output_dir, settings):
+    """Generates the File Collection records of every version of every dpack.
+
+    Args:
+        rng (random.Random): Random generator.
+        output_dir (str): Output directory.
+        settings (GeneratorSettings): Settings.
+    Returns:
+        list[dict]: Records, oldest version first within each dpack.
+    """
+    catalog = []
+    fc_id = FIRST_FC_ID
+    for index in range(settings.dpacks):
+        asset_type = ASSET_TYPES[index % len(ASSET_TYPES)]
+        task = rng.choice(TASKS)
+        name = f"{asset_type}{index:05d}_{task}"
+        date = FIRST_DATE + timedelta(days=rng.randrange(30))
+        for version in range(1, settings.versions + 1):
+            date += timedelta(days=rng.randrange(1, 10), seconds=rng.randrange(86400))
+            user = rng.randrange(len(USERS))
+            catalog.append({
+                "name_dpack": name,
+                "path_file": os.path.join(output_dir, "assets", name, f"{name}_V{version:03d}.ma").replace("\\", "/"),
+                "version_fc": str(version),
+                "task": task,
+                "project": PROJECT,
+                "id_dpack": FIRST_DPACK_ID + index,
+                "id_fc": fc_id,
+                "id_project": PROJECT_ID,
+                "id_task": FIRST_DPACK_ID + index,
+                "id_user": user + 1,
+                "status": rng.choice(STATUSES) if version == settings.versions else "approved",
+                "type_asset": asset_type,
+                "user": USERS[user],
+                "date_created": date.isoformat(sep=" "),
+            })
+            fc_id += 1
+    return catalog
+
+
+def generate_roots(rng, catalog, settings):
+    """Generates the roots of the shot. Roots nest under earlier roots, up to the depth setting.
+
+    Args:
+        rng (random.Random): Random generator.
+        catalog (list[dict]): Catalog records.
+        settings (GeneratorSettings): Settings.
+    Returns:
+        list[dict]: Roots with name, parent, uuid and record keys, parents first.
+    """
+    versions = {}
+    for record in catalog:
+        versions.setdefault(record["id_dpack"], []).append(record)
+    dpack_ids = sorted(versions)
+
+    roots = []
+    nestable = []
+    depths = {}
+    for index in range(settings.roots):
+        dpack_versions = versions[rng.choice(dpack_ids)]
+        if len(dpack_versions) > 1 and rng.random() < settings.outdated:
+            record = rng.choice(dpack_versions[:-1])
+        else:
+            record = dpack_versions[-1]
+        parent = None
+        if nestable and rng.random() < 0.5:
+            parent = rng.choice(nestable)
+        name = f'{record["name_dpack"]}_{index:06d}'
+        depths[name] = depths[parent] + 1 if parent else 1
+        if depths[name] < settings.depth:
+            nestable.append(name)
+        roots.append({
+            "name": name,
+            "parent": parent,
+            "uuid": str(uuid.UUID(int=rng.getrandbits(128))).upper(),
+            "record": record,
+        })
+    return roots
+
+
+def write_asset_file(record, references, faces, rng):
+    """Writes the Maya ASCII file of a version: a grid mesh, and references to other assets.
+
+    Args:
+        record (dict): Catalog record of the version.
+        references (list[dict]): Catalog records of the referenced versions.
+        faces (int): Number of mesh faces, rounded down to a square grid.
+        rng (random.Random): Random generator of the mesh.
+    """
+    path = record["path_file"]
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    name = record["name_dpack"]
+    with open(path, "w", newline="\n") as stream:
+        _write_header(stream, os.path.basename(path))
+        for index, reference in enumerate(references):
+            namespace = f'{reference["name_dpack"]}_{index}'
+            stream.write(f'file -rdi 1 -ns "{namespace}" -rfn "{namespace}RN" -typ "mayaAscii"\n'
+                         f'\t\t "{reference["path_file"]}";\n')
+            stream.write(f'file -r -ns "{namespace}" -dr 1 -rfn "{namespace}RN" -typ "mayaAscii"\n'
+                         f'\t\t "{reference["path_file"]}";\n')
+        _write_requires(stream)
+        stream.write(f'createNode transform -n "{name}_grp";\n')
+        stream.write(f'createNode transform -n "{name}_geo" -p "{name}_grp";\n')
+        _write_grid_mesh(stream, f"{name}_geoShape", f"{name}_geo", max(1, int(faces ** 0.5)), rng)
+        for index, reference in enumerate(references):
+            namespace = f'{reference["name_dpack"]}_{index}'
+            stream.write(f'createNode reference -n "{namespace}RN";\n')
+            stream.write(f'\tsetAttr ".ed" -type "dataReferenceEdits" "{namespace}RN";\n')
+        stream.write(f'connectAttr "{name}_geoShape.iog" ":initialShadingGroup.dsm" -na;\n')
+        stream.write(f"// End of {os.path.basename(path)}\n")
+
+
+def write_shot_file(path, roots):
+    """Writes the Maya ASCII shot scene holding the roots, without their content.
+
+    Args:
+        path (str): Scene file path.
+        roots (list[dict]): Roots, see generate_roots.
+    """
+    with open(path, "w", newline="\n") as stream:
+        _write_header(stream, os.path.basename(path))
+        _write_requires(stream)
+        for root in roots:
+            record = root["record"]
+            parent = f' -p "{root["parent"]}"' if root["parent"] else ""
+            stream.write(f'createNode {ROOT_NODE_TYPE} -n "{root["name"]}"{parent};\n')
+            stream.write(f'\trename -uid "{root["uuid"]}";\n')
+            for attr, value in (
+                    ("asset_name", root["name"]),
+                    ("asset_type", record["type_asset"]),
+                    ("date_created", record["date_created"]),
+                    ("file_name", os.path.basename(record["path_file"])),
+                    ("file_type", os.path.splitext(record["path_file"])[1]),
+                    ("node_version", "1.0"),
+                    ("project", record["project"]),
+                    ("status", record["status"]),
+                    ("task", record["task"]),
+                    ("user", record["user"]),
+                    ("version", record["version_fc"])):
+                stream.write(f'\tsetAttr -l on ".{attr}" -type "string" "{value}";\n')
+            for attr, value in (
+                    ("dpack_id", record["id_dpack"]),
+                    ("fc_id", record["id_fc"]),
+                    ("project_id", record["id_project"]),
+                    ("task_id", record["id_task"]),
+                    ("user_id", record["id_user"])):
+                stream.write(f'\tsetAttr -l on ".{attr}" {value};\n')
+        stream.write(f"// End of {os.path.basename(path)}\n")
+
+
+def load_shot(plan_path, limit=None):
+    """Builds a generated shot in the calling maya session, creating each root with MayaRootHandler
+    and loading its version with reference_and_reparent.
+
+    Args:
+        plan_path (str): Shot plan file, see generate.
+        limit (int|None): Maximum number of roots to load. Defaults to all roots.
+    Returns:
+        float: Seconds taken.
+    """
+    from br2.dv_root_node.cmds_trace import cmds
+    from br2.dv_root_node.node_handler import MayaRootHandler
+    from br2.update_assets.test_version_swap import reference_and_reparent
+
+    with open(plan_path) as stream:
+        roots = json.load(stream)["roots"][:limit]
+
+    start = time.perf_counter()
+    nodes = {}
+    for root in roots:
+        record = root["record"]
+        node = MayaRootHandler.create(
+            root["name"],
+            asset_type=record["type_asset"],
+            date_created=record["date_created"],
+            dpack_id=record["id_dpack"],
+            fc_id=record["id_fc"],
+            status=record["status"],
+            file_name=os.path.basename(record["path_file"]),
+            file_type=os.path.splitext(record["path_file"])[1],
+            project=record["project"],
+            project_id=record["id_project"],
+            version=record["version_fc"],
+            task=record["task"],
+            task_id=record["id_task"],
+            user=record["user"],
+            user_id=record["id_user"])
+        if root["parent"] in nodes:
+            cmds.parent(node.dag_path, nodes[root["parent"]].dag_path)
+        reference_and_reparent(record["path_file"], node.dag_path)
+        nodes[root["name"]] = node
+    seconds = time.perf_counter() - start
+    LOGGER.info('Loaded %d roots from "%s" in %.3fs', len(roots), plan_path, seconds)
+    return seconds
+
+
+def _write_grid_mesh(stream, name, parent, size, rng):
+    """Writes a mesh node holding a grid of size x size quads, with random heights.
+
+    Args:
+        stream (file): Output stream.
+        name (str): Mesh node name.
+        parent (str): Parent transform name.
+        size (int): Number of quads along each side.
+        rng (random.Random): Random generator of the heights.
+    """
+    columns = size + 1
+    vertices = []
+    for j in range(columns):
+        for i in range(columns):
+            vertices.append(f"{i - size / 2:g} {rng.random() * 0.1:.4f} {j - size / 2:g}")
+    # Edges along i first, then along j, each as start vertex, end vertex and hardness.
+    edges = []
+    for j in range(columns):
+        for i in range(size):
+            edges.append(f"{j * columns + i} {j * columns + i + 1} 0")
+    for i in range(columns):
+        for j in range(size):
+            edges.append(f"{j * columns + i} {(j + 1) * columns + i} 0")
+    along_j = columns * size
+    faces = []
+    for j in range(size):
+        for i in range(size):
+            bottom = j * size + i
+            top = (j + 1) * size + i
+            right = along_j + (i + 1) * size + j
+            left = along_j + i * size + j
+            faces.append(f"f 4 {bottom} {right} {-(top + 1)} {-(left + 1)}")
+
+    stream.write(f'createNode mesh -n "{name}" -p "{parent}";\n')
+    stream.write('\tsetAttr -k off ".v";\n')
+    _write_chunks(stream, "vt", vertices)
+    _write_chunks(stream, "ed", edges)
+    for start in range(0, len(faces), MESH_CHUNK_SIZE):
+        chunk = faces[start:start + MESH_CHUNK_SIZE]
+        stream.write(f'\tsetAttr -s {len(chunk)} -ch {len(chunk) * 4} ".fc[{start}:{start + len(chunk) - 1}]" '
+                     f'-type "polyFaces"\n\t\t' + "\n\t\t".join(chunk) + ";\n")
+
+
+def _write_chunks(stream, attr, values):
+    """Writes the values of a mesh array attribute in chunks of MESH_CHUNK_SIZE.
+
+    Args:
+        stream (file): Output stream.
+        attr (str): Attribute short name.
+        values (list[str]): Values.
+    """
+    stream.write(f'\tsetAttr -s {len(values)} ".{attr}";\n')
+    for start in range(0, len(values), MESH_CHUNK_SIZE):
+        chunk = values[start:start + MESH_CHUNK_SIZE]
+        stream.write(f'\tsetAttr ".{attr}[{start}:{start + len(chunk) - 1}]"\n\t\t' + "\n\t\t".join(chunk) + ";\n")
+
+
+def _write_header(stream, file_name):
+    """Writes the header comments of a Maya ASCII file.
+
+    Args:
+        stream (file): Output stream.
+        file_name (str): File name.
+    """
+    stream.write(f"//Maya ASCII 2022 scene\n//Name: {file_name}\n//Codeset: UTF-8\n")
+
+
+def _write_requires(stream):
+    """Writes the requirements and units of a Maya ASCII file.
+
+    Args:
+        stream (file): Output stream.
+    """
+    stream.write('requires maya "2022";\n')
+    stream.write(f'requires -nodeType "{ROOT_NODE_TYPE}" "{ROOT_NODE_TYPE}.py" "1.0";\n')
+    stream.write("currentUnit -l centimeter -a degree -t film;\n")
+    stream.write('fileInfo "application" "maya";\n')
+
+
+def main(argv=None):
+    """Command line entry point.
+
+    Args:
+        argv (list[str]|None): Arguments. Defaults to sys.argv.
+    Returns:
+        int: Exit code.
+    """
+    defaults = GeneratorSettings()
+    parser = argparse.ArgumentParser(description="Generate a synthetic catalog and scenes.")
+    parser.add_argument("output", help="Output directory.")
+    parser.add_argument("--roots", type=int, default=defaults.roots, help="Number of roots in the shot.")
+    parser.add_argument("--depth", type=int, default=defaults.depth, help="Maximum root nesting depth.")
+    parser.add_argument("--dpacks", type=int, default=defaults.dpacks, help="Number of dpacks.")
+    parser.add_argument("--versions", type=int, default=defaults.versions, help="Versions per dpack.")
+    parser.add_argument("--faces", type=int, default=defaults.faces, help="Mesh faces per asset file.")
+    parser.add_argument("--fanout", type=int, default=defaults.fanout, help="References per asset file.")
+    parser.add_argument("--outdated", type=float, default=defaults.outdated, help="Share of outdated roots.")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="Random seed.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    settings = GeneratorSettings(args.roots, args.depth, args.dpacks, args.versions, args.faces, args.fanout,
+                                 args.outdated, args.seed)
+    start = time.perf_counter()
+    paths = generate(args.output, settings)
+    LOGGER.info("Wrote %d files in %.3fs", paths["files"], time.perf_counter() - start)
+    json.dump(paths, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,74 +1,491 @@
-from PySide2.QtCore import QItemSelectionModel, QSortFilterProxyModel
-from PySide2.QtGui import QStandardItem, QStandardItemModel
-from PySide2.QtWidgets import QComboBox, QDialog, QHBoxLayout, QLabel, QTreeView, QVBoxLayout, QWidget
+import getpass
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+from PySide2.QtCore import (QItemSelectionModel, QObject, QProcess, QProcessEnvironment, QSortFilterProxyModel, Qt,
+                            Signal)
+from PySide2.QtGui import QBrush, QStandardItem, QStandardItemModel
+from PySide2.QtWidgets import QCheckBox, QDialog, QHBoxLayout, QLabel, QPushButton, QTreeView, QVBoxLayout, QWidget
 from shiboken2 import wrapInstance
 
 import maya.OpenMayaUI as apiUI
 
+maya_path = r"C:\Users\john.russell\Code\git_stuff\dreamview-studios-inc\DreamViewStudios\application\maya"
+if maya_path not in sys.path:
+    sys.path.append(maya_path)
+from br2.check_in.export_worker import RESULT_PREFIX, STATUS_DONE, STATUS_FAILED
+from br2.check_in.transfer import MAX_TRANSFERS
+from br2.dv_root_node.cmds_trace import cmds, trace_action, write_trace
+from br2.dv_root_node.node_handler import MayaRootHandler, dirty_roots, ls_root_nodes
+from br2.update_assets.test_db import AssetData, get_versions_data, publish_version
+
 
+LOGGER = logging.getLogger(__name__)
+COL_LBL_ASSET = "Asset"
+COL_LBL_VERSION = "Version in Scene"
+COL_LBL_NEXT_VERSION = "Next Version"
+COL_LBL_STATUS = "Status"
+COL_LBL_TIME = "Time"
 COLUMN_HEADERS = [
-    "Column 0",
-    "Column 1",
-    "Column 2"
+    COL_LBL_ASSET,
+    COL_LBL_VERSION,
+    COL_LBL_NEXT_VERSION,
+    COL_LBL_STATUS,
+    COL_LBL_TIME
 ]
+COL_ASSET, COL_VERSION, COL_NEXT_VERSION, COL_STATUS, COL_TIME = range(len(COLUMN_HEADERS))
+MAX_EXPORT_WORKERS = 4
+STATUS_QUEUED = "queued"
+_VERSION_RE = re.compile(r"([_.]v)(\d+)", re.IGNORECASE)
 
 
 class CheckInWidget(QWidget):
     def __init__(self, parent=None):
+        """
+
+        Args:
+            parent (PySide2.QtCore.QObject):
+        """
         super(CheckInWidget, self).__init__(parent)
 
         # UI widgets
-        self.cmbo_bx_tasks = None
-        self.lbl_tasks = None
+        self.btn_check_in = None
+        self.chk_bx_show_all = None
+        self.lbl_status = None
         self.tree_view = None
+        self.source_model = None
+        self.runner = None
 
         self.setup_ui()
 
+    @trace_action("Check-In: check in")
+    def check_in(self):
+        """Exports the checked roots to their next versions."""
+        jobs = self.source_model.start_jobs()
+        if not jobs:
+            self.lbl_status.setText("Nothing to check in.")
+            return
+        self.btn_check_in.setEnabled(False)
+        self.lbl_status.setText("Checking in {} root(s)...".format(len(jobs)))
+        self.runner.start(jobs)
+
     def connect_signals(self):
-        pass
+        """
+
+        """
+        self.btn_check_in.clicked.connect(self.check_in)
+        self.chk_bx_show_all.toggled.connect(self.refresh)
+        self.runner.root_finished.connect(publish_result)
+        self.runner.root_finished.connect(self.source_model.set_result)
+        self.runner.finished.connect(self.show_summary)
 
     def setup_ui(self):
+        """
+
+        """
         self.tree_view = QTreeView(self)
+        self.tree_view.setAlternatingRowColors(True)
+        self.tree_view.setUniformRowHeights(True)
+        self.runner = CheckInRunner(self)
 
         proxy_model = QSortFilterProxyModel(self)
-        source_model = ModelImport(self.tree_view)
-        proxy_model.setSourceModel(source_model)
+        self.source_model = ModelCheckIn(self.tree_view)
+        proxy_model.setSourceModel(self.source_model)
         self.tree_view.setModel(proxy_model)
 
-        self.lbl_tasks = QLabel("Tasks")
-        self.cmbo_bx_tasks = QComboBox(self)
+        sel_model = QItemSelectionModel(proxy_model)
+        self.tree_view.setSelectionModel(sel_model)
+
+        self.lbl_status = QLabel(self)
+        self.chk_bx_show_all = QCheckBox("Show Unmodified Roots", self)
+        self.btn_check_in = QPushButton("Check In", self)
 
-        lyt_h_tasks = QHBoxLayout()
-        lyt_h_tasks.addWidget(self.lbl_tasks)
-        lyt_h_tasks.addWidget(self.cmbo_bx_tasks)
+        lyt_h_check_in = QHBoxLayout()
+        lyt_h_check_in.addWidget(self.chk_bx_show_all)
+        lyt_h_check_in.addWidget(self.lbl_status)
+        lyt_h_check_in.addStretch()
+        lyt_h_check_in.addWidget(self.btn_check_in)
 
         lyt_v_main = QVBoxLayout()
-        lyt_v_main.addLayout(lyt_h_tasks)
         lyt_v_main.addWidget(self.tree_view)
+        lyt_v_main.addLayout(lyt_h_check_in)
         self.setLayout(lyt_v_main)
 
         self.connect_signals()
 
-        source_model.populate()
+        self.refresh()
+
+    def refresh(self, *args):
+        """Lists the roots that can be checked in. Only modified roots are listed unless Show Unmodified Roots is
+        checked.
+        """
+        self.source_model.populate(modified_only=not self.chk_bx_show_all.isChecked())
+        self.tree_view.header().resizeSections(self.tree_view.header().ResizeToContents)
+
+    def show_summary(self, summary):
+        """Shows the outcome of a check-in.
 
+        Args:
+            summary (dict): Summary with roots, failed and seconds keys.
+        """
+        self.btn_check_in.setEnabled(True)
+        self.lbl_status.setText("Checked in {} of {} root(s) in {:.1f}s.".format(
+            summary["roots"] - summary["failed"], summary["roots"], summary["seconds"]))
+
+    def shutdown(self):
+        """Stops a check-in still running, e.g. when the dialog closes."""
+        self.runner.cancel()
+        write_trace()
+
+
+class ModelCheckIn(QStandardItemModel):
+    """Roots of the scene that can be checked in, with the status of their last check-in."""
+    # roles
+    uuid_role = Qt.UserRole
+    path_role = Qt.UserRole + 1
+    next_version_role = Qt.UserRole + 2
+    previous_hash_role = Qt.UserRole + 3
 
-class ModelImport(QStandardItemModel):
     def __init__(self, parent=None):
-        super(ModelImport, self).__init__(parent)
+        """
+
+        Args:
+            parent (PySide2.QtCore.QObject):
+        """
+        super(ModelCheckIn, self).__init__(parent)
 
         self.setHorizontalHeaderLabels(COLUMN_HEADERS)
+        self.rows_by_uuid = {}
+
+    @trace_action("Check-In: populate")
+    def populate(self, modified_only=True):
+        """Lists the roots of the scene. Modified and selected roots are checked.
+
+        Args:
+            modified_only (bool): Whether to only list the roots modified since they were loaded or last checked
+                in, see MayaRootHandler.is_dirty. Defaults to True.
+        """
+        self.removeRows(0, self.rowCount())
+        self.rows_by_uuid = {}
+        selected = set(cmds.ls(selection=True, uuid=True) or [])
+        if modified_only:
+            roots = dirty_roots()
+        else:
+            roots = [MayaRootHandler(node) for node in ls_root_nodes()]
+        for root in roots:
+            node = root.dag_path
+
+            item_asset = QStandardItem(root.dag_name)
+            item_asset.setCheckable(True)
+            item_asset.setCheckState(Qt.Checked if root.is_dirty or root.uuid in selected else Qt.Unchecked)
+            item_asset.setData(root.uuid, self.uuid_role)
+            item_asset.setToolTip(node)
+            items_row = [item_asset] + [QStandardItem("") for _ in COLUMN_HEADERS[1:]]
+            for item in items_row[1:]:
+                item.setEditable(False)
+            self.rows_by_uuid[root.uuid] = self.rowCount()
+            self.appendRow(items_row)
+            self.update_next_version(self.rowCount() - 1, root)
+
+    def update_next_version(self, row, root):
+        """Shows the version of a root and the version it checks in to.
+
+        Args:
+            row (int): Row of the root.
+            root (MayaRootHandler): Root.
+        """
+        path, next_version, previous_hash, error = get_next_version(root)
+        item_asset = self.item(row, COL_ASSET)
+        item_asset.setData(path, self.path_role)
+        item_asset.setData(next_version, self.next_version_role)
+        item_asset.setData(previous_hash, self.previous_hash_role)
+        self.item(row, COL_VERSION).setText(str(root.version))
+        self.item(row, COL_NEXT_VERSION).setText(str(next_version) if next_version is not None else "")
+        self.item(row, COL_NEXT_VERSION).setToolTip(path or "")
+        if error is not None:
+            self.item(row, COL_STATUS).setText(error)
+
+    def set_result(self, result):
+        """Shows the result of a root's export.
+
+        Args:
+            result (dict): Result, see br2.check_in.export_worker.export_root.
+        """
+        row = self.rows_by_uuid.get(result["uuid"])
+        if row is None:
+            return
+        item_status = self.item(row, COL_STATUS)
+        item_status.setText(result["status"])
+        item_status.setToolTip(result["error"] or "")
+        if result["status"] == STATUS_FAILED:
+            item_status.setForeground(QBrush(Qt.red))
+        elif result["status"] == STATUS_DONE:
+            nodes = cmds.ls(result["uuid"], long=True)
+            if nodes:
+                self.update_next_version(row, MayaRootHandler(nodes[0]))
+        item_time = self.item(row, COL_TIME)
+        item_time.setText("{:.1f}s".format(result["seconds"]) if result["seconds"] is not None else "")
+        if result.get("bytes_per_second") is not None:
+            item_time.setToolTip("Copied in {:.1f}s at {:.1f} MB/s".format(
+                result["transfer_seconds"], result["bytes_per_second"] / float(1 << 20)))
+        else:
+            item_time.setToolTip("")
+
+    def start_jobs(self):
+        """Marks the checked roots as queued.
+
+        Returns:
+            list[dict]: Jobs with uuid, node, path, version and previous_hash keys, one per checked root with a
+                next version.
+        """
+        jobs = []
+        for row in range(self.rowCount()):
+            item_asset = self.item(row, COL_ASSET)
+            path = item_asset.data(self.path_role)
+            if item_asset.checkState() != Qt.Checked or path is None:
+                continue
+            jobs.append({
+                "uuid": item_asset.data(self.uuid_role),
+                "node": item_asset.toolTip(),
+                "path": path,
+                "version": item_asset.data(self.next_version_role),
+                "previous_hash": item_asset.data(self.previous_hash_role),
+            })
+            self.item(row, COL_STATUS).setText(STATUS_QUEUED)
+            self.item(row, COL_STATUS).setToolTip("")
+            self.item(row, COL_STATUS).setData(None, Qt.ForegroundRole)
+            self.item(row, COL_TIME).setText("")
+        return jobs
+
+
+class CheckInRunner(QObject):
+    """Runs check-in exports in headless mayapy worker processes.
+    The calling session only writes the scene to a temp file and starts a single mayapy
+    process, which exports the roots in parallel from a bounded pool of workers, see
+    br2.check_in.export_worker. Results are read as they are written, so the calling session
+    stays responsive and shows every root's status as soon as its export finishes.
+    """
+
+    # signals
+    root_finished = Signal(dict)
+    finished = Signal(dict)
+
+    def __init__(self, parent=None):
+        """Initializer.
+
+        Args:
+            parent (PySide2.QtCore.QObject): Parent object.
+        """
+        super(CheckInRunner, self).__init__(parent)
+
+        self._process = None
+        self._temp_dir = None
+        self._buffer = b""
+        self._jobs = []
+        self._results = {}
+        self._summary_seconds = None
+
+    def cancel(self):
+        """Kills the running check-in, if any."""
+        if self._process is not None:
+            self._process.kill()
+            self._process.waitForFinished()
+
+    def is_running(self):
+        """
+
+        Returns:
+            bool: True if a check-in is running.
+        """
+        return self._process is not None
+
+    def start(self, jobs, workers=MAX_EXPORT_WORKERS, transfers=MAX_TRANSFERS):
+        """Starts exporting roots.
+
+        Args:
+            jobs (list[dict]): Jobs, see ModelCheckIn.start_jobs.
+            workers (int): Maximum number of worker processes. Defaults to MAX_EXPORT_WORKERS.
+            transfers (int): Maximum number of concurrent copies to storage. Defaults to MAX_TRANSFERS.
+        Raises:
+            RuntimeError: If a check-in is already running.
+        """
+        if self._process is not None:
+            raise RuntimeError("A check-in is already running.")
+        self._jobs = jobs
+        self._results = {}
+        self._summary_seconds = None
+        self._buffer = b""
+        self._temp_dir = tempfile.mkdtemp(prefix="br2_check_in_")
+        scene = os.path.join(self._temp_dir, "check_in.ma")
+        jobs_path = os.path.join(self._temp_dir, "jobs.json")
+        cmds.file(scene, exportAll=True, type="mayaAscii", preserveReferences=True, force=True)
+        with open(jobs_path, "w") as stream:
+            json.dump(jobs, stream)
+
+        environment = QProcessEnvironment.systemEnvironment()
+        python_path = [get_package_parent_dir()]
+        if environment.contains("PYTHONPATH"):
+            python_path.append(environment.value("PYTHONPATH"))
+        environment.insert("PYTHONPATH", os.pathsep.join(python_path))
+
+        self._process = QProcess(self)
+        self._process.setProcessEnvironment(environment)
+        self._process.readyReadStandardOutput.connect(self._read_results)
+        self._process.finished.connect(self._on_finished)
+        self._process.start(get_mayapy(), [
+            "-m", "br2.check_in.export_worker", scene, jobs_path, "-w", str(min(workers, len(jobs))),
+            "-t", str(transfers)])
+
+    def _on_finished(self, *args):
+        """Reports the roots without a result as failed, and the summary of the check-in."""
+        self._read_results()
+        error = bytes(self._process.readAllStandardError()).decode(errors="replace").strip()
+        self._process.deleteLater()
+        self._process = None
+        shutil.rmtree(self._temp_dir, ignore_errors=True)
+        self._temp_dir = None
+
+        for job in self._jobs:
+            if job["uuid"] not in self._results:
+                self._add_result(dict(job, status=STATUS_FAILED, content_hash=None, seconds=None, pid=None,
+                                      error=error.splitlines()[-1] if error else "Check-in did not complete."))
+        seconds = [r["seconds"] for r in self._results.values() if r["seconds"] is not None]
+        self.finished.emit({
+            "roots": len(self._jobs),
+            "failed": sum(1 for r in self._results.values() if r["status"] == STATUS_FAILED),
+            "seconds": self._summary_seconds if self._summary_seconds is not None else max(seconds or [0.0]),
+        })
+
+    def _add_result(self, result):
+        """Records the result of a root's export.
+
+        Args:
+            result (dict): Result, see br2.check_in.export_worker.export_root.
+        """
+        self._results[result["uuid"]] = result
+        self.root_finished.emit(result)
+
+    def _read_results(self):
+        """Reads the results written by the worker so far. Other output of mayapy, e.g. plug-in
+        messages, is logged.
+        """
+        self._buffer += bytes(self._process.readAllStandardOutput())
+        *lines, self._buffer = self._buffer.split(b"\n")
+        for line in lines:
+            line = line.decode(errors="replace").rstrip()
+            if not line.startswith(RESULT_PREFIX):
+                if line:
+                    LOGGER.debug("mayapy: %s", line)
+                continue
+            try:
+                result = json.loads(line[len(RESULT_PREFIX):])
+            except ValueError:
+                LOGGER.warning("Unreadable check-in result: %s", line)
+                continue
+            if "summary" in result:
+                self._summary_seconds = result["summary"]["seconds"]
+            else:
+                self._add_result(result)
+
+
+def get_mayapy():
+    """The mayapy executable of the calling maya session. The MAYAPY environment variable overrides it.
+
+    Returns:
+        str: Executable path.
+    """
+    mayapy = os.environ.get("MAYAPY")
+    if mayapy:
+        return mayapy
+    name = "mayapy.exe" if sys.platform == "win32" else "mayapy"
+    return os.path.join(os.path.dirname(sys.executable), name)
+
+
+def get_next_version(root):
+    """The versioned file a root checks in to: the latest catalog file of its Deliverable Package with
+    the version number incremented.
+
+    Args:
+        root (MayaRootHandler): Root.
+    Returns:
+        tuple[str|None, int|None, str|None, str|None]: Path, version number, content hash of the latest version
+            and error message, if the root can not be checked in.
+    """
+    latest = get_versions_data(root.dpack_id).latest()
+    if latest is None:
+        return None, None, None, "no catalog versions"
+    next_version = latest.version_fc + 1
+    path = get_version_path(latest.path_file, next_version)
+    if path is None:
+        return None, None, None, "no version in file name"
+    return path, next_version, latest.content_hash or None, None
+
+
+def get_package_parent_dir():
+    """The directory holding the br2 package, for worker processes to import it from.
+
+    Returns:
+        str: Directory path.
+    """
+    return os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def get_version_path(path, version):
+    """Replaces the last version number in a file path, keeping its padding.
+
+    Args:
+        path (str): File path, e.g. "scenes/KDurant_Base_lookDev_V026.ma".
+        version (int): Version number.
+    Returns:
+        str|None: File path, None if the path has no version number.
+    """
+    matches = list(_VERSION_RE.finditer(path))
+    if not matches:
+        return None
+    match = matches[-1]
+    digits = str(version).zfill(len(match.group(2)))
+    return path[:match.start(2)] + digits + path[match.end(2):]
+
+
+@trace_action("Check-In: publish")
+def publish_result(result):
+    """Publishes a checked in file to the catalog and points its root at the new version. Roots whose export
+    was unchanged only record their content hash.
+
+    Args:
+        result (dict): Result, see br2.check_in.export_worker.export_root.
+    """
+    nodes = cmds.ls(result["uuid"], long=True)
+    if result["status"] == STATUS_FAILED or not nodes:
+        return
+    root = MayaRootHandler(nodes[0])
+    root.content_hash = result["content_hash"]
+    if result["status"] != STATUS_DONE:
+        root.mark_clean()
+        return
 
-    def populate(self):
-        for r in range(10):
-            item_asset = QStandardItem(str(r))
-            self.invisibleRootItem().appendRow(item_asset)
-            for v in range(3):
-                items_row = []
-                for c in range(len(COLUMN_HEADERS)):
-                    column = COLUMN_HEADERS[c]
-                    item_column = QStandardItem("{}v, {}".format(3 - v, c))
-                    items_row.append(item_column)
-                item_asset.appendRow(items_row)
+    asset = publish_version(AssetData(
+        root.dpack_id,
+        0,
+        result["version"],
+        path_file=result["path"],
+        date_created=datetime.now(timezone.utc),
+        user=getpass.getuser(),
+        status=root.status,
+        project=root.project,
+        content_hash=result["content_hash"]))
+    root.fc_id = asset.fc_id
+    root.version = str(asset.version_fc)
+    root.file_name = os.path.basename(asset.path_file)
+    root.date_created = str(asset.date_created)
+    root.user = asset.user
+    root.mark_clean()
 
 
 def get_maya_main_window():
@@ -86,6 +503,7 @@ if __name__ == "__main__":
     dialog = QDialog(get_maya_main_window())
     dialog.setWindowTitle("Check-In")
     import_widget = CheckInWidget(dialog)
+    dialog.finished.connect(import_widget.shutdown)
     lyt_v_dialog = QVBoxLayout()
     lyt_v_dialog.addWidget(import_widget)
     dialog.setLayout(lyt_v_dialog)
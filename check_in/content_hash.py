@@ -0,0 +1,99 @@
+"""Stable content hashes of exported files.
+
+Files are hashed in a single streamed pass, so large caches are never held in memory. Maya
+ASCII files are hashed without the lines maya rewrites on every save (comments holding the
+file name and save date, and fileInfo statements), so exporting unchanged content twice
+gives the same hash. When the exported root is given, its own DvRoot metadata is left out as
+well: publishing a check-in rewrites the fc_id, version and content_hash of the root, which
+must not make the next export of the same content look changed. Other file types are hashed
+as is. Maya Binary files embed their save date, so their hash changes on every export and can
+not tell unchanged content, see has_stable_hash.
+"""
+
+
+import hashlib
+import os
+import re
+
+from br2.dv_root_node.ma_reader import EXTENSION_PREFIX, INT_ATTRIBUTES, STRING_ATTRIBUTES
+
+
+HASH_ALGORITHM = "blake2b"
+CHUNK_SIZE = 1 << 20
+# Extensions of the files whose hash only changes with their content.
+STABLE_HASH_EXTENSIONS = (".ma",)
+# Maya ASCII lines that change on every save regardless of content.
+_VOLATILE_MA_PREFIXES = (b"//", b"fileInfo ")
+# Metadata attributes of native and extension roots, left out of the hash of the exported root.
+_ROOT_METADATA_ATTRIBUTES = frozenset(
+    (prefix + name).encode() for name in {**STRING_ATTRIBUTES, **INT_ATTRIBUTES} for prefix in ("", EXTENSION_PREFIX))
+_CREATE_NODE_NAME = re.compile(rb'-n "([^"]+)"')
+_SET_ATTR_PLUG = re.compile(rb'\tsetAttr [^"]*"\.([^"]+)"')
+
+
+def hash_file(path, chunk_size=CHUNK_SIZE, root=None):
+    """The content hash of a file.
+
+    Args:
+        path (str): File path.
+        chunk_size (int): Read size in bytes. Defaults to CHUNK_SIZE.
+        root (str|None): Name of the exported root, whose metadata is left out of the hash of Maya ASCII
+            files. Defaults to hashing every attribute.
+    Returns:
+        str: Hash, as "<algorithm>:<hex digest>".
+    """
+    if not has_stable_hash(path):
+        return checksum_file(path, chunk_size)
+    root = root.encode("utf-8") if root else None
+    in_root = False
+    skipping = False
+    digest = hashlib.new(HASH_ALGORITHM)
+    with open(path, "rb", buffering=chunk_size) as stream:
+        for line in stream:
+            if skipping:
+                # Continuation of a skipped setAttr, up to the end of the statement.
+                skipping = not line.rstrip().endswith(b";")
+                continue
+            if line.startswith(_VOLATILE_MA_PREFIXES):
+                continue
+            if line.startswith(b"createNode "):
+                match = _CREATE_NODE_NAME.search(line)
+                in_root = root is not None and match is not None and match.group(1) == root
+                if in_root:
+                    root = None
+            elif in_root and line.startswith(b"\tsetAttr "):
+                match = _SET_ATTR_PLUG.match(line)
+                if match is not None and match.group(1) in _ROOT_METADATA_ATTRIBUTES:
+                    skipping = not line.rstrip().endswith(b";")
+                    continue
+            elif not line.startswith((b"\t", b"rename ")):
+                in_root = False
+            digest.update(line)
+    return f"{HASH_ALGORITHM}:{digest.hexdigest()}"
+
+
+def has_stable_hash(path):
+    """Whether exporting unchanged content to a file gives the same hash every time, see hash_file.
+
+    Args:
+        path (str): File path.
+    Returns:
+        bool: True for Maya ASCII files.
+    """
+    return os.path.splitext(path)[1].lower() in STABLE_HASH_EXTENSIONS
+
+
+def checksum_file(path, chunk_size=CHUNK_SIZE):
+    """The checksum of the exact bytes of a file, e.g. to verify a copy.
+
+    Args:
+        path (str): File path.
+        chunk_size (int): Read size in bytes. Defaults to CHUNK_SIZE.
+    Returns:
+        str: Checksum, as "<algorithm>:<hex digest>".
+    """
+    digest = hashlib.new(HASH_ALGORITHM)
+    with open(path, "rb", buffering=0) as stream:
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            digest.update(chunk)
+    return f"{HASH_ALGORITHM}:{digest.hexdigest()}"
@@ -0,0 +1,286 @@
+"""Headless export of DvRoot subtrees, run by mayapy on behalf of the Check-In dialog.
+
+The temp scene written by the calling maya session is opened once per worker process, and
+each root is then exported from it to a local staging file. Exports whose content hash matches
+the hash of the last published version are discarded, the others are copied to their
+versioned file by a bounded number of concurrent transfers, see br2.check_in.transfer.
+Staging files are kept until their copy succeeds, so a failed copy resumes on the next
+check-in of unchanged content. Exports run in parallel in a pool of worker processes, and a
+failing export does not affect the others. One JSON line, prefixed with RESULT_PREFIX so it
+can be told from anything else mayapy prints, is written to stdout per root as soon as it is
+done, followed by a summary line.
+
+Usage:
+    mayapy -m br2.check_in.export_worker <scene> <jobs.json> [-w WORKERS] [-t TRANSFERS]
+"""
+
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from br2.check_in.content_hash import has_stable_hash, hash_file
+from br2.check_in.transfer import MAX_TRANSFERS, transfer_file
+
+
+LOGGER = logging.getLogger(__name__)
+EXPORT_FILE_TYPES = {
+    ".ma": "mayaAscii",
+    ".mb": "mayaBinary",
+}
+# Prefix of the result lines written to stdout.
+RESULT_PREFIX = "br2.check_in.result: "
+STAGING_DIR = os.path.join(tempfile.gettempdir(), "br2_check_in")
+STATUS_DONE = "done"
+STATUS_EXPORTED = "exported"
+STATUS_FAILED = "failed"
+STATUS_UNCHANGED = "unchanged"
+
+
+def export_root(job):
+    """Exports the subtree of a root to its staging file. Runs in a worker process.
+
+    If the content hash of the export matches the job's previous_hash the export is discarded.
+    If it matches the staging file left by an earlier, failed copy, that file is kept so its
+    copy can resume. Hashes are only compared for file types hashing the same for unchanged
+    content, Maya Binary exports are always published, see br2.check_in.content_hash.has_stable_hash.
+
+    Args:
+        job (dict): Job with uuid, node, path, staging_path and optional previous_hash keys.
+    Returns:
+        dict: The job with status, error, content_hash, seconds and pid keys added.
+    """
+    import maya.cmds as cmds
+
+    start = time.perf_counter()
+    result = dict(job, status=STATUS_EXPORTED, error=None, content_hash=None, pid=os.getpid())
+    # The part file keeps the extension of the staging file, which selects how it is hashed.
+    part_path = "{0}.new{1}".format(*os.path.splitext(job["staging_path"]))
+    try:
+        file_type = EXPORT_FILE_TYPES.get(os.path.splitext(job["path"])[1].lower())
+        if file_type is None:
+            raise ValueError(f'Unsupported file type: "{job["path"]}"')
+        nodes = cmds.ls(job["uuid"], long=True)
+        if not nodes:
+            raise RuntimeError(f'Root node {job["uuid"]} ("{job["node"]}") not found in the check-in scene.')
+
+        cmds.select(nodes[0], replace=True)
+        cmds.file(part_path, exportSelected=True, type=file_type, preserveReferences=True, force=True)
+        root = nodes[0].rsplit("|", 1)[-1]
+        result["content_hash"] = hash_file(part_path, root=root)
+        stable = has_stable_hash(part_path)
+        if stable and result["content_hash"] == job.get("previous_hash"):
+            result["status"] = STATUS_UNCHANGED
+            os.remove(part_path)
+        elif stable and os.path.exists(job["staging_path"]) and \
+                hash_file(job["staging_path"], root=root) == result["content_hash"]:
+            os.remove(part_path)
+        else:
+            os.replace(part_path, job["staging_path"])
+    except Exception as e:
+        result["status"] = STATUS_FAILED
+        result["error"] = str(e)
+        if os.path.exists(part_path):
+            os.remove(part_path)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def _init_worker(scene):
+    """Initializes maya in a worker process and opens the check-in scene.
+
+    Args:
+        scene (str): Scene file path.
+    """
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+
+    import maya.cmds as cmds
+    from br2.dv_root_node.node_handler import load_root_plugin
+
+    load_root_plugin()
+    cmds.file(scene, open=True, force=True)
+
+
+def get_staging_path(path, staging_dir=STAGING_DIR):
+    """The local staging file of a versioned file. The same versioned file always stages to the same file.
+
+    Args:
+        path (str): Versioned file path.
+        staging_dir (str): Staging directory. Defaults to STAGING_DIR.
+    Returns:
+        str: Staging file path.
+    """
+    key = hashlib.sha1(os.path.normcase(path).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(staging_dir, key + os.path.splitext(path)[1])
+
+
+def transfer_export(result):
+    """Copies an exported root from its staging file to its versioned file. Runs in a transfer thread.
+
+    Args:
+        result (dict): Export result, see export_root.
+    Returns:
+        dict: The result with its status updated, and transfer_seconds and bytes_per_second keys added.
+    """
+    result = dict(result, transfer_seconds=None, bytes_per_second=None)
+    try:
+        transfer = transfer_file(result["staging_path"], result["path"])
+    except Exception as e:
+        result["status"] = STATUS_FAILED
+        result["error"] = f"Copy failed: {e}"
+        return result
+    os.remove(result["staging_path"])
+    result["status"] = STATUS_DONE
+    result["transfer_seconds"] = round(transfer.seconds, 3)
+    result["bytes_per_second"] = round(transfer.bytes_per_second)
+    return result
+
+
+def run(scene, jobs, workers=None, transfers=MAX_TRANSFERS, staging_dir=STAGING_DIR):
+    """Exports roots in parallel and copies them to their versioned files. Copies start as soon as
+    their export is done, while other roots are still exporting.
+
+    Jobs are handed to the worker pool as workers free up. If a worker process dies, maya crashing
+    rather than an export raising, the jobs the pool was running are retried one by one in a
+    worker process of their own, so only the job crashing maya fails. The pool is then replaced
+    by one with a worker less, so no more than the given number of workers ever run.
+
+    Args:
+        scene (str): Scene file holding the roots.
+        jobs (list[dict]): Jobs with uuid, node, path and optional previous_hash keys.
+        workers (int|None): Number of worker processes. Defaults to the number of CPUs.
+        transfers (int): Maximum number of concurrent copies. Defaults to MAX_TRANSFERS.
+        staging_dir (str): Directory of the local staging files. Defaults to STAGING_DIR.
+    Yields:
+        dict: Job results, see export_root and transfer_export, in order of completion.
+    """
+    if not os.path.isdir(staging_dir):
+        os.makedirs(staging_dir)
+    workers = workers or os.cpu_count() or 1
+    queued = deque(dict(job, staging_path=get_staging_path(job["path"], staging_dir)) for job in jobs)
+    pool_size = workers
+    executor = _start_pool(scene, pool_size)
+    retries = deque()
+    retry_executor = None
+    retrying = None
+    pending = {}
+    exports = set()
+    try:
+        with ThreadPoolExecutor(max_workers=transfers) as transfer_executor:
+            while queued or retries or pending:
+                if retries and retrying is None:
+                    if retry_executor is None:
+                        retry_executor = _start_pool(scene, 1)
+                    job = retries.popleft()
+                    retrying = retry_executor.submit(export_root, job)
+                    pending[retrying] = job
+                while queued and len(exports) < pool_size:
+                    job = queued.popleft()
+                    future = executor.submit(export_root, job)
+                    pending[future] = job
+                    exports.add(future)
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    if future not in pending:
+                        # Retried after its pool crashed.
+                        continue
+                    job = pending.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool as e:
+                        if future is retrying:
+                            retry_executor.shutdown(wait=False)
+                            retry_executor = None
+                        else:
+                            crashed = [future] + [f for f in exports if f is not future and _crashed(f)]
+                            exports.difference_update(crashed)
+                            executor.shutdown(wait=False)
+                            if len(crashed) > 1:
+                                # Any of them may have crashed maya.
+                                LOGGER.warning("A worker process died, retrying %d export(s) alone", len(crashed))
+                                retries.extend(job if f is future else pending.pop(f) for f in crashed)
+                                pool_size = max(workers - 1, 1)
+                                executor = _start_pool(scene, pool_size)
+                                continue
+                            executor = _start_pool(scene, pool_size)
+                        result = dict(job, status=STATUS_FAILED, error=f"Worker process died: {e}", content_hash=None,
+                                      seconds=None, pid=None)
+                    finally:
+                        if future is retrying:
+                            retrying = None
+                        exports.discard(future)
+                    if result["status"] == STATUS_EXPORTED:
+                        pending[transfer_executor.submit(transfer_export, result)] = job
+                    else:
+                        yield result
+    finally:
+        executor.shutdown()
+        if retry_executor is not None:
+            retry_executor.shutdown()
+
+
+def _start_pool(scene, workers):
+    """Starts worker processes with the check-in scene open.
+
+    Args:
+        scene (str): Scene file path.
+        workers (int): Number of worker processes.
+    Returns:
+        concurrent.futures.ProcessPoolExecutor: Pool.
+    """
+    return ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(scene,))
+
+
+def _crashed(future):
+    """Whether an export did not complete because its worker pool crashed.
+
+    Args:
+        future (concurrent.futures.Future): Export.
+    Returns:
+        bool: True if the export is not done yet or failed with BrokenProcessPool.
+    """
+    return not future.done() or isinstance(future.exception(), BrokenProcessPool)
+
+
+def main(argv=None):
+    """Command line entry point.
+
+    Args:
+        argv (list[str]|None): Arguments. Defaults to sys.argv.
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description="Export DvRoots to their versioned files.")
+    parser.add_argument("scene", help="Scene file holding the roots.")
+    parser.add_argument("jobs", help="JSON file listing the roots, as uuid, node, path and previous_hash objects.")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes.")
+    parser.add_argument("-t", "--transfers", type=int, default=MAX_TRANSFERS, help="Number of concurrent copies.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    with open(args.jobs) as stream:
+        jobs = json.load(stream)
+
+    start = time.perf_counter()
+    failed = 0
+    for result in run(args.scene, jobs, workers=args.workers, transfers=args.transfers):
+        failed += result["status"] == STATUS_FAILED
+        sys.stdout.write(RESULT_PREFIX + json.dumps(result) + "\n")
+        sys.stdout.flush()
+    summary = {"summary": {"roots": len(jobs), "failed": failed, "seconds": round(time.perf_counter() - start, 3)}}
+    sys.stdout.write(RESULT_PREFIX + json.dumps(summary) + "\n")
+    sys.stdout.flush()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
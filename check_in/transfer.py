@@ -0,0 +1,125 @@
+"""Chunked, atomic and resumable copies of local files to network storage.
+
+Files are copied to "<destination>.part" in fixed-size chunks, verified against the checksum
+of the source and renamed in place, so readers never see a partial file. Alongside the part
+file, "<destination>.part.json" records the checksum of the source being copied. If a copy is
+interrupted, the next copy of the same source continues from the end of the part file.
+"""
+
+
+import json
+import logging
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from br2.check_in.content_hash import checksum_file
+
+
+LOGGER = logging.getLogger(__name__)
+TRANSFER_CHUNK_SIZE = 8 << 20
+MAX_TRANSFERS = 4
+
+TransferResult = namedtuple("TransferResult", [
+    "source", "destination", "size", "resumed_bytes", "seconds", "bytes_per_second", "checksum"])
+
+
+def transfer_file(source, destination, chunk_size=TRANSFER_CHUNK_SIZE):
+    """Copies a file, resuming an interrupted copy of the same source.
+
+    Args:
+        source (str): Local file path.
+        destination (str): Destination file path.
+        chunk_size (int): Copy size in bytes. Defaults to TRANSFER_CHUNK_SIZE.
+    Returns:
+        TransferResult: Result.
+    Raises:
+        RuntimeError: If the copy does not match the source.
+    """
+    start = time.perf_counter()
+    size = os.path.getsize(source)
+    checksum = checksum_file(source, chunk_size)
+    part_path = destination + ".part"
+    state_path = part_path + ".json"
+    state = {"source_checksum": checksum, "size": size}
+
+    offset = 0
+    if os.path.exists(part_path) and _read_state(state_path) == state:
+        offset = os.path.getsize(part_path)
+        if offset > size:
+            offset = 0
+    directory = os.path.dirname(destination)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    with open(state_path, "w") as stream:
+        json.dump(state, stream)
+
+    with open(source, "rb", buffering=0) as src, open(part_path, "r+b" if offset else "wb", buffering=0) as dst:
+        src.seek(offset)
+        dst.seek(offset)
+        dst.truncate()
+        for chunk in iter(lambda: src.read(chunk_size), b""):
+            dst.write(chunk)
+        dst.flush()
+        os.fsync(dst.fileno())
+
+    if checksum_file(part_path, chunk_size) != checksum:
+        _remove(part_path, state_path)
+        raise RuntimeError(f'Copy of "{source}" to "{destination}" does not match the source.')
+    os.replace(part_path, destination)
+    _remove(state_path)
+
+    seconds = time.perf_counter() - start
+    copied = size - offset
+    if offset:
+        LOGGER.info('Resumed copy of "%s" at %d of %d bytes', source, offset, size)
+    return TransferResult(source, destination, size, offset, seconds, copied / seconds if seconds else 0.0, checksum)
+
+
+def transfer_files(pairs, max_transfers=MAX_TRANSFERS, chunk_size=TRANSFER_CHUNK_SIZE):
+    """Copies files concurrently.
+
+    Args:
+        pairs (list[tuple[str, str]]): Local source and destination file paths.
+        max_transfers (int): Maximum number of concurrent copies. Defaults to MAX_TRANSFERS.
+        chunk_size (int): Copy size in bytes. Defaults to TRANSFER_CHUNK_SIZE.
+    Yields:
+        tuple[str, TransferResult|None, str|None]: Destination, result and error message, in order of
+            completion.
+    """
+    with ThreadPoolExecutor(max_workers=max_transfers) as executor:
+        futures = {executor.submit(transfer_file, source, destination, chunk_size): destination
+                   for source, destination in pairs}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                LOGGER.error('Unable to copy to "%s": %s', futures[future], e)
+                yield futures[future], None, str(e)
+
+
+def _read_state(state_path):
+    """Reads the state of an interrupted copy.
+
+    Args:
+        state_path (str): State file path.
+    Returns:
+        dict|None: State, None if there is no readable state.
+    """
+    try:
+        with open(state_path) as stream:
+            return json.load(stream)
+    except (OSError, ValueError):
+        return None
+
+
+def _remove(*paths):
+    """Removes files that may not exist.
+
+    Args:
+        *paths (str): File paths.
+    """
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
@@ -0,0 +1,317 @@
+"""Opt-in tracing of the maya.cmds calls made by the br2 tools.
+
+Tools import cmds from this module instead of maya.cmds. Unless the BR2_CMDS_TRACE environment
+variable is set when maya starts, cmds is maya.cmds itself and trace_action decorators return
+the decorated function unchanged, so tracing costs nothing when it is off.
+
+When tracing is on, every command call records its name, flags, latency, calling function and
+the innermost tool action running, see trace_action. The trace is written as Chrome trace JSON,
+which chrome://tracing and https://ui.perfetto.dev open, when maya exits or write_trace is
+called, and a summary of the commands taking the most time per action is logged.
+BR2_CMDS_TRACE is either a JSON file path or "1", to write to the temp directory.
+
+Usage:
+    from br2.dv_root_node.cmds_trace import cmds, trace_action
+
+    @trace_action("Update: populate")
+    def populate():
+        cmds.ls(type="br2DvRootNode")
+"""
+
+
+import atexit
+import contextlib
+import json
+import logging
+import os
+import reprlib
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+
+import maya.cmds
+
+
+LOGGER = logging.getLogger(__name__)
+TRACE_ENV_VAR = "BR2_CMDS_TRACE"
+MAX_EVENTS = 1000000
+TOP_N = 20
+# Longest recorded flags text, longer argument lists are truncated.
+MAX_FLAGS_LENGTH = 200
+NO_ACTION = "(no action)"
+_REPR = reprlib.Repr()
+_REPR.maxstring = MAX_FLAGS_LENGTH
+_REPR.maxother = MAX_FLAGS_LENGTH
+
+
+class CmdsTracer(object):
+    """Records maya.cmds calls and tool actions, keeping the most recent MAX_EVENTS calls."""
+
+    def __init__(self, max_events=MAX_EVENTS):
+        """Initializer.
+
+        Args:
+            max_events (int): Number of calls kept. Defaults to MAX_EVENTS.
+        """
+        self.calls = deque(maxlen=max_events)
+        self.actions = deque(maxlen=max_events)
+        self.action_stack = []
+        self.origin = time.perf_counter()
+
+    def record_call(self, command, args, kwargs, start, end, frame):
+        """Records a command call. Arguments are formatted when the trace is written.
+
+        Args:
+            command (str): Command name.
+            args (tuple): Positional arguments.
+            kwargs (dict): Flags.
+            start (float): perf_counter at the start of the call.
+            end (float): perf_counter at the end of the call.
+            frame (frame): Frame of the calling function.
+        """
+        action = self.action_stack[-1] if self.action_stack else NO_ACTION
+        self.calls.append((command, args, kwargs, start, end, frame.f_code, frame.f_lineno, action,
+                           threading.get_ident()))
+
+    def reset(self):
+        """Discards the recorded calls and actions."""
+        self.calls.clear()
+        self.actions.clear()
+        self.origin = time.perf_counter()
+
+    def summary(self, top=TOP_N):
+        """The commands that took the most time, per action.
+
+        Args:
+            top (int): Number of rows. Defaults to TOP_N.
+        Returns:
+            list[dict]: Rows with action, command, calls, total_ms, mean_us, max_us and caller keys,
+                slowest first.
+        """
+        rows = {}
+        for command, _, _, start, end, code, _, action, _ in self.calls:
+            row = rows.get((action, command))
+            if row is None:
+                row = rows[(action, command)] = {"action": action, "command": command, "calls": 0, "total": 0.0,
+                                                 "max": 0.0, "callers": {}}
+            seconds = end - start
+            row["calls"] += 1
+            row["total"] += seconds
+            row["max"] = max(row["max"], seconds)
+            row["callers"][code.co_name] = row["callers"].get(code.co_name, 0.0) + seconds
+
+        result = []
+        for row in sorted(rows.values(), key=lambda r: r["total"], reverse=True)[:top]:
+            result.append({
+                "action": row["action"],
+                "command": row["command"],
+                "calls": row["calls"],
+                "total_ms": round(row["total"] * 1e3, 3),
+                "mean_us": round(row["total"] / row["calls"] * 1e6, 1),
+                "max_us": round(row["max"] * 1e6, 1),
+                "caller": max(row["callers"], key=row["callers"].get),
+            })
+        return result
+
+    def trace_events(self):
+        """The recorded calls and actions as Chrome trace events.
+
+        Returns:
+            list[dict]: Complete ("X") events.
+        """
+        pid = os.getpid()
+        events = []
+        for name, start, end, tid in self.actions:
+            events.append({"name": name, "cat": "action", "ph": "X", "pid": pid, "tid": tid,
+                           "ts": self._micros(start), "dur": round((end - start) * 1e6, 3)})
+        for command, args, kwargs, start, end, code, lineno, action, tid in self.calls:
+            events.append({"name": command, "cat": "cmds", "ph": "X", "pid": pid, "tid": tid,
+                           "ts": self._micros(start), "dur": round((end - start) * 1e6, 3),
+                           "args": {"flags": _format_flags(args, kwargs), "action": action,
+                                    "caller": f"{code.co_name} ({os.path.basename(code.co_filename)}:{lineno})"}})
+        return events
+
+    def _micros(self, perf_time):
+        """Converts a perf_counter value to microseconds since the start of the trace.
+
+        Args:
+            perf_time (float): perf_counter value.
+        Returns:
+            float: Microseconds.
+        """
+        return round((perf_time - self.origin) * 1e6, 3)
+
+
+class TracedCmds(object):
+    """Stand-in for maya.cmds that records every command call with a CmdsTracer."""
+
+    def __init__(self, cmds_module, tracer):
+        """Initializer.
+
+        Args:
+            cmds_module (module): maya.cmds.
+            tracer (CmdsTracer): Tracer.
+        """
+        self._cmds = cmds_module
+        self._tracer = tracer
+
+    def __getattr__(self, name):
+        """Wraps a command on first use, later lookups find the wrapper on the instance.
+
+        Args:
+            name (str): Command name.
+        Returns:
+            object: Traced command, or the attribute of maya.cmds if it is not callable.
+        """
+        command = getattr(self._cmds, name)
+        if not callable(command):
+            return command
+        record_call = self._tracer.record_call
+
+        def traced(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return command(*args, **kwargs)
+            finally:
+                record_call(name, args, kwargs, start, time.perf_counter(), sys._getframe(1))
+
+        traced.__name__ = name
+        traced.__doc__ = command.__doc__
+        setattr(self, name, traced)
+        return traced
+
+
+class _TracedAction(contextlib.ContextDecorator):
+    """Context manager and decorator attributing the cmds calls made inside it to a tool action."""
+
+    def __init__(self, tracer, name):
+        """Initializer.
+
+        Args:
+            tracer (CmdsTracer): Tracer.
+            name (str): Action name.
+        """
+        self._tracer = tracer
+        self._name = name
+        self._starts = []
+
+    def __enter__(self):
+        self._tracer.action_stack.append(self._name)
+        self._starts.append(time.perf_counter())
+        return self
+
+    def __exit__(self, *exc_info):
+        self._tracer.action_stack.pop()
+        self._tracer.actions.append((self._name, self._starts.pop(), time.perf_counter(), threading.get_ident()))
+        return False
+
+
+class _NullAction(object):
+    """trace_action when tracing is off: does nothing as a context manager, returns functions as is."""
+
+    def __call__(self, func):
+        return func
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_ACTION = _NullAction()
+_TRACE_PATH = os.environ.get(TRACE_ENV_VAR, "")
+_TRACER = CmdsTracer() if _TRACE_PATH not in ("", "0") else None
+
+cmds = maya.cmds if _TRACER is None else TracedCmds(maya.cmds, _TRACER)
+
+
+def format_summary(rows):
+    """Formats summary rows as a text table.
+
+    Args:
+        rows (list[dict]): Rows, see CmdsTracer.summary.
+    Returns:
+        str: Table.
+    """
+    lines = [f'{"action":<32} {"command":<20} {"calls":>8} {"total ms":>10} {"mean us":>10} {"max us":>10}  caller']
+    for row in rows:
+        lines.append(f'{row["action"][:32]:<32} {row["command"][:20]:<20} {row["calls"]:>8} {row["total_ms"]:>10.1f} '
+                     f'{row["mean_us"]:>10.1f} {row["max_us"]:>10.1f}  {row["caller"]}')
+    return "\n".join(lines)
+
+
+def get_trace_path():
+    """The trace file path given by BR2_CMDS_TRACE.
+
+    Returns:
+        str: JSON file path.
+    """
+    if _TRACE_PATH == "1":
+        return os.path.join(tempfile.gettempdir(), f"br2_cmds_trace_{os.getpid()}.json")
+    return _TRACE_PATH
+
+
+def get_tracer():
+    """The tracer of the calling maya session.
+
+    Returns:
+        CmdsTracer|None: Tracer, None if tracing is off.
+    """
+    return _TRACER
+
+
+def trace_action(name):
+    """Attributes the cmds calls made inside a function or with statement to a tool action.
+
+    Args:
+        name (str): Action name, e.g. "Update: populate".
+    Returns:
+        contextlib.ContextDecorator: Decorator and context manager.
+    """
+    if _TRACER is None:
+        return _NULL_ACTION
+    return _TracedAction(_TRACER, name)
+
+
+def write_trace(path=None, top=TOP_N):
+    """Writes the trace as Chrome trace JSON and logs its summary.
+
+    Args:
+        path (str|None): JSON file path. Defaults to the path given by BR2_CMDS_TRACE.
+        top (int): Number of summary rows. Defaults to TOP_N.
+    Returns:
+        str|None: Written file path, None if tracing is off.
+    """
+    if _TRACER is None:
+        return None
+    path = path or get_trace_path()
+    summary = _TRACER.summary(top)
+    with open(path, "w") as stream:
+        json.dump({"traceEvents": _TRACER.trace_events(), "displayTimeUnit": "ms", "otherData": {"summary": summary}},
+                  stream)
+    LOGGER.info('Wrote the cmds trace of %d calls to "%s"\n%s', len(_TRACER.calls), path, format_summary(summary))
+    return path
+
+
+def _format_flags(args, kwargs):
+    """Formats the arguments of a command call.
+
+    Args:
+        args (tuple): Positional arguments.
+        kwargs (dict): Flags.
+    Returns:
+        str: Arguments, truncated to MAX_FLAGS_LENGTH.
+    """
+    text = ", ".join([_REPR.repr(arg) for arg in args]
+                     + [f"{key}={_REPR.repr(value)}" for key, value in kwargs.items()])
+    if len(text) > MAX_FLAGS_LENGTH:
+        text = text[:MAX_FLAGS_LENGTH - 3] + "..."
+    return text
+
+
+if _TRACER is not None:
+    LOGGER.info('Tracing maya.cmds calls to "%s"', get_trace_path())
+    atexit.register(write_trace)
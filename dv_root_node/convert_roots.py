@@ -0,0 +1,152 @@
+"""Converts roots between DvRootNodes and extension roots.
+
+A converted root is a new node of the other kind that replaces the old one. It keeps the old
+node's name, parent, UUID, transform, drawing overrides, connections and children, and the
+root metadata, so handlers, manifests and reference edits that identify the root keep working.
+Roots read from referenced files can not be converted in the referencing scene: convert the
+file they come from instead. See br2.update_assets.dvroot to convert scene files in batch.
+
+Usage:
+    convert_scene_roots(extension=True)
+"""
+
+
+import logging
+
+from br2.dv_root_node.cmds_trace import cmds, trace_action
+from br2.dv_root_node.ma_reader import INT_ATTRIBUTES, STRING_ATTRIBUTES
+from br2.dv_root_node.node_handler import MayaRootHandler, ls_root_nodes
+
+
+LOGGER = logging.getLogger(__name__)
+# Root metadata copied to the converted root. node_version is set and locked by MayaRootHandler.create.
+ROOT_ATTRIBUTES = tuple(sorted(
+    name for name in list(STRING_ATTRIBUTES) + list(INT_ATTRIBUTES) if name != "node_version"))
+TRANSFORM_ATTRIBUTES = (
+    "translate",
+    "rotate",
+    "scale",
+    "shear",
+    "rotateOrder",
+    "rotateAxis",
+    "rotatePivot",
+    "rotatePivotTranslate",
+    "scalePivot",
+    "scalePivotTranslate",
+    "inheritsTransform",
+    "visibility",
+    "overrideEnabled",
+    "overrideDisplayType",
+    "overrideLevelOfDetail",
+    "overrideVisibility",
+)
+
+
+def convert_root(node, extension=True):
+    """Replaces a root with a root of the other kind.
+
+    Args:
+        node (str): Name of the root node.
+        extension (bool): If True convert a DvRootNode to an extension root, otherwise convert an
+            extension root to a DvRootNode. Defaults to True.
+    Returns:
+        MayaRootHandler: Converted root, the given root if it already is of the requested kind.
+    Raises:
+        RuntimeError: If given a root read from a referenced file.
+    """
+    root = MayaRootHandler(node)
+    if root.is_extension == extension:
+        return root
+    dag_path = root.dag_path
+    if cmds.referenceQuery(dag_path, isNodeReferenced=True):
+        raise RuntimeError(f'"{dag_path}" is referenced, convert the file it is read from.')
+    name = root.dag_name
+    uuid = root.uuid
+    values = {attr: getattr(root, attr) for attr in ROOT_ATTRIBUTES}
+    was_dirty = not cmds.about(batch=True) and root.is_dirty
+
+    converted = MayaRootHandler.create(f"{name}_converted", extension=extension)
+    new_path = converted.dag_path
+    parent = cmds.listRelatives(dag_path, parent=True, fullPath=True)
+    if parent:
+        new_path = cmds.parent(new_path, parent[0], relative=True, absolute=False)[0]
+        new_path = cmds.ls(new_path, long=True)[0]
+    for attr in TRANSFORM_ATTRIBUTES:
+        value = cmds.getAttr(f"{dag_path}.{attr}")
+        if isinstance(value, list):
+            cmds.setAttr(f"{new_path}.{attr}", *value[0])
+        else:
+            cmds.setAttr(f"{new_path}.{attr}", value)
+    _move_connections(dag_path, new_path)
+
+    shapes = cmds.listRelatives(dag_path, shapes=True, fullPath=True) or []
+    children = [child for child in cmds.listRelatives(dag_path, children=True, fullPath=True) or []
+                if child not in shapes]
+    if shapes:
+        cmds.parent(shapes, new_path, relative=True, shape=True)
+    if children:
+        cmds.parent(children, new_path, relative=True)
+
+    cmds.delete(dag_path)
+    new_path = cmds.rename(new_path, name)
+    cmds.rename(new_path, uuid, uuid=True)
+    converted = MayaRootHandler(cmds.ls(uuid, long=True)[0])
+    for attr, value in values.items():
+        setattr(converted, attr, value)
+    if not was_dirty and not cmds.about(batch=True):
+        converted.mark_clean()
+    LOGGER.debug('Converted "%s" to %s', dag_path, "an extension root" if extension else "a DvRootNode")
+    return converted
+
+
+@trace_action("convert roots")
+def convert_scene_roots(extension=True):
+    """Converts the roots of the calling maya scene that are not of the requested kind.
+    Referenced roots are skipped.
+
+    Args:
+        extension (bool): If True convert DvRootNodes to extension roots, otherwise convert
+            extension roots to DvRootNodes. Defaults to True.
+    Returns:
+        list[MayaRootHandler]: Converted roots.
+    """
+    nodes = ls_root_nodes()
+    # ls without objects lists every node of the scene.
+    uuids = (cmds.ls(nodes, uuid=True) or []) if nodes else []
+    converted = []
+    for uuid in uuids:
+        nodes = cmds.ls(uuid, long=True)
+        if not nodes:
+            continue
+        root = MayaRootHandler(nodes[0])
+        if root.is_extension == extension:
+            continue
+        if cmds.referenceQuery(nodes[0], isNodeReferenced=True):
+            LOGGER.warning('Skipped referenced root "%s"', nodes[0])
+            continue
+        converted.append(convert_root(nodes[0], extension))
+    LOGGER.info("Converted %d root(s) to %s", len(converted), "extension roots" if extension else "DvRootNodes")
+    return converted
+
+
+def _move_connections(source, target):
+    """Moves the connections of a node's attributes to the same attributes of another node.
+    Connections of attributes the other node does not have, e.g. the root metadata, are left out.
+
+    Args:
+        source (str): Node the connections are moved from.
+        target (str): Node the connections are moved to.
+    """
+    incoming = cmds.listConnections(source, source=True, destination=False, plugs=True, connections=True,
+                                    skipConversionNodes=True) or []
+    for plug, source_plug in zip(incoming[::2], incoming[1::2]):
+        target_plug = f"{target}.{plug.split('.', 1)[1]}"
+        if cmds.objExists(target_plug):
+            cmds.connectAttr(source_plug, target_plug, force=True)
+
+    outgoing = cmds.listConnections(source, source=False, destination=True, plugs=True, connections=True,
+                                    skipConversionNodes=True) or []
+    for plug, destination_plug in zip(outgoing[::2], outgoing[1::2]):
+        target_plug = f"{target}.{plug.split('.', 1)[1]}"
+        if cmds.objExists(target_plug):
+            cmds.connectAttr(target_plug, destination_plug, force=True)
@@ -0,0 +1,396 @@
+import hashlib
+import logging
+
+import maya.OpenMaya as OpenMaya
+
+from br2.dv_root_node.cmds_trace import cmds
+from br2.dv_root_node.node_handler import EXTENSION_MARKER, ROOT_NODE_TYPE, ls_root_nodes
+
+
+LOGGER = logging.getLogger(__name__)
+# Attribute changes that modify a node.
+ATTRIBUTE_CHANGE_MESSAGES = (
+    OpenMaya.MNodeMessage.kAttributeSet
+    | OpenMaya.MNodeMessage.kAttributeAdded
+    | OpenMaya.MNodeMessage.kAttributeRemoved
+    | OpenMaya.MNodeMessage.kAttributeArrayAdded
+    | OpenMaya.MNodeMessage.kAttributeArrayRemoved
+    | OpenMaya.MNodeMessage.kConnectionMade
+    | OpenMaya.MNodeMessage.kConnectionBroken
+)
+# Scene messages around which changes are not modifications, as (start, end, reset) tuples.
+SUSPEND_MESSAGES = (
+    ("kBeforeOpen", "kAfterOpen", True),
+    ("kBeforeNew", "kAfterNew", True),
+    ("kBeforeCreateReference", "kAfterCreateReference", False),
+    ("kBeforeLoadReference", "kAfterLoadReference", False),
+    ("kBeforeUnloadReference", "kAfterUnloadReference", False),
+)
+_TRACKER = None
+
+
+class RootDirtyTracker(object):
+    """Tracks which DvRoots had anything in their subtree modified.
+    A root is clean when it is loaded, created or tagged, or when tracking starts, and becomes dirty
+    when an attribute of a local, non-referenced DAG node in its subtree, the root included, is set,
+    connected or disconnected, when DAG nodes are added to, removed from or reparented in its
+    subtree, or when the reference edits of the references loaded under it change, i.e. referenced
+    content in its subtree was modified. Changes dirty every root above the changed node, so a
+    change under a nested root also dirties its parent roots.
+
+    Each clean root costs one attribute callback per local DAG node of its subtree, removed once
+    the root is dirty, and a digest of its reference edits, compared when dirty roots are queried.
+    Opening a scene or loading references is not a modification. The roots loaded by a reference
+    are found among the nodes added while it loads, not by scanning the scene.
+    """
+
+    def __init__(self):
+        """Initializer."""
+        self._callback_ids = []
+        self._root_callback_ids = {}
+        self._edit_digests = {}
+        self._tracked = set()
+        self._dirty = set()
+        self._suspended = False
+        self._added = None
+
+    def dirty_uuids(self):
+        """The UUIDs of the dirty roots.
+
+        Returns:
+            list[str]: UUIDs.
+        """
+        self._check_edits(list(self._edit_digests))
+        return sorted(self._dirty & self._tracked)
+
+    def is_dirty(self, uuid):
+        """Whether a root is dirty.
+
+        Args:
+            uuid (str): UUID of the root node.
+        Returns:
+            bool: True if anything in the root's subtree changed since it was loaded or marked clean.
+        """
+        if uuid not in self._dirty:
+            self._check_edits([key for key, (_, owners) in self._edit_digests.items() if uuid in owners])
+        return uuid in self._dirty
+
+    def mark_clean(self, uuid):
+        """Marks a root as clean, e.g. once it was checked in, and tracks it if it is new, e.g. a
+        transform just tagged as an extension root.
+
+        Args:
+            uuid (str): UUID of the root node.
+        """
+        self._dirty.discard(uuid)
+        nodes = cmds.ls(uuid, long=True)
+        if nodes:
+            self._tracked.add(uuid)
+            self._arm(uuid, _get_node(nodes[0]), nodes[0])
+
+    def reset(self):
+        """Marks all roots in the scene as clean."""
+        for uuid in list(self._root_callback_ids):
+            self._disarm(uuid)
+        self._tracked = set()
+        self._dirty = set()
+        self._track_roots([_get_node(node) for node in ls_root_nodes()])
+
+    def start(self):
+        """Registers the maya callbacks and marks all roots in the scene as clean."""
+        if self._callback_ids:
+            return
+        self._callback_ids.append(OpenMaya.MDagMessage.addAllDagChangesCallback(self._on_dag_changed))
+        # Extension roots are transforms; DvRootNodes are registered as well in case the filter
+        # does not match derived node types.
+        for node_type in ("transform", ROOT_NODE_TYPE):
+            self._callback_ids.append(OpenMaya.MDGMessage.addNodeAddedCallback(self._on_node_added, node_type))
+            self._callback_ids.append(OpenMaya.MDGMessage.addNodeRemovedCallback(self._on_node_removed, node_type))
+        for start_message, end_message, reset in SUSPEND_MESSAGES:
+            self._callback_ids.append(OpenMaya.MSceneMessage.addCallback(
+                getattr(OpenMaya.MSceneMessage, start_message), self._on_suspend, reset))
+            self._callback_ids.append(OpenMaya.MSceneMessage.addCallback(
+                getattr(OpenMaya.MSceneMessage, end_message), self._on_resume, reset))
+        self.reset()
+
+    def stop(self):
+        """Removes the maya callbacks."""
+        for callback_id in self._callback_ids:
+            OpenMaya.MMessage.removeCallback(callback_id)
+        self._callback_ids = []
+        for uuid in list(self._root_callback_ids):
+            self._disarm(uuid)
+
+    def _arm(self, uuid, root, dag_path=None):
+        """Watches a clean root: registers the attribute callbacks of its subtree and records the digest of
+        its reference edits.
+
+        Args:
+            uuid (str): UUID of the root node.
+            root (OpenMaya.MObject): Root node.
+            dag_path (str|None): Full DAG path of the root node. Defaults to not recording reference edits, for
+                roots that were just created and hold nothing yet.
+        """
+        self._disarm(uuid)
+        self._root_callback_ids[uuid] = [
+            OpenMaya.MNodeMessage.addAttributeChangedCallback(node, self._on_attribute_changed)
+            for node in _local_dag_nodes(root)]
+        digest = _reference_edits_digest(dag_path) if dag_path else None
+        if digest is not None:
+            self._edit_digests[uuid] = (digest, frozenset(_owning_roots(root)))
+
+    def _disarm(self, uuid):
+        """Stops watching a root.
+
+        Args:
+            uuid (str): UUID of the root node.
+        """
+        self._edit_digests.pop(uuid, None)
+        for callback_id in self._root_callback_ids.pop(uuid, []):
+            try:
+                OpenMaya.MMessage.removeCallback(callback_id)
+            except RuntimeError:
+                # The node was deleted along with its callbacks.
+                pass
+
+    def _check_edits(self, uuids):
+        """Marks the clean roots whose reference edits changed as dirty, along with the roots above them.
+
+        Args:
+            uuids (list[str]): UUIDs of clean roots with recorded reference edits.
+        """
+        for uuid in uuids:
+            if uuid not in self._edit_digests:
+                # Dirtied by a root below it checked earlier.
+                continue
+            nodes = cmds.ls(uuid, long=True)
+            if nodes and _reference_edits_digest(nodes[0]) != self._edit_digests[uuid][0]:
+                LOGGER.debug("Reference edits of root %s changed", uuid)
+                self._mark_dirty(_get_node(nodes[0]))
+
+    def _track_roots(self, roots):
+        """Tracks roots, and watches the clean ones not watched yet.
+
+        Args:
+            roots (list[OpenMaya.MObject]): Root nodes.
+        """
+        for mobject in roots:
+            uuid = _uuid(mobject)
+            self._tracked.add(uuid)
+            if uuid not in self._dirty and uuid not in self._root_callback_ids:
+                self._arm(uuid, mobject, OpenMaya.MFnDagNode(mobject).fullPathName())
+
+    def _mark_dirty(self, mobject):
+        """Marks the roots above a node as dirty.
+
+        Args:
+            mobject (OpenMaya.MObject): Changed DAG node.
+        """
+        if self._suspended:
+            return
+        for uuid in _owning_roots(mobject):
+            if uuid in self._dirty or uuid not in self._tracked:
+                continue
+            self._dirty.add(uuid)
+            LOGGER.debug("Root %s modified", uuid)
+            self._disarm(uuid)
+
+    def _on_attribute_changed(self, msg, plug, other_plug, client_data):
+        """Attribute changed callback of the local DAG nodes of clean roots."""
+        if msg & ATTRIBUTE_CHANGE_MESSAGES:
+            self._mark_dirty(plug.node())
+
+    def _on_dag_changed(self, msg, child, parent, client_data):
+        """DAG change callback: children added, removed or reordered."""
+        if self._suspended:
+            return
+        if not parent.isNull():
+            self._mark_dirty(parent)
+
+    def _on_node_added(self, mobject, client_data):
+        """Node added callback for transforms. New DvRootNodes are clean, new extension roots are tracked
+        once tagged, see br2.dv_root_node.node_handler.tag_extension_root.
+        """
+        if self._suspended:
+            if self._added is not None:
+                # Checked once the file operation ends, see _on_resume.
+                self._added.append(OpenMaya.MObjectHandle(mobject))
+            return
+        if OpenMaya.MFnDependencyNode(mobject).typeName() == ROOT_NODE_TYPE:
+            uuid = _uuid(mobject)
+            self._tracked.add(uuid)
+            if uuid not in self._root_callback_ids:
+                self._arm(uuid, mobject)
+
+    def _on_node_removed(self, mobject, client_data):
+        """Node removed callback for transforms."""
+        uuid = _uuid(mobject)
+        if uuid not in self._tracked:
+            return
+        self._disarm(uuid)
+        self._tracked.discard(uuid)
+        self._dirty.discard(uuid)
+
+    def _on_resume(self, client_data):
+        """Scene callback ending a file operation."""
+        self._suspended = False
+        added, self._added = self._added, None
+        if client_data:
+            self.reset()
+            return
+        # Watch the roots loaded during the operation.
+        self._track_roots([handle.object() for handle in added or []
+                           if handle.isValid() and _is_root(handle.object())])
+
+    def _on_suspend(self, client_data):
+        """Scene callback starting a file operation. Operations resetting the scene do not collect
+        the nodes they add, every root is tracked anew once they end.
+        """
+        self._suspended = True
+        if client_data:
+            self._added = None
+        elif self._added is None:
+            self._added = []
+
+
+def get_dirty_tracker():
+    """The dirty tracker of the calling maya session, see start_dirty_tracker.
+
+    Returns:
+        RootDirtyTracker|None: Tracker, None if tracking has not started, e.g. in batch sessions.
+    """
+    return _TRACKER
+
+
+def start_dirty_tracker():
+    """Starts tracking the modified roots of the calling maya session. Called when the root plug-in is
+    initialized in an interactive session, so roots are tracked from the first scene opened.
+
+    Returns:
+        RootDirtyTracker: Tracker.
+    """
+    global _TRACKER
+    if _TRACKER is None:
+        _TRACKER = RootDirtyTracker()
+        _TRACKER.start()
+    return _TRACKER
+
+
+def stop_dirty_tracker():
+    """Stops tracking the modified roots of the calling maya session."""
+    global _TRACKER
+    if _TRACKER is not None:
+        _TRACKER.stop()
+        _TRACKER = None
+
+
+def _get_node(dag_path):
+    """The node at a DAG path.
+
+    Args:
+        dag_path (str): DAG path.
+    Returns:
+        OpenMaya.MObject: Node.
+    """
+    selection = OpenMaya.MSelectionList()
+    selection.add(dag_path)
+    mobject = OpenMaya.MObject()
+    selection.getDependNode(0, mobject)
+    return mobject
+
+
+def _is_root(mobject):
+    """Whether a node is a root, a DvRootNode or an extension root.
+
+    Args:
+        mobject (OpenMaya.MObject): Node.
+    Returns:
+        bool: True for roots.
+    """
+    node = OpenMaya.MFnDependencyNode(mobject)
+    return node.typeName() == ROOT_NODE_TYPE or node.hasAttribute(EXTENSION_MARKER)
+
+
+def _local_dag_nodes(root):
+    """The DAG nodes of a root's subtree not read from referenced files, the root included.
+    Instanced nodes are listed once.
+
+    Args:
+        root (OpenMaya.MObject): Root node.
+    Returns:
+        list[OpenMaya.MObject]: Nodes.
+    """
+    nodes = []
+    instanced = set()
+    iterator = OpenMaya.MItDag()
+    iterator.reset(root, OpenMaya.MItDag.kDepthFirst, OpenMaya.MFn.kInvalid)
+    while not iterator.isDone():
+        mobject = iterator.currentItem()
+        node = OpenMaya.MFnDagNode(mobject)
+        if not node.isFromReferencedFile():
+            if not node.isInstanced():
+                nodes.append(mobject)
+            elif _uuid(mobject) not in instanced:
+                instanced.add(_uuid(mobject))
+                nodes.append(mobject)
+        iterator.next()
+    return nodes
+
+
+def _owning_roots(mobject):
+    """The UUIDs of the roots above a DAG node, itself included, closest first.
+
+    Args:
+        mobject (OpenMaya.MObject): DAG node.
+    Returns:
+        list[str]: UUIDs.
+    """
+    if not mobject.hasFn(OpenMaya.MFn.kDagNode):
+        return []
+    path = OpenMaya.MDagPath()
+    try:
+        OpenMaya.MDagPath.getAPathTo(mobject, path)
+    except RuntimeError:
+        return []
+    uuids = []
+    while path.length() > 0:
+        node = path.node()
+        if _is_root(node):
+            uuids.append(_uuid(node))
+        path.pop()
+    return uuids
+
+
+def _reference_edits_digest(dag_path):
+    """A digest of the reference edits of the references loaded under a root, their top nodes being children
+    of the root, as loaded by br2.update_assets.test_version_swap.reference_and_reparent.
+
+    Args:
+        dag_path (str): Full DAG path of the root node.
+    Returns:
+        str|None: Digest, None if no reference is loaded under the root.
+    """
+    children = cmds.listRelatives(dag_path, children=True, fullPath=True) or []
+    if not children:
+        return None
+    references = sorted({cmds.referenceQuery(child, referenceNode=True)
+                         for child in cmds.ls(children, referencedNodes=True) or []})
+    if not references:
+        return None
+    digest = hashlib.sha1()
+    for reference in references:
+        digest.update(reference.encode("utf-8"))
+        for edit in cmds.referenceQuery(reference, editStrings=True) or []:
+            digest.update(edit.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def _uuid(mobject):
+    """The maya UUID of a node.
+
+    Args:
+        mobject (OpenMaya.MObject): Node.
+    Returns:
+        str: UUID.
+    """
+    return OpenMaya.MFnDependencyNode(mobject).uuid().asString()
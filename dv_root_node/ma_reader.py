@@ -0,0 +1,362 @@
+"""Maya-free reader for the DvRootNode metadata of Maya ASCII scene files.
+
+The scene is memory-mapped and scanned for "createNode" statements. Only the blocks of
+br2DvRootNode nodes, and of transforms tagged as extension roots, are parsed, the rest of the
+scene is skipped, so even multi-GB layout scenes are read with bounded memory. The reader
+needs neither maya nor a maya license and returns the same fields as MayaRootHandler.
+"""
+
+
+import logging
+import mmap
+import os
+import re
+
+
+LOGGER = logging.getLogger(__name__)
+ROOT_NODE_TYPE = "br2DvRootNode"
+# Extension roots, see br2.dv_root_node.node_handler.EXTENSION_MARKER.
+EXTENSION_PREFIX = "dvr_"
+EXTENSION_MARKER = "dvr_is_root"
+SCENE_EXTENSIONS = (".ma", ".mb")
+
+# Root attributes and their defaults, as defined by the br2DvRootNode plug-in.
+STRING_ATTRIBUTES = {
+    "asset_name": "",
+    "asset_type": "",
+    "content_hash": "",
+    "date_created": "",
+    "file_name": "",
+    "file_type": "",
+    "node_version": "1.0",
+    "project": "",
+    "representation": "full",
+    "status": "",
+    "task": "",
+    "user": "",
+    "version": "",
+}
+INT_ATTRIBUTES = {
+    "dpack_id": 0,
+    "fc_id": 0,
+    "project_id": 0,
+    "task_id": 0,
+    "user_id": 0,
+}
+
+_CREATE_NODE = b"\ncreateNode "
+_TRANSFORM_PREFIX = b"transform "
+_EXTENSION_MARKER_TOKEN = f'"{EXTENSION_MARKER}"'.encode()
+_TOKEN = re.compile(r'"((?:[^"\\]|\\.)*)"|[()]|[^\s()"]+')
+_ESCAPE = re.compile(r"\\(.)")
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+# Unquoted tokens joining the parts of long strings: ("part1" + "part2").
+_STRING_JOIN_TOKENS = {"(", ")", "+"}
+# setAttr flags that are followed by a value.
+_SET_ATTR_VALUE_FLAGS = {"-l", "-lock", "-k", "-keyable", "-cb", "-channelBox", "-s", "-size", "-type", "-typ"}
+
+
+class SceneRoot(object):
+    """DvRootNode metadata read from a scene file.
+    Provides the same attributes as MayaRootHandler, plus the DAG path of the closest
+    parent root.
+    """
+    __slots__ = ("dag_path", "is_extension", "parent_root", "uuid") + tuple(
+        sorted(list(STRING_ATTRIBUTES) + list(INT_ATTRIBUTES)))
+
+    def __init__(self, dag_path, uuid=None):
+        """Initializer.
+
+        Args:
+            dag_path (str): Full DAG path of the root node.
+            uuid (str|None): Maya UUID of the root node. Defaults to None.
+        """
+        self.dag_path = dag_path
+        self.is_extension = False
+        self.parent_root = None
+        self.uuid = uuid
+        for name, default in STRING_ATTRIBUTES.items():
+            setattr(self, name, default)
+        for name, default in INT_ATTRIBUTES.items():
+            setattr(self, name, default)
+
+    @property
+    def dag_name(self):
+        """The short node name of the root node.
+
+        Returns:
+            str: Node name.
+        """
+        return self.dag_path.split("|")[-1]
+
+    def as_dict(self):
+        """The root's metadata as a dict.
+
+        Returns:
+            dict: Attribute names mapped to their values.
+        """
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __str__(self):
+        """Provides the string representation of the instance.
+
+        Returns:
+            str: String representation.
+        """
+        return f'{self.__class__.__name__}("{self.dag_path}")'
+
+
+def iter_child_roots(roots, parent, recursive=False):
+    """An iterator over the child roots of a root, with MayaRootHandler.iter_child_roots semantics.
+
+    Args:
+        roots (list[SceneRoot]): All roots of a scene, as returned by read_roots.
+        parent (SceneRoot): Parent root.
+        recursive (bool, optional): If True yield children of children, otherwise
+            yield only direct children. Defaults to False.
+    Yields:
+        SceneRoot: Child Root.
+    """
+    prefix = parent.dag_path + "|"
+    for root in roots:
+        if (recursive and root.dag_path.startswith(prefix)) or root.parent_root == parent.dag_path:
+            yield root
+
+
+def iter_scene_files(paths, extensions=SCENE_EXTENSIONS):
+    """An iterator over the scene files found in the given files and directories.
+
+    Args:
+        paths (list[str]): Scene files and/or directories to search recursively.
+        extensions (tuple[str]): Scene file extensions. Defaults to SCENE_EXTENSIONS.
+    Yields:
+        str: Scene file path.
+    """
+    for path in paths:
+        if os.path.isdir(path):
+            for dir_path, dir_names, file_names in os.walk(path):
+                dir_names.sort()
+                for file_name in sorted(file_names):
+                    if file_name.lower().endswith(extensions):
+                        yield os.path.join(dir_path, file_name)
+        elif os.path.isfile(path):
+            yield path
+        else:
+            LOGGER.warning('Scene file not found: "%s"', path)
+
+
+def read_roots(path):
+    """Reads the DvRootNodes of a Maya ASCII scene file.
+
+    Args:
+        path (str): Maya ASCII file path.
+    Returns:
+        list[SceneRoot]: Roots, in the order they are created in the scene.
+    Raises:
+        ValueError: If given a file that is not a Maya ASCII file.
+    """
+    if not path.lower().endswith(".ma"):
+        raise ValueError(f'"{path}" is not a Maya ASCII file.')
+
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            roots, parents = _scan(data)
+
+    _resolve_paths(roots, parents)
+    return roots
+
+
+def _scan(data):
+    """Scans the createNode statements of a scene, parsing the blocks of root nodes.
+
+    Args:
+        data (mmap.mmap): Scene file contents.
+    Returns:
+        tuple[list[SceneRoot], dict]: Roots with relative DAG paths, and the parent of every
+            node created with a parent.
+    """
+    roots = []
+    parents = {}
+    root_prefix = ROOT_NODE_TYPE.encode() + b" "
+    pos = data.find(_CREATE_NODE)
+    while pos != -1:
+        start = pos + len(_CREATE_NODE)
+        end = data.find(b"\n", start)
+        if end == -1:
+            end = len(data)
+        line = data[start:end]
+        next_pos = data.find(_CREATE_NODE, end)
+        is_root = line.startswith(root_prefix)
+        is_extension = False
+        if not is_root and line.startswith(_TRANSFORM_PREFIX):
+            # Extension roots add their marker attribute in their block.
+            is_extension = data.find(_EXTENSION_MARKER_TOKEN, end, len(data) if next_pos == -1 else next_pos) != -1
+        if not is_root and not is_extension and b" -p" not in line:
+            # World level nodes that are not roots are not needed to build root paths.
+            pos = next_pos
+            continue
+        name, parent = _parse_create_flags(line)
+        if name and parent:
+            parents[name] = parent
+        if (is_root or is_extension) and name:
+            root = SceneRoot(name)
+            root.is_extension = is_extension
+            root.parent_root = parent
+            _parse_root_block(data, end + 1, root)
+            roots.append(root)
+        pos = next_pos
+    return roots, parents
+
+
+def _parse_create_flags(line):
+    """Reads the name and parent flags of a createNode statement.
+
+    Args:
+        line (bytes): Statement, without the "createNode" keyword.
+    Returns:
+        tuple[str|None, str|None]: Node name and parent name.
+    """
+    name = parent = None
+    tokens = _tokenize(line.decode("utf-8", "replace").rstrip().rstrip(";"))
+    for i, (quoted, token) in enumerate(tokens[:-1]):
+        if token in ("-n", "-name"):
+            name = tokens[i + 1][0] if tokens[i + 1][0] is not None else tokens[i + 1][1]
+        elif token in ("-p", "-parent"):
+            parent = tokens[i + 1][0] if tokens[i + 1][0] is not None else tokens[i + 1][1]
+    return name, parent
+
+
+def _parse_root_block(data, pos, root):
+    """Parses the indented statements following a root's createNode statement.
+
+    Args:
+        data (mmap.mmap): Scene file contents.
+        pos (int): Offset of the first line of the block.
+        root (SceneRoot): Root to fill in.
+    """
+    statement = ""
+    while pos < len(data) and data[pos:pos + 1] == b"\t":
+        end = data.find(b"\n", pos)
+        if end == -1:
+            end = len(data)
+        statement += data[pos:end].decode("utf-8", "replace").strip()
+        pos = end + 1
+        if not statement.endswith(";"):
+            # Statement continues on the next line.
+            statement += " "
+            continue
+        _parse_statement(statement[:-1], root)
+        statement = ""
+
+
+def _parse_statement(statement, root):
+    """Applies a setAttr or rename -uid statement to a root.
+
+    Args:
+        statement (str): Statement, without the trailing semicolon.
+        root (SceneRoot): Root to fill in.
+    """
+    tokens = _tokenize(statement)
+    if not tokens:
+        return
+    command = tokens[0][1]
+    if command == "rename" and len(tokens) == 3 and tokens[1][1] == "-uid":
+        root.uuid = tokens[2][0]
+        return
+    if command != "setAttr":
+        return
+
+    attr = None
+    values = []
+    i = 1
+    while i < len(tokens):
+        quoted, token = tokens[i]
+        if token in _SET_ATTR_VALUE_FLAGS:
+            i += 2
+            continue
+        if attr is None and quoted is not None and quoted.startswith("."):
+            attr = quoted[1:]
+        elif attr is not None and token not in _STRING_JOIN_TOKENS:
+            values.append(quoted if quoted is not None else token)
+        i += 1
+
+    if not values:
+        return
+    if attr is not None and attr.startswith(EXTENSION_PREFIX):
+        attr = attr[len(EXTENSION_PREFIX):]
+    if attr in STRING_ATTRIBUTES:
+        # Long strings are split into several quoted parts, as ("part1" + "part2").
+        setattr(root, attr, _unescape("".join(values)))
+    elif attr in INT_ATTRIBUTES:
+        try:
+            setattr(root, attr, int(values[0]))
+        except ValueError:
+            LOGGER.warning('Invalid value for "%s.%s": %s', root.dag_path, attr, values[0])
+
+
+def _resolve_paths(roots, parents):
+    """Turns the relative DAG paths of roots into full paths, and resolves their parent roots.
+
+    Args:
+        roots (list[SceneRoot]): Roots read from a scene.
+        parents (dict): Node names mapped to the names of their parents.
+    """
+    for root in roots:
+        root.dag_path = _full_path(root.dag_path, root.parent_root, parents)
+        root.parent_root = None
+
+    root_paths = set(root.dag_path for root in roots)
+    for root in roots:
+        path = root.dag_path.rsplit("|", 1)[0]
+        while path:
+            if path in root_paths:
+                root.parent_root = path
+                break
+            path = path.rsplit("|", 1)[0]
+
+
+def _full_path(name, parent, parents):
+    """Builds the full DAG path of a node.
+
+    Args:
+        name (str): Node name.
+        parent (str|None): Parent name, as given with createNode's -p flag.
+        parents (dict): Node names mapped to the names of their parents.
+    Returns:
+        str: Full DAG path.
+    """
+    path = name
+    seen = set()
+    while parent and parent not in seen:
+        seen.add(parent)
+        if parent.startswith("|"):
+            return parent + "|" + path
+        path = parent + "|" + path
+        parent = parents.get(parent.split("|")[0])
+    return "|" + path
+
+
+def _tokenize(text):
+    """Splits MEL statement text into tokens.
+
+    Args:
+        text (str): Statement text.
+    Returns:
+        list[tuple[str|None, str]]: Tokens as (unquoted string or None, raw token) pairs.
+    """
+    return [(m.group(1), m.group(0)) for m in _TOKEN.finditer(text)]
+
+
+def _unescape(value):
+    """Resolves the backslash escapes of a MEL string.
+
+    Args:
+        value (str): Escaped string.
+    Returns:
+        str: Unescaped string.
+    """
+    if "\\" not in value:
+        return value
+    return _ESCAPE.sub(lambda m: _ESCAPES.get(m.group(1), m.group(1)), value)
@@ -0,0 +1,178 @@
+"""Runs scene operations submitted by worker threads on the main thread.
+
+maya.cmds and MayaRootHandler are only safe on the main thread. Worker threads submit scene
+operations to a MainThreadDispatcher and get a concurrent.futures.Future back. Operations run
+in submission order, in batches scheduled on the main thread, and each batch stops once it has
+used up its time budget, so the UI gets control back at least once per frame. Operations
+submitted with a key replace the pending operation with the same key, so e.g. refreshing the
+same root many times while the main thread is busy runs only the latest refresh.
+
+The dispatcher schedules its batches with maya.utils.executeDeferred by default. Any
+thread-safe "run this later on the main thread" callable can be used instead, e.g. the
+call_soon_threadsafe of an asyncio loop when testing without maya.
+
+Usage:
+    future = get_dispatcher().submit_coalesced(("refresh", uuid), refresh_root, uuid)
+    result = future.result(timeout=5)
+"""
+
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from itertools import count
+
+
+LOGGER = logging.getLogger(__name__)
+# Main thread time a batch may use, in seconds: about one frame at 60fps.
+FRAME_BUDGET = 0.016
+_DISPATCHER = None
+
+
+class MainThreadDispatcher(object):
+    """Queues operations from any thread and runs them on the main thread in time-sliced batches."""
+
+    def __init__(self, schedule=None, budget=FRAME_BUDGET, clock=time.perf_counter, main_thread=None):
+        """Initializer.
+
+        Args:
+            schedule (callable|None): Thread-safe callable that calls its argument later on the main
+                thread. Defaults to maya.utils.executeDeferred.
+            budget (float): Main thread time a batch may use, in seconds. Defaults to FRAME_BUDGET.
+            clock (callable): Time source, in seconds. Defaults to time.perf_counter.
+            main_thread (threading.Thread|None): Thread the batches run on. Defaults to the main thread.
+        """
+        if schedule is None:
+            import maya.utils
+            schedule = maya.utils.executeDeferred
+        self.budget = budget
+        self._schedule = schedule
+        self._clock = clock
+        self._main_thread = main_thread or threading.main_thread()
+        self._lock = threading.Lock()
+        self._pending = OrderedDict()
+        self._keys = count()
+        self._scheduled = False
+
+    @property
+    def pending_count(self):
+        """The number of operations waiting to run.
+
+        Returns:
+            int: Number of operations.
+        """
+        with self._lock:
+            return len(self._pending)
+
+    def cancel_all(self):
+        """Cancels the operations that have not started yet."""
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future, _, _, _ in pending:
+            future.cancel()
+
+    def run(self, func, *args, **kwargs):
+        """Runs an operation on the main thread and waits for its result. Runs it right away when
+        called from the main thread.
+
+        Args:
+            func (callable): Operation.
+            *args: Positional arguments of the operation.
+            **kwargs: Keyword arguments of the operation.
+        Returns:
+            object: Result of the operation.
+        Raises:
+            Exception: The exception raised by the operation.
+        """
+        if threading.current_thread() is self._main_thread:
+            return func(*args, **kwargs)
+        return self.submit(func, *args, **kwargs).result()
+
+    def submit(self, func, *args, **kwargs):
+        """Queues an operation.
+
+        Args:
+            func (callable): Operation.
+            *args: Positional arguments of the operation.
+            **kwargs: Keyword arguments of the operation.
+        Returns:
+            concurrent.futures.Future: Result of the operation.
+        """
+        with self._lock:
+            return self._queue(next(self._keys), func, args, kwargs)
+
+    def submit_coalesced(self, key, func, *args, **kwargs):
+        """Queues an operation, replacing the pending operation with the same key, if any. A replaced
+        operation never runs, and its future gets the result of the operation replacing it.
+
+        Args:
+            key (hashable): Operation key, e.g. ("refresh", uuid).
+            func (callable): Operation.
+            *args: Positional arguments of the operation.
+            **kwargs: Keyword arguments of the operation.
+        Returns:
+            concurrent.futures.Future: Result of the operation.
+        """
+        with self._lock:
+            pending = self._pending.get(("coalesced", key))
+            if pending is not None and not pending[0].cancelled():
+                self._pending[("coalesced", key)] = (pending[0], func, args, kwargs)
+                return pending[0]
+            return self._queue(("coalesced", key), func, args, kwargs)
+
+    def _queue(self, key, func, args, kwargs):
+        """Adds an operation to the queue and schedules a batch. Called with the lock held.
+
+        Args:
+            key (hashable): Queue key.
+            func (callable): Operation.
+            args (tuple): Positional arguments.
+            kwargs (dict): Keyword arguments.
+        Returns:
+            concurrent.futures.Future: Result of the operation.
+        """
+        future = Future()
+        self._pending[key] = (future, func, args, kwargs)
+        if not self._scheduled:
+            self._scheduled = True
+            self._schedule(self._run_batch)
+        return future
+
+    def _run_batch(self):
+        """Runs pending operations until the time budget is used up, and schedules the next batch if
+        operations are left. Runs on the main thread.
+        """
+        deadline = self._clock() + self.budget
+        while True:
+            with self._lock:
+                if not self._pending:
+                    self._scheduled = False
+                    return
+                if self._clock() >= deadline:
+                    break
+                _, (future, func, args, kwargs) = self._pending.popitem(last=False)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                LOGGER.debug("Main thread operation %r failed: %s", func, e)
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+        self._schedule(self._run_batch)
+
+
+def get_dispatcher():
+    """The dispatcher of the calling maya session.
+
+    Returns:
+        MainThreadDispatcher: Dispatcher.
+    """
+    global _DISPATCHER
+    if _DISPATCHER is None:
+        _DISPATCHER = MainThreadDispatcher()
+    return _DISPATCHER
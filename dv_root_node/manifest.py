@@ -0,0 +1,179 @@
+"""Maya-free sidecar manifests of the DvRoots of scene files.
+
+Every time a scene is saved in an interactive maya session, a manifest listing its roots is
+written next to it, see br2.dv_root_node.manifest_callback. Farm-side tools read the manifest
+instead of opening the scene. A manifest records the size, modification time and checksum of
+the scene it was written for, so a scene saved or replaced without the callback, e.g. outside
+of maya, is detected as stale. The callback writes the manifest without the checksum, which is
+added afterwards in a background thread, see add_scene_hash, so saving never reads the whole
+scene back. Roots are stored as rows under a single list of field names, to keep manifests of
+scenes with thousands of roots small and quick to parse.
+
+Usage:
+    python -m br2.dv_root_node.manifest <scene> [--verify]
+"""
+
+
+import argparse
+import json
+import logging
+import os
+import sys
+from collections import namedtuple
+
+from br2.check_in.content_hash import checksum_file
+
+
+LOGGER = logging.getLogger(__name__)
+MANIFEST_SUFFIX = ".dvroots.json"
+MANIFEST_VERSION = 1
+
+ManifestRoot = namedtuple("ManifestRoot", [
+    "uuid", "parent_root", "dag_path", "asset_name", "dpack_id", "fc_id", "version", "file_path"])
+Manifest = namedtuple("Manifest", ["scene", "scene_size", "scene_mtime", "scene_hash", "roots"])
+
+
+def add_scene_hash(scene):
+    """Records the checksum of a scene in its manifest, written without it, see write_manifest.
+
+    Args:
+        scene (str): Scene file path.
+    Returns:
+        Manifest|None: Updated manifest, None if the scene has no manifest, its manifest already holds
+            a checksum, or the scene changed since the manifest was written.
+    """
+    manifest = read_manifest(scene)
+    if manifest is None or manifest.scene_hash is not None or is_stale(manifest, scene):
+        return None
+    manifest = manifest._replace(scene_hash=checksum_file(scene))
+    if is_stale(manifest, scene):
+        # Saved again while its checksum was computed.
+        return None
+    _write(manifest, get_manifest_path(scene))
+    return manifest
+
+
+def get_manifest_path(scene):
+    """The manifest file of a scene file.
+
+    Args:
+        scene (str): Scene file path.
+    Returns:
+        str: Manifest file path.
+    """
+    return scene + MANIFEST_SUFFIX
+
+
+def is_stale(manifest, scene, verify_hash=False):
+    """Whether a manifest no longer describes its scene file.
+
+    A scene with the size and modification time it was saved with is considered unchanged. If
+    only its modification time differs, e.g. because it was copied, its checksum is compared
+    when verify_hash is True, otherwise the manifest is stale, as is a manifest without checksum.
+
+    Args:
+        manifest (Manifest): Manifest of the scene.
+        scene (str): Scene file path.
+        verify_hash (bool): Compare checksums of scenes with a new modification time.
+            Defaults to False.
+    Returns:
+        bool: True if the scene changed since the manifest was written, or no longer exists.
+    """
+    try:
+        stat = os.stat(scene)
+    except OSError:
+        return True
+    if stat.st_size != manifest.scene_size:
+        return True
+    if stat.st_mtime == manifest.scene_mtime:
+        return False
+    return not verify_hash or manifest.scene_hash is None or checksum_file(scene) != manifest.scene_hash
+
+
+def read_manifest(scene):
+    """Reads the manifest of a scene file.
+
+    Args:
+        scene (str): Scene file path.
+    Returns:
+        Manifest|None: Manifest, None if the scene has no readable manifest.
+    """
+    try:
+        with open(get_manifest_path(scene), "rb") as stream:
+            data = json.loads(stream.read())
+    except (OSError, ValueError):
+        return None
+    if data.get("manifest_version") != MANIFEST_VERSION or data.get("fields") != list(ManifestRoot._fields):
+        LOGGER.warning('Unsupported manifest for "%s"', scene)
+        return None
+    return Manifest(data["scene"], data["scene_size"], data["scene_mtime"], data["scene_hash"],
+                    [ManifestRoot(*row) for row in data["roots"]])
+
+
+def write_manifest(scene, roots, checksum=True):
+    """Writes the manifest of a scene file, replacing any previous one at once.
+
+    Args:
+        scene (str): Saved scene file path.
+        roots (list[ManifestRoot]): Roots of the scene.
+        checksum (bool): Record the checksum of the scene. If False it can be added later, see
+            add_scene_hash. Defaults to True.
+    Returns:
+        Manifest: Written manifest.
+    """
+    stat = os.stat(scene)
+    scene_hash = checksum_file(scene) if checksum else None
+    manifest = Manifest(os.path.basename(scene), stat.st_size, stat.st_mtime, scene_hash, list(roots))
+    _write(manifest, get_manifest_path(scene))
+    return manifest
+
+
+def _write(manifest, path):
+    """Writes a manifest file, replacing any previous one at once.
+
+    Args:
+        manifest (Manifest): Manifest.
+        path (str): Manifest file path.
+    """
+    data = {
+        "manifest_version": MANIFEST_VERSION,
+        "scene": manifest.scene,
+        "scene_size": manifest.scene_size,
+        "scene_mtime": manifest.scene_mtime,
+        "scene_hash": manifest.scene_hash,
+        "fields": list(ManifestRoot._fields),
+        "roots": [list(root) for root in manifest.roots],
+    }
+    with open(path + ".tmp", "w") as stream:
+        json.dump(data, stream, separators=(",", ":"))
+    os.replace(path + ".tmp", path)
+
+
+def main(argv=None):
+    """Command line entry point.
+
+    Args:
+        argv (list[str]|None): Arguments. Defaults to sys.argv.
+    Returns:
+        int: Exit code, 2 if the scene has no manifest or it is stale.
+    """
+    parser = argparse.ArgumentParser(description="List the DvRoots of a scene from its manifest.")
+    parser.add_argument("scene", help="Scene file.")
+    parser.add_argument("--verify", action="store_true", help="Compare checksums of scenes with a new mtime.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    manifest = read_manifest(args.scene)
+    if manifest is None:
+        LOGGER.error('No manifest for "%s"', args.scene)
+        return 2
+    if is_stale(manifest, args.scene, verify_hash=args.verify):
+        LOGGER.error('The manifest of "%s" is stale', args.scene)
+        return 2
+    json.dump([root._asdict() for root in manifest.roots], sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+import logging
+import os
+import threading
+
+import maya.OpenMaya as OpenMaya
+
+from br2.dv_root_node.cmds_trace import cmds
+from br2.dv_root_node.manifest import ManifestRoot, add_scene_hash, write_manifest
+from br2.dv_root_node.node_handler import MayaRootHandler, ls_root_nodes
+
+
+LOGGER = logging.getLogger(__name__)
+_CALLBACK_ID = None
+
+
+def collect_roots(scene):
+    """The manifest rows of the roots of a saved scene, queried in maya, so roots loaded through
+    file references are listed too.
+
+    Args:
+        scene (str): Saved scene file path.
+    Returns:
+        list[ManifestRoot]: Roots, parents before their children.
+    """
+    roots = []
+    for node in ls_root_nodes():
+        root = MayaRootHandler(node)
+        roots.append((node, root.uuid, root.asset_name, root.dpack_id, root.fc_id, root.version))
+
+    from br2.update_assets.test_db import get_file_paths
+
+    uuids = {dag_path: uuid for dag_path, uuid, *_ in roots}
+    paths = get_file_paths({fc_id for *_, fc_id, _ in roots if fc_id})
+    manifest_roots = []
+    for dag_path, uuid, asset_name, dpack_id, fc_id, version in sorted(roots):
+        parent = dag_path.rsplit("|", 1)[0]
+        while parent and parent not in uuids:
+            parent = parent.rsplit("|", 1)[0]
+        manifest_roots.append(ManifestRoot(uuid, uuids.get(parent), dag_path, asset_name, dpack_id, fc_id, version,
+                                           paths.get(fc_id) or ""))
+    return manifest_roots
+
+
+def register_manifest_callback():
+    """Writes the manifest of every scene saved in the calling maya session, see br2.dv_root_node.manifest.
+    Registered by the root plug-in in interactive sessions.
+    """
+    global _CALLBACK_ID
+    if _CALLBACK_ID is None:
+        _CALLBACK_ID = OpenMaya.MSceneMessage.addCallback(OpenMaya.MSceneMessage.kAfterSave, _on_after_save)
+
+
+def unregister_manifest_callback():
+    """Stops writing manifests on scene save."""
+    global _CALLBACK_ID
+    if _CALLBACK_ID is not None:
+        OpenMaya.MMessage.removeCallback(_CALLBACK_ID)
+        _CALLBACK_ID = None
+
+
+def _add_scene_hash(scene):
+    """Adds the checksum of a saved scene to its manifest. Runs in a background thread.
+
+    Args:
+        scene (str): Saved scene file path.
+    """
+    try:
+        add_scene_hash(scene)
+    except Exception as e:
+        LOGGER.error('Unable to add the checksum of "%s" to its DvRoot manifest: %s', scene, e)
+
+
+def _on_after_save(client_data):
+    """Scene saved callback. A failing manifest never fails the save. The checksum of the scene is
+    added to the manifest in a background thread.
+    """
+    scene = cmds.file(query=True, sceneName=True)
+    if not scene or not os.path.isfile(scene):
+        return
+    try:
+        manifest = write_manifest(scene, collect_roots(scene), checksum=False)
+    except Exception as e:
+        LOGGER.error('Unable to write the DvRoot manifest of "%s": %s', scene, e)
+        return
+    LOGGER.debug('Wrote the manifest of %d roots for "%s"', len(manifest.roots), scene)
+    threading.Thread(target=_add_scene_hash, args=(scene,), name="br2-manifest-hash", daemon=True).start()
@@ -1,11 +1,17 @@
 import logging
 import os
 
-import maya.cmds as cmds
+from br2.dv_root_node.cmds_trace import cmds
+from br2.dv_root_node.ma_reader import INT_ATTRIBUTES, STRING_ATTRIBUTES
 
 
 LOGGER = logging.getLogger(__name__)
 ROOT_NODE_TYPE = "br2DvRootNode"
+# Extension roots are native transforms holding the root attributes as dynamic attributes, prefixed
+# with EXTENSION_PREFIX, and tagged with the EXTENSION_MARKER dynamic attribute, so they are found by
+# name without scanning every transform. Other transforms hold no root attributes.
+EXTENSION_PREFIX = "dvr_"
+EXTENSION_MARKER = "dvr_is_root"
 
 
 class MayaRootHandler:
@@ -14,6 +20,8 @@ class MayaRootHandler:
     Resources imported into maya. This node handler class provides convenient
     access to the DvRootNode's custom attributes which provide information used
     to identify an imported Resource, and determine it's repository locations.
+    Extension roots, native transforms holding the same attributes, are handled
+    the same way, see EXTENSION_MARKER.
     """
     def __init__(self, node):
         """Initializer.
@@ -33,7 +41,12 @@ class MayaRootHandler:
             raise RuntimeError(f'"{node}" not found.')
 
         # Confirm node is of expected type.
-        if not cmds.nodeType(node) == ROOT_NODE_TYPE:
+        node_type = cmds.nodeType(node)
+        if node_type == ROOT_NODE_TYPE:
+            self._prefix = ""
+        elif node_type == "transform" and cmds.attributeQuery(EXTENSION_MARKER, node=node, exists=True):
+            self._prefix = EXTENSION_PREFIX
+        else:
             raise RuntimeError(f'"{node}" is not a dvRootNode.')
 
         # Initialize state.
@@ -46,7 +59,7 @@ class MayaRootHandler:
         Returns:
             str: Resource name.
         """
-        return cmds.getAttr(f"{self.dag_path}.asset_name")
+        return cmds.getAttr(self._attr("asset_name"))
 
     @asset_name.setter
     def asset_name(self, value):
@@ -55,7 +68,7 @@ class MayaRootHandler:
         Args:
             value (str): Resource name.
         """
-        attr = f"{self.dag_path}.asset_name"
+        attr = self._attr("asset_name")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value, type="string")
         cmds.setAttr(attr, lock=True)
@@ -67,7 +80,7 @@ class MayaRootHandler:
         Returns:
             str: Resource asset_type.
         """
-        return cmds.getAttr(f"{self.dag_path}.asset_type")
+        return cmds.getAttr(self._attr("asset_type"))
 
     @asset_type.setter
     def asset_type(self, value):
@@ -76,7 +89,28 @@ class MayaRootHandler:
         Args:
             value (str): Resource name.
         """
-        attr = f"{self.dag_path}.asset_type"
+        attr = self._attr("asset_type")
+        cmds.setAttr(attr, lock=False)
+        cmds.setAttr(attr, value, type="string")
+        cmds.setAttr(attr, lock=True)
+
+    @property
+    def content_hash(self):
+        """The content hash of the file last checked in from the Root.
+
+        Returns:
+            str: Content hash, empty if the Root was never checked in.
+        """
+        return cmds.getAttr(self._attr("content_hash"))
+
+    @content_hash.setter
+    def content_hash(self, value):
+        """Sets the content_hash attribute on the DVRootNode managed by the instance.
+
+        Args:
+            value (str): Content hash.
+        """
+        attr = self._attr("content_hash")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value, type="string")
         cmds.setAttr(attr, lock=True)
@@ -106,7 +140,7 @@ class MayaRootHandler:
         Returns:
             str: DAG path.
         """
-        path = cmds.ls(self._uuid, uuid=True, long=True)
+        path = cmds.ls(self._uuid, long=True)
         if path:
             return path[0]
 
@@ -123,7 +157,7 @@ class MayaRootHandler:
         Returns:
             str: Resource asset_type.
         """
-        return cmds.getAttr(f"{self.dag_path}.date_created")
+        return cmds.getAttr(self._attr("date_created"))
 
     @date_created.setter
     def date_created(self, value):
@@ -132,7 +166,7 @@ class MayaRootHandler:
         Args:
             value (str): Resource name.
         """
-        attr = f"{self.dag_path}.date_created"
+        attr = self._attr("date_created")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value, type="string")
         cmds.setAttr(attr, lock=True)
@@ -144,7 +178,7 @@ class MayaRootHandler:
         Returns:
             str: Project name.
         """
-        return cmds.getAttr(f"{self.dag_path}.dpack_id")
+        return cmds.getAttr(self._attr("dpack_id"))
 
     @dpack_id.setter
     def dpack_id(self, value):
@@ -153,7 +187,7 @@ class MayaRootHandler:
         Args:
             value (str): Project name.
         """
-        attr = f"{self.dag_path}.dpack_id"
+        attr = self._attr("dpack_id")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value)
         cmds.setAttr(attr, lock=True)
@@ -165,7 +199,7 @@ class MayaRootHandler:
         Returns:
             str: Project name.
         """
-        return cmds.getAttr(f"{self.dag_path}.fc_id")
+        return cmds.getAttr(self._attr("fc_id"))
 
     @fc_id.setter
     def fc_id(self, value):
@@ -174,7 +208,7 @@ class MayaRootHandler:
         Args:
             value (str): Project name.
         """
-        attr = f"{self.dag_path}.fc_id"
+        attr = self._attr("fc_id")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value)
         cmds.setAttr(attr, lock=True)
@@ -186,7 +220,7 @@ class MayaRootHandler:
         Returns:
             str: Resource asset_type.
         """
-        return cmds.getAttr(f"{self.dag_path}.file_name")
+        return cmds.getAttr(self._attr("file_name"))
 
     @file_name.setter
     def file_name(self, value):
@@ -195,7 +229,7 @@ class MayaRootHandler:
         Args:
             value (str): Resource name.
         """
-        attr = f"{self.dag_path}.file_name"
+        attr = self._attr("file_name")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value, type="string")
         cmds.setAttr(attr, lock=True)
@@ -207,7 +241,7 @@ class MayaRootHandler:
         Returns:
             str: Resource asset_type.
         """
-        return cmds.getAttr(f"{self.dag_path}.file_type")
+        return cmds.getAttr(self._attr("file_type"))
 
     @file_type.setter
     def file_type(self, value):
@@ -216,11 +250,31 @@ class MayaRootHandler:
         Args:
             value (str): Resource name.
         """
-        attr = f"{self.dag_path}.file_type"
+        attr = self._attr("file_type")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value, type="string")
         cmds.setAttr(attr, lock=True)
 
+    @property
+    def is_dirty(self):
+        """Whether anything in the Root's subtree changed since the Root was loaded or last checked in.
+
+        Returns:
+            bool: True if the Root was modified, or if modified roots are not tracked in the calling maya
+                session.
+        """
+        tracker = _get_dirty_tracker()
+        return tracker is None or tracker.is_dirty(self._uuid)
+
+    @property
+    def is_extension(self):
+        """Whether the Root is an extension root, a native transform, rather than a DvRootNode.
+
+        Returns:
+            bool: True for extension roots.
+        """
+        return bool(self._prefix)
+
     @property
     def node_version(self):
         """The Version of the Resource represented by the instance.
@@ -228,7 +282,7 @@ class MayaRootHandler:
         Returns:
             str: Version specifier.
         """
-        return cmds.getAttr(f"{self.dag_path}.node_version")
+        return cmds.getAttr(self._attr("node_version"))
 
     @node_version.setter
     def node_version(self, value):
@@ -237,7 +291,7 @@ class MayaRootHandler:
         Args:
             value (str): Version Specifier.
         """
-        attr = f"{self.dag_path}.node_version"
+        attr = self._attr("node_version")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value, type="string")
         cmds.setAttr(attr, lock=True)
@@ -249,7 +303,7 @@ class MayaRootHandler:
         Returns:
             str: Project name.
         """
-        return cmds.getAttr(f"{self.dag_path}.project")
+        return cmds.getAttr(self._attr("project"))
 
     @project.setter
     def project(self, value):
@@ -258,7 +312,7 @@ class MayaRootHandler:
         Args:
             value (str): Project name.
         """
-        attr = f"{self.dag_path}.project"
+        attr = self._attr("project")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value, type="string")
         cmds.setAttr(attr, lock=True)
@@ -270,7 +324,7 @@ class MayaRootHandler:
         Returns:
             str: Project name.
         """
-        return cmds.getAttr(f"{self.dag_path}.project_id")
+        return cmds.getAttr(self._attr("project_id"))
 
     @project_id.setter
     def project_id(self, value):
@@ -279,11 +333,32 @@ class MayaRootHandler:
         Args:
             value (str): Project name.
         """
-        attr = f"{self.dag_path}.project_id"
+        attr = self._attr("project_id")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value)
         cmds.setAttr(attr, lock=True)
 
+    @property
+    def representation(self):
+        """The representation loaded under the Root, see br2.update_assets.representation.
+
+        Returns:
+            str: Representation, "bbox", "proxy" or "full".
+        """
+        return cmds.getAttr(self._attr("representation"))
+
+    @representation.setter
+    def representation(self, value):
+        """Sets the representation attribute on the DVRootNode managed by the instance.
+
+        Args:
+            value (str): Representation.
+        """
+        attr = self._attr("representation")
+        cmds.setAttr(attr, lock=False)
+        cmds.setAttr(attr, value, type="string")
+        cmds.setAttr(attr, lock=True)
+
     @property
     def status(self):
         """The Repository Project associated with the Entity represented by the instance.
@@ -291,7 +366,7 @@ class MayaRootHandler:
         Returns:
             str: Project name.
         """
-        return cmds.getAttr(f"{self.dag_path}.status")
+        return cmds.getAttr(self._attr("status"))
 
     @status.setter
     def status(self, value):
@@ -300,7 +375,7 @@ class MayaRootHandler:
         Args:
             value (str): Project name.
         """
-        attr = f"{self.dag_path}.status"
+        attr = self._attr("status")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value, type="string")
         cmds.setAttr(attr, lock=True)
@@ -312,7 +387,7 @@ class MayaRootHandler:
         Returns:
             str: Project name.
         """
-        return cmds.getAttr(f"{self.dag_path}.task")
+        return cmds.getAttr(self._attr("task"))
 
     @task.setter
     def task(self, value):
@@ -321,7 +396,7 @@ class MayaRootHandler:
         Args:
             value (str): Project name.
         """
-        attr = f"{self.dag_path}.task"
+        attr = self._attr("task")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value, type="string")
         cmds.setAttr(attr, lock=True)
@@ -333,7 +408,7 @@ class MayaRootHandler:
         Returns:
             str: Project name.
         """
-        return cmds.getAttr(f"{self.dag_path}.task_id")
+        return cmds.getAttr(self._attr("task_id"))
 
     @task_id.setter
     def task_id(self, value):
@@ -342,7 +417,7 @@ class MayaRootHandler:
         Args:
             value (str): Project name.
         """
-        attr = f"{self.dag_path}.task_id"
+        attr = self._attr("task_id")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value)
         cmds.setAttr(attr, lock=True)
@@ -354,7 +429,7 @@ class MayaRootHandler:
         Returns:
             str: Resource asset_type.
         """
-        return cmds.getAttr(f"{self.dag_path}.user")
+        return cmds.getAttr(self._attr("user"))
 
     @user.setter
     def user(self, value):
@@ -363,7 +438,7 @@ class MayaRootHandler:
         Args:
             value (str): Resource name.
         """
-        attr = f"{self.dag_path}.user"
+        attr = self._attr("user")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value, type="string")
         cmds.setAttr(attr, lock=True)
@@ -375,7 +450,7 @@ class MayaRootHandler:
         Returns:
             str: Resource asset_type.
         """
-        return cmds.getAttr(f"{self.dag_path}.user_id")
+        return cmds.getAttr(self._attr("user_id"))
 
     @user_id.setter
     def user_id(self, value):
@@ -384,7 +459,7 @@ class MayaRootHandler:
         Args:
             value (str): Resource name.
         """
-        attr = f"{self.dag_path}.user_id"
+        attr = self._attr("user_id")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value)
         cmds.setAttr(attr, lock=True)
@@ -405,7 +480,7 @@ class MayaRootHandler:
         Returns:
             str: Version specifier.
         """
-        return cmds.getAttr(f"{self.dag_path}.version")
+        return cmds.getAttr(self._attr("version"))
 
     @version.setter
     def version(self, value):
@@ -414,15 +489,16 @@ class MayaRootHandler:
         Args:
             value (str): Version Specifier.
         """
-        attr = f"{self.dag_path}.version"
+        attr = self._attr("version")
         cmds.setAttr(attr, lock=False)
         cmds.setAttr(attr, value, type="string")
         cmds.setAttr(attr, lock=True)
 
     @classmethod
     def create(cls, name, dpack_id=0, project="", project_id=0, task="", task_id=0, asset_type="", version="",
-               fc_id=0, status="", file_name="", file_type="", user="", user_id=0, date_created=""):
-        """Creates a new DvRootNode.
+               fc_id=0, status="", file_name="", file_type="", user="", user_id=0, date_created="", content_hash="",
+               extension=False):
+        """Creates a new DvRootNode, or a new extension root.
 
         Args:
             name (str): Node name.
@@ -440,6 +516,9 @@ class MayaRootHandler:
             user (str): User name.  Defaults to "".
             user_id (int): User ID.  Defaults to 0.
             date_created (str): Date created.  Defaults to "".
+            content_hash (str): Content hash of the File Collection.  Defaults to "".
+            extension (bool): If True create a native transform tagged as an extension root,
+                see EXTENSION_MARKER.  Defaults to False.
         Returns:
             MayaRootHandler: Handler.
         """
@@ -447,11 +526,17 @@ class MayaRootHandler:
         load_root_plugin()
 
         # Create root node and initialize handler.
-        node = cls(cmds.createNode(ROOT_NODE_TYPE, name=name))
+        if extension:
+            transform = cmds.createNode("transform", name=name)
+            tag_extension_root(transform)
+            node = cls(transform)
+        else:
+            node = cls(cmds.createNode(ROOT_NODE_TYPE, name=name))
 
         # Set handler attrs.
         node.asset_name = name
         node.asset_type = asset_type
+        node.content_hash = content_hash
         node.date_created = date_created
         node.dpack_id = dpack_id
         node.fc_id = fc_id
@@ -466,10 +551,22 @@ class MayaRootHandler:
         node.user_id = user_id
         node.version = version
 
-        cmds.setAttr(f"{node.dag_path}.node_version", lock=True)
+        cmds.setAttr(node._attr("node_version"), lock=True)
+
+        if not cmds.about(batch=True):
+            # Setting the metadata of a new root is not a modification.
+            node.mark_clean()
 
         return node
 
+    def mark_clean(self):
+        """Marks the Root as unmodified, e.g. once it was checked in. Does nothing if modified roots are not
+        tracked in the calling maya session.
+        """
+        tracker = _get_dirty_tracker()
+        if tracker is not None:
+            tracker.mark_clean(self._uuid)
+
     def iter_child_roots(self, recursive=False):
         """An iterator over all the Root's child Root Nodes.
 
@@ -479,12 +576,17 @@ class MayaRootHandler:
         Yields:
             MayaRootHandler: Child Root.
         """
+        dag_path = self.dag_path
         if recursive:
-            children = cmds.listRelatives(self.dag_path, allDescendents=True, type=ROOT_NODE_TYPE)
+            children = cmds.listRelatives(dag_path, allDescendents=True, type=ROOT_NODE_TYPE)
+            transforms = cmds.listRelatives(dag_path, allDescendents=True, type="transform", fullPath=True)
         else:
-            children = cmds.listRelatives(self.dag_path, children=True, type=ROOT_NODE_TYPE)
+            children = cmds.listRelatives(dag_path, children=True, type=ROOT_NODE_TYPE)
+            transforms = cmds.listRelatives(dag_path, children=True, type="transform", fullPath=True)
         for child in children or []:
             yield self.__class__(child)
+        for node in _filter_extension_roots(transforms or []):
+            yield self.__class__(node)
 
     def iter_parent_roots(self, recursive=False):
         """An iterator over the Root's parent Root nodes.
@@ -495,15 +597,21 @@ class MayaRootHandler:
         Yields:
             MayaRootHandler: Parent Root.
         """
-        node = self.dag_path
+        # The ancestors of the node, closest first.
+        ancestors = []
+        node = self.dag_path.rsplit("|", 1)[0]
         while node:
-            node = cmds.listRelatives(node, parent=True, fullPath=True)
-            if node:
-                node = node[0]
-                if cmds.nodeType(node) == ROOT_NODE_TYPE:
-                    yield self.__class__(node)
-                    if not recursive:
-                        break
+            ancestors.append(node)
+            node = node.rsplit("|", 1)[0]
+        if not ancestors:
+            return
+        roots = set(cmds.ls(ancestors, type=ROOT_NODE_TYPE, long=True) or [])
+        roots.update(_filter_extension_roots(ancestors))
+        for node in ancestors:
+            if node in roots:
+                yield self.__class__(node)
+                if not recursive:
+                    break
 
     @classmethod
     def iter_world_roots(cls):
@@ -512,10 +620,20 @@ class MayaRootHandler:
         Yields:
             MayaRootHandler: Root.
         """
-        for node in cmds.ls(type=ROOT_NODE_TYPE, long=True) or []:
+        for node in ls_root_nodes():
             if not cmds.listRelatives(node, parent=True):
                 yield cls(node)
 
+    def _attr(self, name):
+        """The plug of a root attribute of the node managed by the instance.
+
+        Args:
+            name (str): Attribute short name, as defined on DvRootNodes.
+        Returns:
+            str: Plug name.
+        """
+        return f"{self.dag_path}.{self._prefix}{name}"
+
     def __eq__(self, other):
         """Defines the equality comparison operator for the instance.
 
@@ -535,6 +653,101 @@ class MayaRootHandler:
         return f'{self.__class__.__name__}("{self.dag_path}")'
 
 
+def dirty_roots():
+    """The roots in the calling maya session modified since they were loaded or last checked in.
+
+    Returns:
+        list[MayaRootHandler]: Modified roots, all roots if modified roots are not tracked in the calling
+            maya session, e.g. when the root plug-in could not start tracking.
+    """
+    tracker = _get_dirty_tracker()
+    if tracker is None:
+        LOGGER.warning("Modified roots are not tracked in this maya session, listing all roots.")
+        return [MayaRootHandler(node) for node in ls_root_nodes()]
+    return [MayaRootHandler(cmds.ls(uuid)[0]) for uuid in tracker.dirty_uuids() if cmds.ls(uuid)]
+
+
+def _get_dirty_tracker():
+    """The dirty tracker of the calling maya session.
+
+    Returns:
+        br2.dv_root_node.dirty_tracker.RootDirtyTracker|None: Tracker, None if modified roots are not tracked,
+            see br2.dv_root_node.dirty_tracker.start_dirty_tracker.
+    """
+    from br2.dv_root_node.dirty_tracker import get_dirty_tracker
+    return get_dirty_tracker()
+
+
+def is_root_node(node):
+    """Whether a node is a root, a DvRootNode or an extension root.
+
+    Args:
+        node (str): Node name.
+    Returns:
+        bool: True for roots.
+    """
+    node_type = cmds.nodeType(node)
+    if node_type == "transform":
+        return cmds.attributeQuery(EXTENSION_MARKER, node=node, exists=True)
+    return node_type == ROOT_NODE_TYPE
+
+
+def ls_extension_roots():
+    """The extension roots in the calling maya session, the transforms holding EXTENSION_MARKER.
+
+    Returns:
+        list[str]: Full DAG paths.
+    """
+    return cmds.ls(f"*.{EXTENSION_MARKER}", objectsOnly=True, long=True, recursive=True) or []
+
+
+def ls_root_nodes():
+    """The roots in the calling maya session, DvRootNodes first, then extension roots.
+
+    Returns:
+        list[str]: Full DAG paths.
+    """
+    return (cmds.ls(type=ROOT_NODE_TYPE, long=True) or []) + ls_extension_roots()
+
+
+def tag_extension_root(node):
+    """Tags a native transform as an extension root: adds the root attributes, prefixed with
+    EXTENSION_PREFIX, then EXTENSION_MARKER. The new root is clean, see MayaRootHandler.is_dirty.
+
+    Args:
+        node (str): Transform name.
+    """
+    if cmds.attributeQuery(EXTENSION_MARKER, node=node, exists=True):
+        return
+    for name, default in STRING_ATTRIBUTES.items():
+        attr = EXTENSION_PREFIX + name
+        if not cmds.attributeQuery(attr, node=node, exists=True):
+            cmds.addAttr(node, longName=attr, dataType="string")
+            cmds.setAttr(f"{node}.{attr}", default, type="string")
+    for name, default in INT_ATTRIBUTES.items():
+        attr = EXTENSION_PREFIX + name
+        if not cmds.attributeQuery(attr, node=node, exists=True):
+            cmds.addAttr(node, longName=attr, attributeType="long", defaultValue=default)
+    cmds.addAttr(node, longName=EXTENSION_MARKER, attributeType="bool", defaultValue=True)
+    cmds.setAttr(f"{node}.{EXTENSION_MARKER}", lock=True)
+    if not cmds.about(batch=True):
+        # Track the new root, tagging it is not a modification.
+        MayaRootHandler(node).mark_clean()
+
+
+def _filter_extension_roots(nodes):
+    """The extension roots among transforms, found with a single query.
+
+    Args:
+        nodes (list[str]): Full DAG paths of transforms.
+    Returns:
+        list[str]: Full DAG paths of the extension roots.
+    """
+    if not nodes:
+        return []
+    return cmds.ls([f"{node}.{EXTENSION_MARKER}" for node in nodes], objectsOnly=True, long=True) or []
+
+
 def add_plugin_path():
     """"""
     node_plugin_path = os.path.join(os.path.dirname(__file__), "plug-in")
@@ -47,6 +47,7 @@ class DvRootNode(OpenMayaMPx.MPxTransform):
     # Define variables used to define the node's custom attributes.
     asset_name = OpenMaya.MObject()
     asset_type = OpenMaya.MObject()
+    content_hash = OpenMaya.MObject()
     date_created = OpenMaya.MObject()
     deliverable_id = OpenMaya.MObject()
     dpack_id = OpenMaya.MObject()
@@ -56,6 +57,7 @@ class DvRootNode(OpenMayaMPx.MPxTransform):
     node_version = OpenMaya.MObject()
     project = OpenMaya.MObject()
     project_id = OpenMaya.MObject()
+    representation = OpenMaya.MObject()
     status = OpenMaya.MObject()
     task = OpenMaya.MObject()
     task_id = OpenMaya.MObject()
@@ -99,6 +101,7 @@ def initializePlugin(mobject):
         pluginName, nodeId,
         nodeCreator, nodeInitializer, matrixCreator,
         matrixId)
+    startSessionCallbacks()
 
 
 def uninitializePlugin(mobject):
@@ -107,9 +110,39 @@ def uninitializePlugin(mobject):
         mobject (OpenMaya.MObject): Maya object instance representing the DvRootNode plug in.
     """
     mplugin = OpenMayaMPx.MFnPlugin(mobject)
+    stopSessionCallbacks()
     mplugin.deregisterNode(nodeId)
 
 
+def startSessionCallbacks():
+    """Starts tracking modified roots and writing the root manifest of saved scenes in interactive
+    sessions, see br2.dv_root_node.dirty_tracker and br2.dv_root_node.manifest. Scenes load the
+    plugin themselves, so both start here rather than in the tools loading the plugin. Batch
+    sessions, e.g. check-in export workers, do neither.
+    """
+    if OpenMaya.MGlobal.mayaState() != OpenMaya.MGlobal.kInteractive:
+        return
+    try:
+        from br2.dv_root_node.dirty_tracker import start_dirty_tracker
+        from br2.dv_root_node.manifest_callback import register_manifest_callback
+    except ImportError as e:
+        OpenMaya.MGlobal.displayWarning(f"{pluginName}: root session callbacks not started, br2 not found: {e}")
+        return
+    start_dirty_tracker()
+    register_manifest_callback()
+
+
+def stopSessionCallbacks():
+    """Stops tracking modified roots and writing root manifests."""
+    try:
+        from br2.dv_root_node.dirty_tracker import stop_dirty_tracker
+        from br2.dv_root_node.manifest_callback import unregister_manifest_callback
+    except ImportError:
+        return
+    stop_dirty_tracker()
+    unregister_manifest_callback()
+
+
 # create/initialize node and matrix
 def matrixCreator():
     """Creates a transform matrix node for a newly minted DvRooNode.
@@ -231,6 +264,20 @@ def nodeInitializer():
         OpenMaya.MFnStringData().create(""))
     DvRootNode.addAttribute(DvRootNode.date_created)
 
+    content_hash_attr = OpenMaya.MFnTypedAttribute()
+    DvRootNode.content_hash = content_hash_attr.create(
+        "Content_Hash", "content_hash",
+        OpenMaya.MFnData.kString,
+        OpenMaya.MFnStringData().create(""))
+    DvRootNode.addAttribute(DvRootNode.content_hash)
+
+    representation_attr = OpenMaya.MFnTypedAttribute()
+    DvRootNode.representation = representation_attr.create(
+        "Representation", "representation",
+        OpenMaya.MFnData.kString,
+        OpenMaya.MFnStringData().create("full"))
+    DvRootNode.addAttribute(DvRootNode.representation)
+
     node_version_attr = OpenMaya.MFnTypedAttribute()
     DvRootNode.node_version = node_version_attr.create(
         "Node_Version", "node_version",
@@ -0,0 +1,274 @@
+"""Persistent where-used index of the File Collections referenced by scene files.
+
+The index maps fc_id, dpack_id and file name to the scene files whose DvRoots point at them.
+It is built by scanning Maya ASCII scenes with ma_reader and kept in a SQLite database. Updates
+only re-read the scenes whose modification time or size changed.
+
+Only the roots written into each scene file are indexed, roots nested under them included.
+File references are not followed: roots a scene loads through a reference, e.g. the roots
+inside a published check-in file, are indexed under the referenced file, if it is indexed
+itself, not under the scenes referencing it.
+
+Usage:
+    python -m br2.dv_root_node.where_used <db> update <scene|dir> [...]
+    python -m br2.dv_root_node.where_used <db> query (--fc-id ID | --dpack-id ID | --file PATH)
+"""
+
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from br2.dv_root_node.ma_reader import iter_scene_files, read_roots
+
+
+LOGGER = logging.getLogger(__name__)
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenes (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS roots (
+    scene_id INTEGER NOT NULL REFERENCES scenes(id) ON DELETE CASCADE,
+    dag_path TEXT NOT NULL,
+    uuid TEXT,
+    parent_root TEXT,
+    world_root TEXT NOT NULL,
+    asset_name TEXT,
+    dpack_id INTEGER,
+    fc_id INTEGER,
+    file_name TEXT,
+    version TEXT
+);
+CREATE INDEX IF NOT EXISTS roots_scene_id ON roots(scene_id);
+CREATE INDEX IF NOT EXISTS roots_fc_id ON roots(fc_id);
+CREATE INDEX IF NOT EXISTS roots_dpack_id ON roots(dpack_id);
+CREATE INDEX IF NOT EXISTS roots_file_name ON roots(file_name COLLATE NOCASE);
+"""
+
+Usage = namedtuple("Usage", ["scene", "dag_path", "world_root", "asset_name", "dpack_id", "fc_id", "version"])
+
+
+class WhereUsedIndex(object):
+    """Inverted index from File Collections to the scene files using them."""
+
+    def __init__(self, path):
+        """Initializer.
+
+        Args:
+            path (str): SQLite database file. Created if it does not exist.
+        """
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        self._connection.execute("PRAGMA foreign_keys = ON")
+        self._connection.executescript(SCHEMA)
+
+    def close(self):
+        """Closes the database."""
+        self._connection.close()
+
+    def update(self, paths, workers=None):
+        """Brings the index up to date with the scene files found in the given paths.
+        Scenes whose modification time and size are unchanged are not read again, and indexed
+        scenes that no longer exist under the given directories are removed.
+
+        Args:
+            paths (list[str]): Scene files and/or directories to search recursively.
+            workers (int|None): Number of worker processes. Defaults to the number of CPUs.
+        Returns:
+            dict: Number of scenes "scanned", "unchanged", "removed" and "failed".
+        """
+        indexed = {path: (mtime, size) for path, mtime, size in
+                   self._connection.execute("SELECT path, mtime, size FROM scenes")}
+        found = set()
+        changed = []
+        for scene in iter_scene_files(paths, extensions=(".ma",)):
+            scene = _normalize(scene)
+            found.add(scene)
+            stat = os.stat(scene)
+            if indexed.get(scene) != (stat.st_mtime, stat.st_size):
+                changed.append(scene)
+
+        dirs = [_normalize(p) + os.sep for p in paths if os.path.isdir(p)]
+        removed = [p for p in indexed if p not in found and (not os.path.exists(p) or any(
+            p.startswith(d) for d in dirs))]
+
+        stats = {"scanned": 0, "unchanged": len(found) - len(changed), "removed": len(removed), "failed": 0}
+        with self._connection:
+            self._connection.executemany("DELETE FROM scenes WHERE path = ?", [(p,) for p in removed])
+        if not changed:
+            return stats
+
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for scene, mtime, size, rows, error in executor.map(_read_scene, changed, chunksize=4):
+                if error is not None:
+                    LOGGER.error('Unable to index "%s": %s', scene, error)
+                    stats["failed"] += 1
+                    continue
+                self._store(scene, mtime, size, rows)
+                stats["scanned"] += 1
+        return stats
+
+    def scenes_using_dpack(self, dpack_id):
+        """The roots, and their scenes, pointing at a Deliverable Package.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+        Returns:
+            list[Usage]: Usages.
+        """
+        return self._query("roots.dpack_id = ?", dpack_id)
+
+    def scenes_using_fc(self, fc_id):
+        """The roots, and their scenes, pointing at a File Collection.
+
+        Args:
+            fc_id (int): File Collection ID.
+        Returns:
+            list[Usage]: Usages.
+        """
+        return self._query("roots.fc_id = ?", fc_id)
+
+    def scenes_using_file(self, path):
+        """The roots, and their scenes, pointing at a file. Roots record the file name only,
+        so files are matched by name.
+
+        Args:
+            path (str): File path or name.
+        Returns:
+            list[Usage]: Usages.
+        """
+        return self._query("roots.file_name = ? COLLATE NOCASE", os.path.basename(path.replace("\\", "/")))
+
+    def _query(self, condition, value):
+        """Runs a usage query.
+
+        Args:
+            condition (str): SQL condition on the roots table.
+            value (object): Condition parameter.
+        Returns:
+            list[Usage]: Usages.
+        """
+        rows = self._connection.execute(
+            "SELECT scenes.path, roots.dag_path, roots.world_root, roots.asset_name, roots.dpack_id, "
+            "roots.fc_id, roots.version FROM roots JOIN scenes ON scenes.id = roots.scene_id "
+            f"WHERE {condition} ORDER BY scenes.path, roots.dag_path", (value,))
+        return [Usage(*row) for row in rows]
+
+    def _store(self, scene, mtime, size, rows):
+        """Replaces the indexed roots of a scene.
+
+        Args:
+            scene (str): Scene file path.
+            mtime (float): Scene modification time.
+            size (int): Scene size in bytes.
+            rows (list[tuple]): Root rows, as returned by _read_scene.
+        """
+        with self._connection:
+            self._connection.execute("DELETE FROM scenes WHERE path = ?", (scene,))
+            scene_id = self._connection.execute(
+                "INSERT INTO scenes (path, mtime, size) VALUES (?, ?, ?)", (scene, mtime, size)).lastrowid
+            self._connection.executemany(
+                "INSERT INTO roots (scene_id, dag_path, uuid, parent_root, world_root, asset_name, dpack_id, "
+                "fc_id, file_name, version) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(scene_id,) + row for row in rows])
+
+    def __enter__(self):
+        """Enters the context of the instance.
+
+        Returns:
+            WhereUsedIndex: The instance.
+        """
+        return self
+
+    def __exit__(self, *args):
+        """Closes the database when leaving the context of the instance."""
+        self.close()
+
+
+def _normalize(path):
+    """Normalizes a scene path for use as an index key.
+
+    Args:
+        path (str): File path.
+    Returns:
+        str: Absolute, normalized path.
+    """
+    return os.path.normpath(os.path.abspath(path))
+
+
+def _read_scene(scene):
+    """Reads the roots of a scene. Runs in a worker process.
+
+    Args:
+        scene (str): Scene file path.
+    Returns:
+        tuple: Scene path, mtime, size, root rows and error message, None on success.
+    """
+    stat = os.stat(scene)
+    try:
+        roots = read_roots(scene)
+    except Exception as e:
+        return scene, stat.st_mtime, stat.st_size, [], str(e)
+
+    parents = {root.dag_path: root.parent_root for root in roots}
+    rows = []
+    for root in roots:
+        world_root = root.dag_path
+        while parents.get(world_root):
+            world_root = parents[world_root]
+        rows.append((root.dag_path, root.uuid, root.parent_root, world_root, root.asset_name, root.dpack_id,
+                     root.fc_id, root.file_name, root.version))
+    return scene, stat.st_mtime, stat.st_size, rows, None
+
+
+def main(argv=None):
+    """Command line entry point.
+
+    Args:
+        argv (list[str]|None): Arguments. Defaults to sys.argv.
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description="Where-used index of the File Collections used by scenes.")
+    parser.add_argument("db", help="Index database file.")
+    commands = parser.add_subparsers(dest="command")
+    update_parser = commands.add_parser("update", help="Index new and modified scenes.")
+    update_parser.add_argument("paths", nargs="+", help="Scene files or directories of scene files.")
+    update_parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes.")
+    query_parser = commands.add_parser("query", help="List the scenes using a File Collection.")
+    query_group = query_parser.add_mutually_exclusive_group(required=True)
+    query_group.add_argument("--fc-id", type=int, help="File Collection ID.")
+    query_group.add_argument("--dpack-id", type=int, help="Deliverable Package ID.")
+    query_group.add_argument("--file", help="File path or name.")
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.error("a command is required")
+
+    logging.basicConfig(level=logging.INFO)
+    with WhereUsedIndex(args.db) as index:
+        start = time.perf_counter()
+        if args.command == "update":
+            result = index.update(args.paths, workers=args.workers)
+        elif args.fc_id is not None:
+            result = [u._asdict() for u in index.scenes_using_fc(args.fc_id)]
+        elif args.dpack_id is not None:
+            result = [u._asdict() for u in index.scenes_using_dpack(args.dpack_id)]
+        else:
+            result = [u._asdict() for u in index.scenes_using_file(args.file)]
+        LOGGER.info("%s took %.3fs", args.command, time.perf_counter() - start)
+    json.dump(result, sys.stdout, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+"""Imports the repository as the br2 package, whatever the name of its directory, the way
+br2.benchmarks.bench_node_handler does. Only modules that run without maya are tested here.
+"""
+
+
+import importlib.util
+import os
+import sys
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_package(name="br2", path=REPO_DIR):
+    """Imports the repository as a package, whatever the name of its directory.
+
+    Args:
+        name (str): Package name. Defaults to "br2".
+        path (str): Package directory. Defaults to REPO_DIR.
+    Returns:
+        module: Package.
+    """
+    if name not in sys.modules:
+        spec = importlib.util.spec_from_file_location(
+            name, os.path.join(path, "__init__.py"), submodule_search_locations=[path])
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[name] = module
+        spec.loader.exec_module(module)
+    return sys.modules[name]
+
+
+load_package()
@@ -0,0 +1,106 @@
+import pathlib
+import sys
+import types
+
+import pytest
+
+from br2.check_in import export_worker
+from br2.check_in.content_hash import checksum_file, hash_file
+
+
+def write_export(path, fc_id=26, version="26", content_hash="", mesh_points="0 0 0", saved="Mon Oct 19 2026"):
+    """Writes a Maya ASCII export of a root holding a mesh."""
+    path.write_text("\n".join([
+        "//Maya ASCII 2022 scene",
+        f"//Last modified: {saved}",
+        'requires maya "2022";',
+        'createNode br2DvRootNode -n "Stadium";',
+        '\trename -uid "5A1D0C2E-4F1B-8C3A-2B9E-1F0A7C3D6E21";',
+        '\tsetAttr ".asset_name" -type "string" "Stadium";',
+        f'\tsetAttr -l on ".fc_id" {fc_id};',
+        f'\tsetAttr ".version" -type "string" "{version}";',
+        f'\tsetAttr ".content_hash" -type "string" ("{content_hash[:8]}"',
+        f'\t\t+ "{content_hash[8:]}");',
+        'createNode mesh -n "StadiumShape" -p "Stadium";',
+        f'\tsetAttr ".pt[0]" -type "float3" {mesh_points};',
+        '\tsetAttr ".version" -type "string" "not root metadata";',
+        f'fileInfo "cutIdentifier" "{saved}";',
+    ]) + "\n")
+    return str(path)
+
+
+class FakeCmds(object):
+    """maya.cmds of a worker whose check-in scene holds one root, exported with the given metadata."""
+
+    def __init__(self):
+        self.metadata = {}
+
+    def ls(self, uuid, long=False):
+        return ["|Stadium"]
+
+    def select(self, node, replace=False):
+        pass
+
+    def file(self, path, **kwargs):
+        write_export(pathlib.Path(path), **self.metadata)
+
+
+@pytest.fixture
+def cmds(monkeypatch):
+    cmds = FakeCmds()
+    maya = types.ModuleType("maya")
+    maya.cmds = cmds
+    monkeypatch.setitem(sys.modules, "maya", maya)
+    monkeypatch.setitem(sys.modules, "maya.cmds", cmds)
+    return cmds
+
+
+def test_hash_ignores_save_lines(tmp_path):
+    first = write_export(tmp_path / "a.ma", saved="Mon Oct 19 2026")
+    second = write_export(tmp_path / "b.ma", saved="Tue Oct 20 2026")
+    assert hash_file(first) == hash_file(second)
+    assert checksum_file(first) != checksum_file(second)
+
+
+def test_hash_ignores_root_metadata(tmp_path):
+    first = write_export(tmp_path / "a.ma")
+    published = write_export(tmp_path / "b.ma", fc_id=27, version="27", content_hash=hash_file(first, root="Stadium"))
+    assert hash_file(first, root="Stadium") == hash_file(published, root="Stadium")
+    assert hash_file(first) != hash_file(published)
+
+
+def test_hash_keeps_content(tmp_path):
+    first = write_export(tmp_path / "a.ma")
+    changed = write_export(tmp_path / "b.ma", mesh_points="0 1 0")
+    assert hash_file(first, root="Stadium") != hash_file(changed, root="Stadium")
+
+
+def test_hash_keeps_metadata_of_other_nodes(tmp_path):
+    first = write_export(tmp_path / "a.ma")
+    text = (tmp_path / "a.ma").read_text().replace('"not root metadata"', '"changed"')
+    (tmp_path / "b.ma").write_text(text)
+    assert hash_file(first, root="Stadium") != hash_file(str(tmp_path / "b.ma"), root="Stadium")
+
+
+def test_unchanged_check_in_dedupes(tmp_path, cmds):
+    job = {"uuid": "5A1D0C2E", "node": "Stadium", "path": str(tmp_path / "Stadium_V027.ma"),
+           "staging_path": str(tmp_path / "staging.ma")}
+    first = export_worker.export_root(dict(job, previous_hash=None))
+    assert first["status"] == export_worker.STATUS_EXPORTED
+
+    # Publishing the first check-in points the root at the new version and records its hash.
+    cmds.metadata = {"fc_id": 27, "version": "27", "content_hash": first["content_hash"]}
+    second = export_worker.export_root(dict(job, path=str(tmp_path / "Stadium_V028.ma"),
+                                            previous_hash=first["content_hash"]))
+    assert second["error"] is None
+    assert second["status"] == export_worker.STATUS_UNCHANGED
+    assert second["content_hash"] == first["content_hash"]
+
+
+def test_binary_check_in_is_always_published(tmp_path, cmds):
+    job = {"uuid": "5A1D0C2E", "node": "Stadium", "path": str(tmp_path / "Stadium_V027.mb"),
+           "staging_path": str(tmp_path / "staging.mb")}
+    first = export_worker.export_root(dict(job, previous_hash=None))
+    second = export_worker.export_root(dict(job, previous_hash=first["content_hash"]))
+    assert second["content_hash"] == first["content_hash"]
+    assert second["status"] == export_worker.STATUS_EXPORTED
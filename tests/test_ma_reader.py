@@ -0,0 +1,96 @@
+import pytest
+
+from br2.dv_root_node.ma_reader import iter_child_roots, iter_scene_files, read_roots
+
+
+SCENE = r'''//Maya ASCII 2022 scene
+//Name: shot.ma
+requires maya "2022";
+requires "br2DvRootNode" "1.0";
+createNode transform -n "Stadium";
+	rename -uid "A0000000-0000-0000-0000-000000000001";
+createNode br2DvRootNode -n "Seat" -p "Stadium";
+	rename -uid "A0000000-0000-0000-0000-000000000002";
+	setAttr ".asset_name" -type "string" "Seat";
+	setAttr -l on ".dpack_id" 16938;
+	setAttr -l on ".fc_id" 101963;
+	setAttr -l on ".file_name" -type "string" ("KDurant_Base_lookDev_with_a_very_long_"
+		 + "file_name_V027.ma");
+	setAttr ".user" -type "string" "Brian \"Bri\" Freisinger\\home\n";
+	setAttr ".version" -type "string" "27";
+createNode mesh -n "SeatShape" -p "Seat";
+	setAttr ".version" -type "string" "not a root";
+createNode br2DvRootNode -n "Cushion" -p "Seat";
+	rename -uid "A0000000-0000-0000-0000-000000000003";
+	setAttr -l on ".fc_id" 91754;
+createNode transform -n "Prop";
+	rename -uid "A0000000-0000-0000-0000-000000000004";
+	addAttr -ci true -sn "dvr_fc_id" -ln "dvr_fc_id" -at "long";
+	addAttr -ci true -sn "dvr_version" -ln "dvr_version" -dt "string";
+	addAttr -ci true -sn "dvr_is_root" -ln "dvr_is_root" -min 0 -max 1 -at "bool";
+	setAttr -l on ".dvr_fc_id" 86261;
+	setAttr ".dvr_version" -type "string" ("1");
+	setAttr -l on ".dvr_is_root" yes;
+createNode transform -n "Camera";
+	setAttr ".fc_id" 5;
+'''
+
+
+@pytest.fixture
+def roots(tmp_path):
+    path = tmp_path / "shot.ma"
+    path.write_text(SCENE)
+    return {root.dag_path: root for root in read_roots(str(path))}
+
+
+def test_reads_roots_with_full_paths(roots):
+    assert list(roots) == ["|Stadium|Seat", "|Stadium|Seat|Cushion", "|Prop"]
+    assert roots["|Stadium|Seat"].uuid == "A0000000-0000-0000-0000-000000000002"
+    assert roots["|Stadium|Seat"].parent_root is None
+    assert roots["|Stadium|Seat|Cushion"].parent_root == "|Stadium|Seat"
+
+
+def test_reads_root_attributes(roots):
+    seat = roots["|Stadium|Seat"]
+    assert seat.asset_name == "Seat"
+    assert (seat.dpack_id, seat.fc_id, seat.version) == (16938, 101963, "27")
+    assert seat.representation == "full"
+    assert roots["|Stadium|Seat|Cushion"].fc_id == 91754
+
+
+def test_joins_split_strings(roots):
+    assert roots["|Stadium|Seat"].file_name == "KDurant_Base_lookDev_with_a_very_long_file_name_V027.ma"
+    assert roots["|Prop"].version == "1"
+
+
+def test_unescapes_strings(roots):
+    assert roots["|Stadium|Seat"].user == 'Brian "Bri" Freisinger\\home\n'
+
+
+def test_reads_extension_roots(roots):
+    prop = roots["|Prop"]
+    assert prop.is_extension
+    assert not roots["|Stadium|Seat"].is_extension
+    assert prop.fc_id == 86261
+
+
+def test_iter_child_roots(roots):
+    scene_roots = list(roots.values())
+    seat = roots["|Stadium|Seat"]
+    assert [root.dag_path for root in iter_child_roots(scene_roots, seat)] == ["|Stadium|Seat|Cushion"]
+    assert list(iter_child_roots(scene_roots, roots["|Prop"], recursive=True)) == []
+
+
+def test_empty_and_unsupported_files(tmp_path):
+    empty = tmp_path / "empty.ma"
+    empty.write_text("")
+    assert read_roots(str(empty)) == []
+    with pytest.raises(ValueError):
+        read_roots(str(tmp_path / "shot.mb"))
+
+
+def test_iter_scene_files(tmp_path):
+    (tmp_path / "b").mkdir()
+    for name in ("a.ma", "b/c.mb", "b/d.txt"):
+        (tmp_path / name).write_text("")
+    assert list(iter_scene_files([str(tmp_path)])) == [str(tmp_path / "a.ma"), str(tmp_path / "b" / "c.mb")]
@@ -0,0 +1,136 @@
+import threading
+
+import pytest
+
+from br2.dv_root_node.main_thread import MainThreadDispatcher
+
+
+class FakeClock(object):
+    """Clock advancing by a fixed step every time it is read."""
+
+    def __init__(self, step=0.0):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self):
+        self.now += self.step
+        return self.now
+
+
+@pytest.fixture
+def scheduled():
+    return []
+
+
+@pytest.fixture
+def dispatcher(scheduled):
+    return MainThreadDispatcher(schedule=scheduled.append, budget=1.0, clock=FakeClock())
+
+
+def run_scheduled(scheduled):
+    """Runs the scheduled batches, the way the main thread event loop would."""
+    batches = 0
+    while scheduled:
+        scheduled.pop(0)()
+        batches += 1
+    return batches
+
+
+def test_submit_runs_in_order(dispatcher, scheduled):
+    calls = []
+    futures = [dispatcher.submit(calls.append, i) for i in range(3)]
+    assert len(scheduled) == 1
+    assert dispatcher.pending_count == 3
+    assert run_scheduled(scheduled) == 1
+    assert calls == [0, 1, 2]
+    assert all(future.done() for future in futures)
+    assert dispatcher.pending_count == 0
+
+
+def test_submit_from_worker_thread(dispatcher, scheduled):
+    futures = []
+    thread = threading.Thread(target=lambda: futures.append(dispatcher.submit(pow, 2, 10)))
+    thread.start()
+    thread.join()
+    run_scheduled(scheduled)
+    assert futures[0].result(timeout=1) == 1024
+
+
+def test_run_on_main_thread_runs_right_away(dispatcher, scheduled):
+    assert dispatcher.run(pow, 2, 3) == 8
+    assert not scheduled
+
+
+def test_run_from_worker_thread_waits(dispatcher, scheduled):
+    results = []
+    thread = threading.Thread(target=lambda: results.append(dispatcher.run(pow, 3, 2)))
+    thread.start()
+    while not scheduled:
+        thread.join(0.01)
+    run_scheduled(scheduled)
+    thread.join()
+    assert results == [9]
+
+
+def test_coalesced_runs_latest_only(dispatcher, scheduled):
+    calls = []
+    first = dispatcher.submit_coalesced(("refresh", "UUID-1"), calls.append, "first")
+    second = dispatcher.submit_coalesced(("refresh", "UUID-1"), calls.append, "second")
+    other = dispatcher.submit_coalesced(("refresh", "UUID-2"), calls.append, "other")
+    assert first is second
+    assert dispatcher.pending_count == 2
+    run_scheduled(scheduled)
+    assert calls == ["second", "other"]
+    assert first.done() and other.done()
+
+    # Once run, the key queues a new operation.
+    third = dispatcher.submit_coalesced(("refresh", "UUID-1"), calls.append, "third")
+    assert third is not first
+    run_scheduled(scheduled)
+    assert calls[-1] == "third"
+
+
+def test_batches_stop_at_budget(scheduled):
+    calls = []
+    # Every clock read takes 0.3s: a batch with a 1s budget runs 3 operations.
+    dispatcher = MainThreadDispatcher(schedule=scheduled.append, budget=1.0, clock=FakeClock(0.3))
+    for i in range(7):
+        dispatcher.submit(calls.append, i)
+    scheduled.pop(0)()
+    assert calls == [0, 1, 2]
+    assert len(scheduled) == 1
+    assert run_scheduled(scheduled) == 2
+    assert calls == list(range(7))
+
+
+def test_cancel_all(dispatcher, scheduled):
+    calls = []
+    futures = [dispatcher.submit(calls.append, i) for i in range(3)]
+    dispatcher.cancel_all()
+    assert dispatcher.pending_count == 0
+    assert all(future.cancelled() for future in futures)
+    run_scheduled(scheduled)
+    assert calls == []
+
+    # The dispatcher keeps working after a cancel.
+    future = dispatcher.submit(calls.append, 3)
+    run_scheduled(scheduled)
+    assert future.done() and calls == [3]
+
+
+def test_cancelled_future_is_skipped(dispatcher, scheduled):
+    calls = []
+    cancelled = dispatcher.submit(calls.append, 0)
+    dispatcher.submit(calls.append, 1)
+    cancelled.cancel()
+    run_scheduled(scheduled)
+    assert calls == [1]
+
+
+def test_failed_operation(dispatcher, scheduled):
+    failed = dispatcher.submit(int, "not a number")
+    after = dispatcher.submit(int, "3")
+    run_scheduled(scheduled)
+    with pytest.raises(ValueError):
+        failed.result()
+    assert after.result() == 3
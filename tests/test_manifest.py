@@ -0,0 +1,112 @@
+import json
+import os
+
+import pytest
+
+from br2.dv_root_node.manifest import (ManifestRoot, add_scene_hash, get_manifest_path, is_stale, main, read_manifest,
+                                      write_manifest)
+
+
+ROOTS = [
+    ManifestRoot("UUID-1", None, "|Stadium", "Stadium", 1, 10, "3", "/assets/Stadium_V003.ma"),
+    ManifestRoot("UUID-2", "UUID-1", "|Stadium|Seat", "Seat", 2, 20, "1", "/assets/Seat_V001.ma"),
+]
+
+
+@pytest.fixture
+def scene(tmp_path):
+    path = tmp_path / "shot.ma"
+    path.write_text('//Maya ASCII 2022 scene\nrequires maya "2022";\n')
+    return str(path)
+
+
+def touch(path, offset):
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + offset))
+
+
+def test_round_trip(scene):
+    written = write_manifest(scene, ROOTS)
+    manifest = read_manifest(scene)
+    assert manifest == written
+    assert manifest.scene == "shot.ma"
+    assert manifest.roots == ROOTS
+    assert not os.path.exists(get_manifest_path(scene) + ".tmp")
+
+
+def test_missing_manifest(scene):
+    assert read_manifest(scene) is None
+
+
+def test_unsupported_manifest(scene):
+    write_manifest(scene, ROOTS)
+    path = get_manifest_path(scene)
+    with open(path) as stream:
+        data = json.load(stream)
+    data["manifest_version"] += 1
+    with open(path, "w") as stream:
+        json.dump(data, stream)
+    assert read_manifest(scene) is None
+
+
+def test_unchanged_scene_is_not_stale(scene):
+    manifest = write_manifest(scene, ROOTS)
+    assert not is_stale(manifest, scene)
+
+
+def test_resized_scene_is_stale(scene):
+    manifest = write_manifest(scene, ROOTS)
+    with open(scene, "a") as stream:
+        stream.write('createNode transform -n "Seat";\n')
+    assert is_stale(manifest, scene)
+
+
+def test_touched_scene(scene):
+    manifest = write_manifest(scene, ROOTS)
+    touch(scene, 10)
+    assert is_stale(manifest, scene)
+    assert not is_stale(manifest, scene, verify_hash=True)
+
+
+def test_rewritten_scene_with_same_size_is_stale(scene):
+    manifest = write_manifest(scene, ROOTS)
+    with open(scene, "r+") as stream:
+        stream.write("//MAYA")
+    touch(scene, 10)
+    assert is_stale(manifest, scene, verify_hash=True)
+
+
+def test_add_scene_hash(scene):
+    manifest = write_manifest(scene, ROOTS, checksum=False)
+    assert manifest.scene_hash is None
+    touch(scene, 10)
+    assert is_stale(manifest, scene, verify_hash=True)
+    touch(scene, -10)
+
+    assert add_scene_hash(scene).scene_hash == write_manifest(scene, ROOTS).scene_hash
+    assert read_manifest(scene).roots == ROOTS
+    assert add_scene_hash(scene) is None
+
+
+def test_add_scene_hash_to_changed_scene(scene):
+    write_manifest(scene, ROOTS, checksum=False)
+    with open(scene, "a") as stream:
+        stream.write('createNode transform -n "Seat";\n')
+    assert add_scene_hash(scene) is None
+    assert read_manifest(scene).scene_hash is None
+
+
+def test_deleted_scene_is_stale(scene):
+    manifest = write_manifest(scene, ROOTS)
+    os.remove(scene)
+    assert is_stale(manifest, scene)
+
+
+def test_main(scene, capsys):
+    assert main([scene]) == 2
+    write_manifest(scene, ROOTS)
+    assert main([scene]) == 0
+    assert [root["uuid"] for root in json.loads(capsys.readouterr().out)] == ["UUID-1", "UUID-2"]
+    touch(scene, 10)
+    assert main([scene]) == 2
+    assert main([scene, "--verify"]) == 0
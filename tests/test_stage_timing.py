@@ -0,0 +1,109 @@
+import json
+
+import pytest
+
+from br2.update_assets import stage_timing
+from br2.update_assets.stage_timing import (HISTOGRAM_BOUNDS, TIMINGS_ENV_VAR, TOTAL_STAGE, Histogram, OperationTimer,
+                                            TimingSession, get_timing_session, write_timings)
+
+
+@pytest.fixture(autouse=True)
+def session(monkeypatch):
+    monkeypatch.setattr(stage_timing, "_SESSION", None)
+    return get_timing_session()
+
+
+def test_write_timings_is_off_by_default(monkeypatch, tmp_path):
+    monkeypatch.delenv(TIMINGS_ENV_VAR, raising=False)
+    OperationTimer("swap_version").finish()
+    assert write_timings() is None
+
+
+def test_write_timings_to_env_path(monkeypatch, tmp_path):
+    path = str(tmp_path / "timings.json")
+    monkeypatch.setenv(TIMINGS_ENV_VAR, path)
+    assert write_timings() is None
+    OperationTimer("swap_version").finish()
+    assert write_timings() == path
+    with open(path) as stream:
+        assert len(json.load(stream)["records"]) == 1
+
+
+def test_histogram_buckets():
+    histogram = Histogram()
+    for seconds in (0.0005, 0.001, 0.0015, 1000.0):
+        histogram.add(seconds)
+    assert histogram.counts[0] == 2
+    assert histogram.counts[1] == 1
+    assert histogram.counts[len(HISTOGRAM_BOUNDS)] == 1
+    assert histogram.count == 4
+    assert (histogram.min, histogram.max) == (0.0005, 1000.0)
+
+
+def test_histogram_percentiles():
+    histogram = Histogram()
+    assert histogram.percentile(50) is None
+    for _ in range(19):
+        histogram.add(0.01)
+    histogram.add(0.5)
+    assert histogram.percentile(50) == 0.016
+    assert histogram.percentile(95) == 0.016
+    assert histogram.percentile(100) == 0.5
+
+    data = histogram.as_dict()
+    assert data["count"] == 20
+    assert data["mean"] == pytest.approx((19 * 0.01 + 0.5) / 20)
+    assert sum(data["counts"]) == 20
+
+
+def test_histogram_percentile_is_at_most_max():
+    histogram = Histogram()
+    histogram.add(0.003)
+    assert histogram.percentile(50) == 0.003
+
+
+def test_timer_records_stages(session, tmp_path):
+    path = tmp_path / "Stadium_V027.ma"
+    path.write_bytes(b"x" * 1000)
+    timer = OperationTimer("swap_version", dpack_id=1)
+    timer.tag_file(str(path))
+    with timer.stage("reference"):
+        pass
+    with timer.stage("reparent"):
+        pass
+    with timer.stage("reparent"):
+        pass
+    record = timer.finish()
+    assert record["tags"]["file_size"] == 1000
+    assert record["tags"]["file_type"] == ".ma"
+    assert set(record["stages"]) == {"reference", "reparent"}
+    assert record["seconds"] == pytest.approx(sum(record["stages"].values()))
+    assert record["bytes_per_second"] > 0
+    assert record["error"] is None
+    assert list(session.records) == [record]
+
+
+def test_timer_records_failed_stage(session):
+    timer = OperationTimer("swap_version")
+    with pytest.raises(RuntimeError):
+        with timer.stage("reference"):
+            raise RuntimeError("file not found")
+    record = timer.finish()
+    assert record["error"] == "reference: file not found"
+    assert "reference" in record["stages"]
+
+
+def test_session_histograms():
+    session = TimingSession(max_records=2)
+    for seconds in (0.01, 0.02, 0.04):
+        session.add({"operation": "swap_version", "stages": {"reference": seconds, "unload": 0.001},
+                     "seconds": seconds + 0.001})
+    assert len(session.records) == 2
+    assert session.histograms[("swap_version", "reference")].count == 3
+    assert session.histograms[("swap_version", TOTAL_STAGE)].count == 3
+
+    data = session.as_dict()
+    assert set(data["histograms"]["swap_version"]) == {"reference", "unload", TOTAL_STAGE}
+    lines = session.summary().splitlines()
+    assert len(lines) == 4
+    assert lines[1].split()[:3] == ["swap_version", "reference", "3"]
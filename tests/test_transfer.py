@@ -0,0 +1,86 @@
+import json
+import os
+
+import pytest
+
+from br2.check_in.content_hash import checksum_file
+from br2.check_in.transfer import transfer_file, transfer_files
+
+
+CHUNK_SIZE = 16
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "staging" / "Stadium_V027.ma"
+    path.parent.mkdir()
+    path.write_bytes(bytes(range(256)) * 4)
+    return str(path)
+
+
+def interrupt(source, destination, copied, data=None):
+    """Leaves the part and state files of a copy interrupted after some bytes."""
+    with open(source, "rb") as stream:
+        head = stream.read(copied)
+    with open(destination + ".part", "wb") as stream:
+        stream.write(head if data is None else data)
+    with open(destination + ".part.json", "w") as stream:
+        json.dump({"source_checksum": checksum_file(source), "size": os.path.getsize(source)}, stream)
+
+
+def read(path):
+    with open(path, "rb") as stream:
+        return stream.read()
+
+
+def test_copy(source, tmp_path):
+    destination = str(tmp_path / "storage" / "Stadium_V027.ma")
+    result = transfer_file(source, destination, chunk_size=CHUNK_SIZE)
+    assert read(destination) == read(source)
+    assert result.size == 1024
+    assert result.resumed_bytes == 0
+    assert result.checksum == checksum_file(source)
+    assert not os.path.exists(destination + ".part")
+    assert not os.path.exists(destination + ".part.json")
+
+
+def test_resume(source, tmp_path):
+    destination = str(tmp_path / "Stadium_V027.ma")
+    interrupt(source, destination, 300)
+    result = transfer_file(source, destination, chunk_size=CHUNK_SIZE)
+    assert result.resumed_bytes == 300
+    assert read(destination) == read(source)
+
+
+def test_restart_for_other_source(source, tmp_path):
+    destination = str(tmp_path / "Stadium_V027.ma")
+    interrupt(source, destination, 300)
+    with open(source, "ab") as stream:
+        stream.write(b"changed")
+    result = transfer_file(source, destination, chunk_size=CHUNK_SIZE)
+    assert result.resumed_bytes == 0
+    assert read(destination) == read(source)
+
+
+def test_verify_failure(source, tmp_path):
+    destination = str(tmp_path / "Stadium_V027.ma")
+    interrupt(source, destination, 300, data=b"\0" * 300)
+    with pytest.raises(RuntimeError, match="does not match the source"):
+        transfer_file(source, destination, chunk_size=CHUNK_SIZE)
+    assert not os.path.exists(destination)
+    assert not os.path.exists(destination + ".part")
+
+    # The next copy starts over.
+    assert transfer_file(source, destination, chunk_size=CHUNK_SIZE).resumed_bytes == 0
+    assert read(destination) == read(source)
+
+
+def test_transfer_files(source, tmp_path):
+    copied = str(tmp_path / "a.ma")
+    missing = str(tmp_path / "b.ma")
+    results = {destination: (result, error) for destination, result, error in transfer_files(
+        [(source, copied), (str(tmp_path / "missing.ma"), missing)], chunk_size=CHUNK_SIZE)}
+    assert results[copied][0].size == 1024
+    assert results[copied][1] is None
+    assert results[missing][0] is None
+    assert results[missing][1]
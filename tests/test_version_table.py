@@ -0,0 +1,101 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from br2.update_assets.test_db import AssetData, FILE_COLLECTIONS, VersionTable, parse_date, version_number
+
+
+def make_asset(dpack_id, fc_id, version_fc, **kwargs):
+    return AssetData(dpack_id, fc_id, version_fc, path_file=f"V:/asset_V{version_fc:03d}.ma", **kwargs)
+
+
+@pytest.fixture
+def table():
+    table = VersionTable()
+    for dpack_id, fc_id, version_fc in ((1, 10, 2), (2, 20, 7), (1, 11, 5), (1, 12, 3), (2, 21, 1)):
+        table.append(make_asset(dpack_id, fc_id, version_fc, user="user", status="wip"))
+    return table
+
+
+def test_from_dict_parses_catalog_fields():
+    asset = AssetData.from_dict(FILE_COLLECTIONS[0])
+    assert asset.dpack_id == 16938
+    assert asset.fc_id == 91754
+    assert asset.version_fc == 26
+    assert asset.date_created == datetime(2021, 5, 7, 23, 6, 4, tzinfo=timezone.utc)
+    assert asset.user == "Brian Freisinger"
+    assert asset.status == "wip"
+    assert asset.project == "Bleacher Report"
+    assert asset.content_hash == ""
+
+
+def test_from_dict_missing_fields():
+    asset = AssetData.from_dict({"id_dpack": 1, "id_fc": 2, "version_fc": "abc"})
+    assert asset.version_fc is None
+    assert asset.date_created is None
+    assert asset.path_file == ""
+    assert asset.user == ""
+
+
+def test_repeated_strings_are_interned():
+    first = AssetData.from_dict(FILE_COLLECTIONS[0])
+    second = AssetData.from_dict(dict(FILE_COLLECTIONS[1], user="".join(["Brian ", "Freisinger"])))
+    assert first.user is second.user
+
+
+def test_table_round_trip():
+    table = VersionTable.from_dicts(FILE_COLLECTIONS)
+    assert len(table) == len(FILE_COLLECTIONS)
+    for row, asset_dict in zip(table, FILE_COLLECTIONS):
+        asset = AssetData.from_dict(asset_dict)
+        for field in AssetData.__slots__:
+            assert getattr(row, field) == getattr(asset, field), field
+
+
+def test_getitem_without_date(table):
+    assert table[0].date_created is None
+    assert table[0].path_file == "V:/asset_V002.ma"
+    assert (table[0].dpack_id, table[0].fc_id, table[0].version_fc) == (1, 10, 2)
+
+
+def test_latest(table):
+    assert table.latest().fc_id == 20
+    assert VersionTable().latest() is None
+
+
+def test_select(table):
+    selected = table.select(1)
+    assert [asset.fc_id for asset in selected] == [10, 11, 12]
+    assert selected.latest().version_fc == 5
+    assert len(table.select(3)) == 0
+
+
+def test_select_appended_rows(table):
+    table.append(make_asset(1, 13, 6))
+    assert [asset.fc_id for asset in table.select(1)] == [10, 11, 12, 13]
+    assert table.select(1).latest().fc_id == 13
+
+
+def test_sorted(table):
+    assert [asset.version_fc for asset in table.sorted()] == [1, 2, 3, 5, 7]
+    assert [asset.version_fc for asset in table.select(1).sorted(reverse=True)] == [5, 3, 2]
+
+
+def test_records_compare_by_version():
+    first = make_asset(1, 10, 2)
+    assert first == make_asset(1, 10, 2, user="other")
+    assert hash(first) == hash(make_asset(1, 10, 2))
+    assert first != make_asset(1, 11, 2)
+    expected = [first, make_asset(1, 2, 3), make_asset(2, 1, 1)]
+    assert sorted([make_asset(2, 1, 1), make_asset(1, 2, 3), first]) == expected
+
+
+@pytest.mark.parametrize("value, expected", [("26", 26), (27, 27), ("V026", None), (None, None)])
+def test_version_number(value, expected):
+    assert version_number(value) == expected
+
+
+def test_parse_date():
+    assert parse_date("2021-07-06 22:27:40+00:00") == datetime(2021, 7, 6, 22, 27, 40, tzinfo=timezone.utc)
+    assert parse_date("") is None
+    assert parse_date(None) is None
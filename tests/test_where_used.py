@@ -0,0 +1,79 @@
+import os
+import pathlib
+
+import pytest
+
+from br2.dv_root_node.where_used import Usage, WhereUsedIndex
+
+
+def write_scene(path, roots):
+    """Writes a Maya ASCII scene of roots, given as (name, parent, dpack_id, fc_id, file_name) tuples."""
+    lines = ["//Maya ASCII 2022 scene", 'requires maya "2022";']
+    for name, parent, dpack_id, fc_id, file_name in roots:
+        lines.append(f'createNode br2DvRootNode -n "{name}"' + (f' -p "{parent}";' if parent else ";"))
+        lines.append(f'\tsetAttr ".asset_name" -type "string" "{name}";')
+        lines.append(f'\tsetAttr -l on ".dpack_id" {dpack_id};')
+        lines.append(f'\tsetAttr -l on ".fc_id" {fc_id};')
+        lines.append(f'\tsetAttr ".file_name" -type "string" "{file_name}";')
+        lines.append('\tsetAttr ".version" -type "string" "1";')
+    path.write_text("\n".join(lines) + "\n")
+    return str(path)
+
+
+@pytest.fixture
+def scenes(tmp_path):
+    shots = tmp_path / "shots"
+    shots.mkdir()
+    return {
+        "a": write_scene(shots / "a.ma", [("Stadium", None, 1, 10, "Stadium_V001.ma"),
+                                          ("Seat", "Stadium", 2, 20, "Seat_V001.ma")]),
+        "b": write_scene(shots / "b.ma", [("Seat", None, 2, 21, "Seat_V002.ma")]),
+        "dir": str(shots),
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    with WhereUsedIndex(str(tmp_path / "index.db")) as index:
+        yield index
+
+
+def test_queries(index, scenes):
+    assert index.update([scenes["dir"]], workers=1) == {"scanned": 2, "unchanged": 0, "removed": 0, "failed": 0}
+    assert index.scenes_using_fc(20) == [Usage(scenes["a"], "|Stadium|Seat", "|Stadium", "Seat", 2, 20, "1")]
+    assert [u.scene for u in index.scenes_using_dpack(2)] == [scenes["a"], scenes["b"]]
+    assert [u.dag_path for u in index.scenes_using_file("V:/Asset/seat_v002.MA")] == ["|Seat"]
+    assert index.scenes_using_fc(99) == []
+
+
+def test_update_reads_changed_scenes_only(index, scenes):
+    index.update([scenes["dir"]], workers=1)
+    assert index.update([scenes["dir"]], workers=1) == {"scanned": 0, "unchanged": 2, "removed": 0, "failed": 0}
+
+    stat = os.stat(scenes["b"])
+    write_scene(pathlib.Path(scenes["b"]), [("Seat", None, 2, 22, "Seat_V003.ma")])
+    os.utime(scenes["b"], (stat.st_atime, stat.st_mtime + 10))
+    assert index.update([scenes["dir"]], workers=1) == {"scanned": 1, "unchanged": 1, "removed": 0, "failed": 0}
+    assert index.scenes_using_fc(21) == []
+    assert [u.scene for u in index.scenes_using_fc(22)] == [scenes["b"]]
+
+
+def test_update_removes_deleted_scenes(index, scenes):
+    index.update([scenes["dir"]], workers=1)
+    os.remove(scenes["b"])
+    assert index.update([scenes["dir"]], workers=1) == {"scanned": 0, "unchanged": 1, "removed": 1, "failed": 0}
+    assert [u.scene for u in index.scenes_using_dpack(2)] == [scenes["a"]]
+
+
+def test_update_of_a_file_keeps_other_scenes(index, scenes):
+    index.update([scenes["dir"]], workers=1)
+    assert index.update([scenes["a"]], workers=1)["removed"] == 0
+    assert len(index.scenes_using_dpack(2)) == 2
+
+
+def test_index_persists(tmp_path, scenes):
+    path = str(tmp_path / "index.db")
+    with WhereUsedIndex(path) as index:
+        index.update([scenes["dir"]], workers=1)
+    with WhereUsedIndex(path) as index:
+        assert len(index.scenes_using_dpack(2)) == 2
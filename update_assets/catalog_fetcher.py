@@ -0,0 +1,145 @@
+import logging
+
+from PySide2.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from br2.update_assets.test_db import get_versions_data
+
+
+LOGGER = logging.getLogger(__name__)
+MAX_FETCH_THREADS = 4
+
+
+class CatalogFetcher(QObject):
+    """Fetches version data from the catalog on a thread pool.
+    Requests are de-duplicated per Deliverable Package, so any number of roots sharing a
+    dpack_id trigger a single fetch. Results are delivered through Qt signals, which are
+    queued back to the thread the fetcher lives in (the Qt main thread). Each fetch is tagged
+    with the generation it was started in, and cancelling starts a new generation, so results
+    of cancelled fetches are dropped even if they were already queued.
+    """
+
+    # signals
+    versions_fetched = Signal(object, object)
+    fetch_failed = Signal(object, str)
+    # dpack_id, versions, error and generation of a fetch, emitted from the worker threads.
+    _fetch_done = Signal(object, object, object, object)
+
+    def __init__(self, parent=None, max_threads=MAX_FETCH_THREADS):
+        """Initializer.
+
+        Args:
+            parent (PySide2.QtCore.QObject): Parent object.
+            max_threads (int): Maximum number of concurrent catalog requests.
+        """
+        super(CatalogFetcher, self).__init__(parent)
+
+        self._generation = 0
+        self._pending = set()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._fetch_done.connect(self._deliver)
+
+    def cancel(self):
+        """Cancels all fetches that have not yet delivered their results.
+        Queued fetches are discarded, and the results of fetches already running or already
+        sent are dropped.
+        """
+        self._generation += 1
+        self._pool.clear()
+        self._pending.clear()
+
+    def fetch(self, dpack_id):
+        """Requests the version data of a Deliverable Package.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+        """
+        if dpack_id in self._pending:
+            return
+        self._pending.add(dpack_id)
+        self._pool.start(_FetchTask(dpack_id, self, self._generation))
+
+    def is_cancelled(self, generation):
+        """Whether the fetches of a generation were cancelled. Called from the worker threads.
+
+        Args:
+            generation (int): Generation the fetch was started in.
+        Returns:
+            bool: True if the fetcher was cancelled since.
+        """
+        return generation != self._generation
+
+    def is_pending(self, dpack_id):
+        """Whether a fetch for the Deliverable Package is in flight.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+        Returns:
+            bool: True if the fetch has not delivered its results yet.
+        """
+        return dpack_id in self._pending
+
+    def _deliver(self, dpack_id, versions, error, generation):
+        """Emits the result of a fetch, on the thread the fetcher lives in. Results of fetches
+        cancelled since they were sent are dropped.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+            versions (object): Fetched version data, None on failure.
+            error (str): Error message, None on success.
+            generation (int): Generation the fetch was started in.
+        """
+        if self.is_cancelled(generation) or dpack_id not in self._pending:
+            return
+        if error is None:
+            self.versions_fetched.emit(dpack_id, versions)
+        else:
+            self.fetch_failed.emit(dpack_id, error)
+
+    def wait(self, msecs=-1):
+        """Blocks until all running fetches are done.
+
+        Args:
+            msecs (int): Timeout in milliseconds. Defaults to no timeout.
+        Returns:
+            bool: True if all fetches finished.
+        """
+        return self._pool.waitForDone(msecs)
+
+    def finish(self, dpack_id):
+        """Marks the fetch of a Deliverable Package as handled. Called by the receiver.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+        """
+        self._pending.discard(dpack_id)
+
+
+class _FetchTask(QRunnable):
+    """Thread pool task fetching the version data of a single Deliverable Package."""
+
+    def __init__(self, dpack_id, fetcher, generation):
+        """Initializer.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+            fetcher (CatalogFetcher): Fetcher delivering the result.
+            generation (int): Generation of the fetcher the fetch is started in.
+        """
+        super(_FetchTask, self).__init__()
+        self.dpack_id = dpack_id
+        self.fetcher = fetcher
+        self.generation = generation
+
+    def run(self):
+        """Fetches the version data."""
+        if self.fetcher.is_cancelled(self.generation):
+            return
+        try:
+            versions = get_versions_data(self.dpack_id)
+        except Exception as e:
+            LOGGER.exception("Failed to fetch versions of dpack %s", self.dpack_id)
+            self.fetcher._fetch_done.emit(self.dpack_id, None, str(e), self.generation)
+            return
+        if not self.fetcher.is_cancelled(self.generation):
+            self.fetcher._fetch_done.emit(self.dpack_id, versions, None, self.generation)
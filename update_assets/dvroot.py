@@ -0,0 +1,457 @@
+"""Headless batch operations on the DvRoots of many scene files.
+
+Each scene is handled in its own task, by a bounded pool of worker processes, and a worker
+crashing only fails the scene it was running. list and query read roots without modifying
+scenes: Maya ASCII files are read without maya by ma_reader, see
+br2.update_assets.staleness_report. swap and update open each scene in maya.standalone, swap
+the versions of the matching roots with swap_version and save the scene, in place or to an
+output directory. Scenes in which any swap failed are not saved. convert turns the roots of
+each scene into extension roots, or back into DvRootNodes, see br2.dv_root_node.convert_roots.
+A JSON summary with per-scene timings is written to stdout or to the output file.
+
+Usage:
+    mayapy -m br2.update_assets.dvroot list <scene|dir> [...] [-w WORKERS]
+    mayapy -m br2.update_assets.dvroot query <scene|dir> [...] [--dpack-id ID] [--fc-id ID] [--asset-name PATTERN]
+        [--outdated]
+    mayapy -m br2.update_assets.dvroot swap <scene|dir> [...] --dpack-id ID --version VERSION [--output-dir DIR]
+        [--dry-run]
+    mayapy -m br2.update_assets.dvroot update <scene|dir> [...] [--dpack-id ID] [--output-dir DIR] [--dry-run]
+    mayapy -m br2.update_assets.dvroot convert <scene|dir> [...] [--to {extension,native}] [--output-dir DIR]
+        [--dry-run]
+"""
+
+
+import argparse
+import fnmatch
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+maya_path = r"C:\Users\john.russell\Code\git_stuff\dreamview-studios-inc\DreamViewStudios\application\maya"
+if maya_path not in sys.path:
+    sys.path.append(maya_path)
+from br2.dv_root_node.ma_reader import iter_scene_files
+from br2.update_assets.staleness_report import StalenessChecker, read_scene_roots
+from br2.update_assets.test_db import get_versions_data, version_number
+
+
+LOGGER = logging.getLogger(__name__)
+READ_COMMANDS = ("list", "query")
+SWAP_COMMANDS = ("swap", "update")
+CONVERT_TARGETS = ("extension", "native")
+_MAYA_INITIALIZED = False
+_CHECKER = None
+
+
+def run_scene(command, scene, options):
+    """Runs a command on a scene. Runs in a worker process.
+
+    Args:
+        command (str): Command, one of READ_COMMANDS or SWAP_COMMANDS, or "convert".
+        scene (str): Scene file path.
+        options (dict): Root filters and command options, see main.
+    Returns:
+        dict: Scene result with scene, roots, saved_to, timings, seconds and error keys. roots holds the
+            listed roots, or the swapped or converted roots.
+    """
+    start = time.perf_counter()
+    result = {"scene": scene, "roots": [], "saved_to": None, "timings": {}, "seconds": None, "error": None}
+    try:
+        if command in READ_COMMANDS:
+            read_start = time.perf_counter()
+            roots = read_scene_roots(scene)
+            result["timings"]["read"] = round(time.perf_counter() - read_start, 3)
+            result["roots"] = [root for root in roots if _matches(root, options)]
+        elif command == "convert":
+            convert_scene(scene, options, result)
+        else:
+            swap_scene(command, scene, options, result)
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = round(time.perf_counter() - start, 3)
+    return result
+
+
+def convert_scene(scene, options, result):
+    """Opens a scene in maya, converts its matching roots to options["to"] roots and saves it.
+
+    Args:
+        scene (str): Scene file path.
+        options (dict): Root filters and command options, see main.
+        result (dict): Scene result to fill in, see run_scene.
+    """
+    _init_maya()
+    import maya.cmds as cmds
+    from br2.dv_root_node.convert_roots import convert_root
+    from br2.dv_root_node.node_handler import MayaRootHandler, ls_root_nodes
+
+    _open_scene(scene, result)
+    stage_start = time.perf_counter()
+    extension = options["to"] == "extension"
+    nodes = ls_root_nodes()
+    # ls without objects lists every node of the scene.
+    uuids = (cmds.ls(nodes, uuid=True) or []) if nodes else []
+    for uuid in uuids:
+        root = MayaRootHandler(cmds.ls(uuid, long=True)[0])
+        data = {
+            "node": root.dag_path,
+            "uuid": uuid,
+            "asset_name": root.asset_name,
+            "dpack_id": root.dpack_id,
+            "fc_id": root.fc_id,
+            "version": root.version,
+        }
+        if root.is_extension == extension or not _matches(data, options):
+            continue
+        if cmds.referenceQuery(data["node"], isNodeReferenced=True):
+            continue
+        convert_root(data["node"], extension)
+        result["roots"].append(dict(data, to=options["to"]))
+    result["timings"]["convert"] = round(time.perf_counter() - stage_start, 3)
+    _save_scene(scene, options, result)
+
+
+def swap_scene(command, scene, options, result):
+    """Opens a scene in maya, swaps the versions of its matching roots and saves it.
+    Roots are handled parents first, and roots removed by the swap of their parent are skipped.
+
+    Args:
+        command (str): "swap" to swap to options["version"], "update" to swap outdated roots to their latest version.
+        scene (str): Scene file path.
+        options (dict): Root filters and command options, see main.
+        result (dict): Scene result to fill in, see run_scene.
+    """
+    _init_maya()
+    import maya.cmds as cmds
+    from br2.dv_root_node.node_handler import MayaRootHandler, ls_root_nodes
+    from br2.update_assets.test_version_swap import swap_version
+
+    timings = result["timings"]
+    _open_scene(scene, result)
+    stage_start = time.perf_counter()
+    roots = [MayaRootHandler(node) for node in ls_root_nodes()]
+    roots.sort(key=lambda r: r.dag_path.count("|"))
+    for root in roots:
+        if not cmds.ls(root.uuid):
+            continue
+        data = {
+            "node": root.dag_path,
+            "uuid": root.uuid,
+            "asset_name": root.asset_name,
+            "dpack_id": root.dpack_id,
+            "fc_id": root.fc_id,
+            "version": root.version,
+        }
+        if not _matches(data, options):
+            continue
+        target = get_target_version(command, data, options)
+        if target is None:
+            continue
+        swap_start = time.perf_counter()
+        skipped = False
+        try:
+            skipped = not swap_version(data["node"], target)
+            error = None
+        except Exception as e:
+            LOGGER.exception('Unable to swap "%s" in "%s"', data["node"], scene)
+            error = str(e)
+        result["roots"].append(dict(data, to_version=target.version_fc, to_fc_id=target.fc_id, skipped=skipped,
+                                    seconds=round(time.perf_counter() - swap_start, 3), error=error))
+    timings["swap"] = round(time.perf_counter() - stage_start, 3)
+
+    failed = [root for root in result["roots"] if root["error"]]
+    if failed:
+        raise RuntimeError(f"{len(failed)} swap(s) failed, scene not saved.")
+    _save_scene(scene, options, result)
+
+
+def get_target_version(command, root, options):
+    """The version a root is swapped to.
+
+    Args:
+        command (str): "swap" or "update".
+        root (dict): Root data with dpack_id and version keys.
+        options (dict): Command options, with the version to swap to for "swap".
+    Returns:
+        AssetData|None: Version, None if the root already holds it or the catalog has no such version.
+    """
+    version = version_number(root["version"])
+    if command == "update":
+        latest = _get_checker().latest(root["dpack_id"])
+        if latest is None or (version is not None and version >= latest.version_fc):
+            return None
+        return latest
+    if version == options["version"]:
+        return None
+    for asset in get_versions_data(root["dpack_id"]):
+        if asset.version_fc == options["version"]:
+            return asset
+    LOGGER.warning("Version %s of dpack %s not found in the catalog", options["version"], root["dpack_id"])
+    return None
+
+
+def run(command, scenes, options, workers=None):
+    """Runs a command on scene files in parallel.
+
+    Args:
+        command (str): Command, one of READ_COMMANDS or SWAP_COMMANDS, or "convert".
+        scenes (list[str]): Scene file paths.
+        options (dict): Root filters and command options, see main.
+        workers (int|None): Number of worker processes. Defaults to the number of CPUs.
+    Returns:
+        dict: Summary with command, scenes and summary keys.
+    """
+    start = time.perf_counter()
+    results = []
+    for result in _iter_results(command, scenes, options, workers or os.cpu_count() or 1):
+        if result["error"] is not None:
+            LOGGER.error('%s failed on "%s": %s', command, result["scene"], result["error"])
+        else:
+            LOGGER.info('%s "%s": %d root(s) in %.3fs', command, result["scene"], len(result["roots"]),
+                        result["seconds"])
+        results.append(result)
+    results.sort(key=lambda r: r["scene"])
+
+    return {
+        "command": command,
+        "scenes": results,
+        "summary": {
+            "scenes": len(results),
+            "roots": sum(len(r["roots"]) for r in results),
+            "saved": sum(1 for r in results if r["saved_to"]),
+            "errors": sum(1 for r in results if r["error"] is not None),
+            "seconds": round(time.perf_counter() - start, 3),
+        },
+    }
+
+
+def _iter_results(command, scenes, options, workers):
+    """Runs a command on scene files in a pool of worker processes. Scenes are handed to the pool as workers
+    free up. If a worker process dies, maya crashing rather than a command raising, the pool is replaced and
+    the scenes it was running are retried in worker processes of their own, so only the scene crashing maya
+    fails. Retries count against the number of workers, no more scenes run at once after a crash.
+
+    Args:
+        command (str): Command, see run.
+        scenes (list[str]): Scene file paths.
+        options (dict): Root filters and command options, see main.
+        workers (int): Number of worker processes.
+    Yields:
+        dict: Scene results, see run_scene, in order of completion.
+    """
+    queued = deque(scenes)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = {}
+    isolated = {}
+    try:
+        while queued or pending:
+            while queued and len(pending) < workers:
+                scene = queued.popleft()
+                pending[executor.submit(run_scene, command, scene, options)] = scene
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future not in pending:
+                    # Retried after its pool crashed.
+                    continue
+                scene = pending.pop(future)
+                pool = isolated.pop(future, None)
+                if pool is not None:
+                    pool.shutdown(wait=False)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    if pool is not None:
+                        yield _failed_result(scene, f"Worker process died: {e}")
+                        continue
+                    crashed = [f for f in pending if f not in isolated and _crashed(f)]
+                    retries = [scene] + [pending.pop(f) for f in crashed]
+                    LOGGER.warning("A worker process died, retrying %d scene(s) alone", len(retries))
+                    executor.shutdown(wait=False)
+                    executor = ProcessPoolExecutor(max_workers=workers)
+                    for retry in retries:
+                        pool = ProcessPoolExecutor(max_workers=1)
+                        retry_future = pool.submit(run_scene, command, retry, options)
+                        pending[retry_future] = retry
+                        isolated[retry_future] = pool
+                    continue
+                except Exception as e:
+                    # The scene result could not be sent back, the other scenes go on.
+                    result = _failed_result(scene, str(e))
+                yield result
+    finally:
+        executor.shutdown()
+        for pool in isolated.values():
+            pool.shutdown()
+
+
+def _crashed(future):
+    """Whether a scene task did not complete because its worker pool crashed.
+
+    Args:
+        future (concurrent.futures.Future): Scene task.
+    Returns:
+        bool: True if the task is not done yet or failed with BrokenProcessPool.
+    """
+    return not future.done() or isinstance(future.exception(), BrokenProcessPool)
+
+
+def _failed_result(scene, error):
+    """The result of a scene whose worker failed.
+
+    Args:
+        scene (str): Scene file path.
+        error (str): Error message.
+    Returns:
+        dict: Scene result, see run_scene.
+    """
+    return {"scene": scene, "roots": [], "saved_to": None, "timings": {}, "seconds": None, "error": error}
+
+
+def _get_checker():
+    """The staleness checker of the calling worker process, caching the latest versions.
+
+    Returns:
+        StalenessChecker: Checker.
+    """
+    global _CHECKER
+    if _CHECKER is None:
+        _CHECKER = StalenessChecker()
+    return _CHECKER
+
+
+def _init_maya():
+    """Initializes maya and loads the root plug-in in a worker process, the first time a scene is opened."""
+    global _MAYA_INITIALIZED
+    if _MAYA_INITIALIZED:
+        return
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    from br2.dv_root_node.node_handler import load_root_plugin
+    load_root_plugin()
+    _MAYA_INITIALIZED = True
+
+
+def _open_scene(scene, result):
+    """Opens a scene in maya, timing it.
+
+    Args:
+        scene (str): Scene file path.
+        result (dict): Scene result, see run_scene.
+    """
+    import maya.cmds as cmds
+    start = time.perf_counter()
+    cmds.file(scene, open=True, force=True)
+    result["timings"]["open"] = round(time.perf_counter() - start, 3)
+
+
+def _save_scene(scene, options, result):
+    """Saves the open scene in place, or to options["output_dir"], unless no root changed or options["dry_run"].
+
+    Args:
+        scene (str): Scene file path.
+        options (dict): Command options, see main.
+        result (dict): Scene result, see run_scene.
+    """
+    if not result["roots"] or options.get("dry_run"):
+        return
+    import maya.cmds as cmds
+    start = time.perf_counter()
+    path = scene
+    if options.get("output_dir"):
+        path = os.path.join(options["output_dir"], os.path.basename(scene))
+        cmds.file(rename=path)
+    cmds.file(save=True, force=True)
+    result["timings"]["save"] = round(time.perf_counter() - start, 3)
+    result["saved_to"] = path
+
+
+def _matches(root, options):
+    """Whether a root passes the root filters.
+
+    Args:
+        root (dict): Root data with asset_name, dpack_id, fc_id and version keys.
+        options (dict): Filters: dpack_id, fc_id, asset_name (glob pattern) and outdated.
+    Returns:
+        bool: True if the root matches every filter given.
+    """
+    if options.get("dpack_id") is not None and root["dpack_id"] != options["dpack_id"]:
+        return False
+    if options.get("fc_id") is not None and root["fc_id"] != options["fc_id"]:
+        return False
+    if options.get("asset_name") and not fnmatch.fnmatchcase(root["asset_name"], options["asset_name"]):
+        return False
+    if options.get("outdated"):
+        return bool(_get_checker().outdated_roots([root]))
+    return True
+
+
+def main(argv=None):
+    """Command line entry point.
+
+    Args:
+        argv (list[str]|None): Arguments. Defaults to sys.argv.
+    Returns:
+        int: Exit code, 1 if any scene failed.
+    """
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("paths", nargs="+", help="Scene files or directories of scene files.")
+    common.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes.")
+    common.add_argument("-o", "--output", help="Summary file. Defaults to stdout.")
+    common.add_argument("--dpack-id", type=int, help="Only roots of this Deliverable Package.")
+    swap_options = argparse.ArgumentParser(add_help=False)
+    swap_options.add_argument("--output-dir", help="Save modified scenes here instead of in place.")
+    swap_options.add_argument("--dry-run", action="store_true", help="Swap without saving.")
+
+    parser = argparse.ArgumentParser(prog="dvroot", description="Batch operations on the DvRoots of scene files.")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("list", parents=[common], help="List the roots of scenes.")
+    query_parser = commands.add_parser("query", parents=[common], help="List the roots matching filters.")
+    query_parser.add_argument("--fc-id", type=int, help="Only roots of this File Collection.")
+    query_parser.add_argument("--asset-name", help="Only roots whose asset name matches this glob pattern.")
+    query_parser.add_argument("--outdated", action="store_true", help="Only roots behind the latest version.")
+    swap_parser = commands.add_parser("swap", parents=[common, swap_options],
+                                      help="Swap the roots of a Deliverable Package to a version.")
+    swap_parser.add_argument("--version", type=int, required=True, help="Version to swap to.")
+    commands.add_parser("update", parents=[common, swap_options], help="Swap outdated roots to their latest version.")
+    convert_parser = commands.add_parser("convert", parents=[common, swap_options],
+                                         help="Convert roots to extension roots or to DvRootNodes.")
+    convert_parser.add_argument("--to", choices=CONVERT_TARGETS, default=CONVERT_TARGETS[0], help="Root kind.")
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.error("a command is required")
+    if args.command == "swap" and args.dpack_id is None:
+        parser.error("swap requires --dpack-id")
+
+    logging.basicConfig(level=logging.INFO, stream=sys.stderr)
+    options = {
+        "dpack_id": args.dpack_id,
+        "fc_id": getattr(args, "fc_id", None),
+        "asset_name": getattr(args, "asset_name", None),
+        "outdated": getattr(args, "outdated", False),
+        "version": getattr(args, "version", None),
+        "output_dir": getattr(args, "output_dir", None),
+        "dry_run": getattr(args, "dry_run", False),
+        "to": getattr(args, "to", None),
+    }
+    if options["output_dir"] and not os.path.isdir(options["output_dir"]):
+        os.makedirs(options["output_dir"])
+    scenes = list(iter_scene_files(args.paths))
+    LOGGER.info("Running %s on %d scene(s)", args.command, len(scenes))
+    summary = run(args.command, scenes, options, workers=args.workers)
+
+    if args.output:
+        with open(args.output, "w") as stream:
+            json.dump(summary, stream, indent=2)
+    else:
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    return 1 if summary["summary"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
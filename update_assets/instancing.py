@@ -0,0 +1,145 @@
+"""Instanced loading of roots that hold the same File Collection.
+
+Crowd and set dressing scenes place the same File Collection under many roots. Loaded with
+instancing, the first root of a File Collection owns its reference, and every other root gets
+DAG instances of the owner's content under its own transform, so the file is read, and its
+geometry held in memory, once per unique asset rather than once per placement. Instancing is
+plain DAG instancing, so which roots share content is read from the DAG, see
+get_instance_roots, and nothing else is recorded.
+
+A version swap of any root of a group swaps the shared reference once and re-instances the
+new content under every root of the group, see
+br2.update_assets.test_version_swap.iter_swap_version_steps. Representations are
+shared the same way: switching the representation of one root of a group switches the file of
+the whole group, while bounding box display stays per root.
+
+Usage:
+    load_roots(["|Stadium|Seat_0001", "|Stadium|Seat_0002"])
+"""
+
+
+import logging
+import os
+
+from br2.dv_root_node.cmds_trace import cmds, trace_action
+from br2.dv_root_node.node_handler import MayaRootHandler, is_root_node, ls_root_nodes
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+def add_instances(owner, node):
+    """Instances the content of a root under another root.
+
+    Args:
+        owner (str): Name of the root holding the content.
+        node (str): Name of the root to instance the content under.
+    Returns:
+        list[str]: Full DAG paths of the instanced top-level nodes under node.
+    """
+    content = get_content_nodes(owner)
+    if not content:
+        return []
+    instanced = cmds.parent(content, node, addObject=True, relative=True) or []
+    return cmds.ls(instanced, long=True) or []
+
+
+def get_content_nodes(node):
+    """The top-level nodes loaded under a root: its referenced children.
+
+    Args:
+        node (str): Name of the root node.
+    Returns:
+        list[str]: Full DAG paths.
+    """
+    return [child for child in cmds.listRelatives(node, children=True, fullPath=True) or []
+            if cmds.referenceQuery(child, isNodeReferenced=True)]
+
+
+def get_content_file(node):
+    """The file the content loaded under a root is read from.
+
+    Args:
+        node (str): Name of the root node.
+    Returns:
+        str|None: Normalized file path, without copy number, None if nothing is loaded under the root.
+    """
+    content = get_content_nodes(node)
+    if not content:
+        return None
+    return os.path.normcase(os.path.normpath(cmds.referenceQuery(content[0], filename=True, withoutCopyNumber=True)))
+
+
+def get_instance_roots(node):
+    """The other roots sharing the content loaded under a root.
+
+    Args:
+        node (str): Name of the root node.
+    Returns:
+        list[str]: Full DAG paths of the roots, without the given root.
+    """
+    dag_path = cmds.ls(node, long=True)[0]
+    roots = []
+    for child in get_content_nodes(dag_path):
+        for parent in cmds.listRelatives(child, allParents=True, fullPath=True) or []:
+            if parent != dag_path and parent not in roots and is_root_node(parent):
+                roots.append(parent)
+    return roots
+
+
+@trace_action("load roots")
+def load_roots(nodes, instanced=True):
+    """Loads the File Collections of roots that have nothing loaded under them.
+    With instancing, roots holding a File Collection, in the same representation, that is
+    already loaded under another root of the scene get instances of that root's content.
+
+    Args:
+        nodes (list[str]): Names of the root nodes.
+        instanced (bool): If False reference the File Collection under every root. Defaults to True.
+    Returns:
+        dict: Number of roots referenced and instanced.
+    Raises:
+        RuntimeError: If the File Collection of a root is not in the catalog.
+    """
+    from br2.update_assets.representation import get_representation_path
+    from br2.update_assets.test_db import get_file_collection_data
+    from br2.update_assets.test_version_swap import reference_and_reparent
+
+    owners = _get_content_owners() if instanced else {}
+    counts = {"referenced": 0, "instanced": 0}
+    for node in nodes:
+        root = MayaRootHandler(node)
+        dag_path = root.dag_path
+        if get_content_nodes(dag_path):
+            continue
+        key = (root.fc_id, root.representation)
+        owner = owners.get(key)
+        if owner is not None and cmds.objExists(owner):
+            add_instances(owner, dag_path)
+            counts["instanced"] += 1
+            continue
+        asset = get_file_collection_data(root.fc_id)
+        if asset is None:
+            raise RuntimeError(f'File Collection {root.fc_id} of "{dag_path}" not found.')
+        reference_and_reparent(get_representation_path(asset.path_file, root.representation), dag_path)
+        counts["referenced"] += 1
+        if instanced:
+            owners[key] = dag_path
+    LOGGER.info("Loaded %d root(s): %d referenced, %d instanced", len(nodes), counts["referenced"],
+                counts["instanced"])
+    return counts
+
+
+def _get_content_owners():
+    """The roots of the calling maya scene that have content loaded, by File Collection and representation.
+
+    Returns:
+        dict: (fc_id, representation) tuples mapped to the full DAG path of the first root holding them.
+    """
+    owners = {}
+    for node in ls_root_nodes():
+        root = MayaRootHandler(node)
+        key = (root.fc_id, root.representation)
+        if key not in owners and get_content_nodes(node):
+            owners[key] = node
+    return owners
@@ -4,17 +4,78 @@ maya_path = r"C:\Users\john.russell\Code\git_stuff\dreamview-studios-inc\DreamVi
 if maya_path not in sys.path:
     sys.path.append(maya_path)
 
-import maya.cmds as cmds
 import maya.OpenMayaUI as apiUI
 
+from br2.dv_root_node.cmds_trace import cmds
+from br2.dv_root_node.node_handler import EXTENSION_PREFIX, ROOT_NODE_TYPE, ls_extension_roots, ls_root_nodes
+
 
 def get_all_dv_root_nodes():
-    """Returns a list of names of all DvRootNodes in the scene.
+    """Returns a list of the DAG paths of all DvRootNodes and extension roots in the scene.
+
+    Returns:
+        list[str]: List of DAG paths of all roots in the scene.
+    """
+    return ls_root_nodes()
+
+
+def get_all_dv_roots():
+    """Returns the DAG path, UUID and asset type attribute of all DvRootNodes and extension roots in the scene.
+    No root attribute is read, so the number of commands run does not depend on the number of roots.
+
+    Returns:
+        list[tuple[str, str, str]]: List of (DAG path, UUID, asset type attribute) of all roots in the scene.
+    """
+    roots = []
+    nodes = cmds.ls(type=ROOT_NODE_TYPE, long=True) or []
+    if nodes:
+        uuids = cmds.ls(type=ROOT_NODE_TYPE, uuid=True) or []
+        roots.extend((n, u, "asset_type") for n, u in zip(nodes, uuids))
+    extension_roots = ls_extension_roots()
+    if extension_roots:
+        uuids = cmds.ls(extension_roots, uuid=True) or []
+        roots.extend((n, u, f"{EXTENSION_PREFIX}asset_type") for n, u in zip(extension_roots, uuids))
+    return roots
+
+
+def get_all_dv_root_uuids():
+    """Returns a list of the UUIDs of all DvRootNodes and extension roots in the scene.
+
+    Returns:
+        list[str]: List of UUIDs of all roots in the scene.
+    """
+    nodes = ls_root_nodes()
+    if not nodes:
+        # ls without objects lists every node of the scene.
+        return []
+    return cmds.ls(nodes, uuid=True) or []
+
+
+def get_dv_root_kind(uuid, kind_attr):
+    """Returns the asset type of a root.
+
+    Args:
+        uuid (str): UUID of the root node.
+        kind_attr (str): Asset type attribute of the root, see get_all_dv_roots.
+
+    Returns:
+        str|None: Asset type, None if no node has the UUID.
+    """
+    names = cmds.ls(uuid)
+    return cmds.getAttr(f"{names[0]}.{kind_attr}") if names else None
+
+
+def get_node_name(uuid):
+    """Returns the name of the node with the given UUID.
+
+    Args:
+        uuid (str): Node UUID.
 
     Returns:
-        list[str]: List of names of all DvRootNodes in the scene.
+        str|None: Node name, None if no node has the UUID.
     """
-    return cmds.ls(type="br2DvRootNode")
+    names = cmds.ls(uuid)
+    return names[0] if names else None
 
 
 def get_main_window_ptr():
@@ -0,0 +1,259 @@
+"""Switches the representation loaded under roots: bounding box, proxy or full.
+
+The representation of a root is recorded in its representation attribute. The full
+representation is the file of the root's File Collection. The proxy representation is the
+low-res file published next to it, named like the full file plus PROXY_SUFFIX, e.g.
+"KDurant_Base_lookDev_V027_proxy.ma". The bounding box representation loads the proxy and
+draws the root, and every root under it, as bounding boxes. Roots without a proxy file fall
+back to the full file.
+
+Switching reloads the existing reference of the root with the other file, so the root's
+transform, its child roots and any other children it has are left untouched. Roots sharing
+their content through instancing share their representation file too, see
+br2.update_assets.instancing, while bounding box display stays per root. The scene-wide
+policy is saved with the scene and applied to every root by apply_policy, e.g. "selected"
+loads the full representation for selected roots only, and the proxy for the rest.
+
+Usage:
+    switch_representation("|Set|KDurant_Base_lookDev", PROXY)
+    set_policy("selected")
+    apply_policy()
+"""
+
+
+import logging
+import os
+
+from br2.dv_root_node.cmds_trace import cmds, trace_action
+from br2.dv_root_node.node_handler import MayaRootHandler, ls_root_nodes
+from br2.update_assets.stage_timing import OperationTimer
+from br2.update_assets.test_db import get_file_collection_data
+
+
+LOGGER = logging.getLogger(__name__)
+BBOX = "bbox"
+PROXY = "proxy"
+FULL = "full"
+REPRESENTATIONS = (BBOX, PROXY, FULL)
+PROXY_SUFFIX = "_proxy"
+# Representation of the selected roots, and of the other roots, by policy.
+POLICIES = {
+    "full": (FULL, FULL),
+    "proxy": (PROXY, PROXY),
+    "bbox": (BBOX, BBOX),
+    "selected": (FULL, PROXY),
+}
+DEFAULT_POLICY = "full"
+POLICY_FILE_INFO = "br2RepresentationPolicy"
+# overrideLevelOfDetail value drawing shapes as bounding boxes.
+_BOUNDING_BOX_LOD = 1
+
+
+@trace_action("apply representation policy")
+def apply_policy(policy=None):
+    """Switches every root in the calling maya scene to the representation given by a policy.
+    Roots sharing their content through instancing get the representation of the selected roots
+    if any of them is selected. The viewport is not refreshed until all roots are switched.
+
+    Args:
+        policy (str|None): Policy name, see POLICIES. Defaults to the policy of the scene.
+    Returns:
+        dict: Number of roots switched to each representation.
+    Raises:
+        ValueError: If given an unknown policy.
+    """
+    policy = policy or get_policy()
+    if policy not in POLICIES:
+        raise ValueError(f'Unknown representation policy: "{policy}"')
+    selected_representation, other_representation = POLICIES[policy]
+
+    nodes = ls_root_nodes()
+    selected = _selected_roots(nodes)
+    # Roots of an instance group share their reference, so they get a single representation.
+    groups = {}
+    for node in nodes:
+        groups.setdefault(_get_reference_node(node) or node, []).append(node)
+    switched = dict.fromkeys(REPRESENTATIONS, 0)
+    cmds.refresh(suspend=True)
+    try:
+        for group in groups.values():
+            if any(node in selected for node in group):
+                representation = selected_representation
+            else:
+                representation = other_representation
+            for node in group:
+                if switch_representation(node, representation):
+                    switched[representation] += 1
+    finally:
+        cmds.refresh(suspend=False)
+    LOGGER.info('Applied the "%s" representation policy: %s', policy,
+                ", ".join(f"{count} {name}" for name, count in switched.items()))
+    return switched
+
+
+def get_policy():
+    """The representation policy saved with the calling maya scene.
+
+    Returns:
+        str: Policy name, see POLICIES.
+    """
+    value = cmds.fileInfo(POLICY_FILE_INFO, query=True)
+    return value[0] if value and value[0] in POLICIES else DEFAULT_POLICY
+
+
+def get_proxy_path(path):
+    """The proxy file published next to a full file.
+
+    Args:
+        path (str): Full file path.
+    Returns:
+        str: Proxy file path. The file may not exist.
+    """
+    stem, ext = os.path.splitext(path)
+    return f"{stem}{PROXY_SUFFIX}{ext}"
+
+
+def get_representation_path(path, representation):
+    """The file to load for a representation of a File Collection.
+
+    Args:
+        path (str): Full file path of the File Collection.
+        representation (str): Representation, see REPRESENTATIONS.
+    Returns:
+        str: File path, the full file if the representation has no file of its own.
+    """
+    if representation in (BBOX, PROXY):
+        proxy_path = get_proxy_path(path)
+        if os.path.isfile(proxy_path):
+            return proxy_path
+    return path
+
+
+def set_policy(policy):
+    """Saves the representation policy of the calling maya scene. See apply_policy.
+
+    Args:
+        policy (str): Policy name, see POLICIES.
+    Raises:
+        ValueError: If given an unknown policy.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f'Unknown representation policy: "{policy}"')
+    cmds.fileInfo(POLICY_FILE_INFO, policy)
+
+
+def switch_representation(node, representation):
+    """Loads a representation under a root. Only the file of the root's reference changes.
+
+    Args:
+        node (str): Name of the root node.
+        representation (str): Representation, see REPRESENTATIONS.
+    Returns:
+        bool: True if the representation of the root changed.
+    Raises:
+        ValueError: If given an unknown representation.
+        RuntimeError: If the root's File Collection is not in the catalog.
+    """
+    if representation not in REPRESENTATIONS:
+        raise ValueError(f'Unknown representation: "{representation}"')
+    root = MayaRootHandler(node)
+    node = root.dag_path
+    reference_node = _get_reference_node(node)
+    if root.representation == representation and reference_node is not None:
+        return False
+
+    asset = get_file_collection_data(root.fc_id)
+    if asset is None:
+        raise RuntimeError(f'File Collection {root.fc_id} of "{node}" not found.')
+    path = get_representation_path(asset.path_file, representation)
+    timer = OperationTimer("switch_representation", dpack_id=root.dpack_id, fc_id=root.fc_id,
+                           representation=representation)
+    timer.tag_file(path)
+    try:
+        if reference_node is None:
+            from br2.update_assets.test_version_swap import reference_and_reparent
+            reference_and_reparent(path, node, timer)
+        elif not _is_loaded(reference_node, path):
+            from br2.update_assets.instancing import add_instances, get_content_nodes, get_instance_roots
+            instance_roots = get_instance_roots(node)
+            with timer.stage("file type"):
+                file_type = cmds.file(path, query=True, type=True)[0]
+            with timer.stage("reference"):
+                cmds.file(path, loadReference=reference_node, type=file_type, options="v=0")
+            with timer.stage("reparent"):
+                _reparent_reference(reference_node, node)
+                for instance_root in instance_roots:
+                    if not get_content_nodes(instance_root):
+                        add_instances(node, instance_root)
+                    MayaRootHandler(instance_root).representation = representation
+
+        with timer.stage("update root"):
+            is_bbox = representation == BBOX
+            if is_bbox:
+                cmds.setAttr(f"{node}.overrideEnabled", True)
+            cmds.setAttr(f"{node}.overrideLevelOfDetail", _BOUNDING_BOX_LOD if is_bbox else 0)
+            root.representation = representation
+    finally:
+        timer.finish()
+    return True
+
+
+def _get_reference_node(node):
+    """The reference loaded under a root.
+
+    Args:
+        node (str): Full DAG path of the root node.
+    Returns:
+        str|None: Reference node, None if nothing is loaded under the root.
+    """
+    for child in cmds.listRelatives(node, children=True, fullPath=True) or []:
+        if cmds.referenceQuery(child, isNodeReferenced=True):
+            return cmds.referenceQuery(child, referenceNode=True)
+    return None
+
+
+def _is_loaded(reference_node, path):
+    """Whether a reference has a file loaded.
+
+    Args:
+        reference_node (str): Reference node.
+        path (str): File path.
+    Returns:
+        bool: True if the reference holds the file.
+    """
+    loaded_path = cmds.referenceQuery(reference_node, filename=True, withoutCopyNumber=True)
+    return os.path.normcase(os.path.normpath(loaded_path)) == os.path.normcase(os.path.normpath(path))
+
+
+def _reparent_reference(reference_node, node):
+    """Parents the top-level transforms of a reloaded reference left under world back under the root.
+    Transforms with the same names as in the previous file are parented back by the reference edits already.
+
+    Args:
+        reference_node (str): Reference node.
+        node (str): Full DAG path of the root node.
+    """
+    for reference_top in cmds.referenceQuery(reference_node, nodes=True, dagPath=True) or []:
+        if cmds.nodeType(reference_top) == "transform" and not cmds.listRelatives(reference_top, parent=True):
+            cmds.parent(reference_top, node, relative=True)
+
+
+def _selected_roots(nodes):
+    """The roots that are selected, under a selected node, or hold selected content.
+
+    Args:
+        nodes (list[str]): Full DAG paths of the roots of the scene.
+    Returns:
+        set[str]: Full DAG paths of the selected roots.
+    """
+    roots = set(nodes)
+    selected = set()
+    for path in cmds.ls(selection=True, long=True) or []:
+        # The closest root holding the selected node, the node itself included.
+        parent = path
+        while parent and parent not in roots:
+            parent = parent.rsplit("|", 1)[0]
+        if parent:
+            selected.add(parent)
+        selected.update(node for node in nodes if node.startswith(f"{path}|"))
+    return selected
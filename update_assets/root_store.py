@@ -0,0 +1,389 @@
+import re
+import sys
+from bisect import bisect_left
+
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+class DpackVersions(object):
+    """Version data shared by all the roots of a Deliverable Package."""
+    __slots__ = ("error", "latest", "table", "texts", "width")
+
+    def __init__(self, table=None, error=None):
+        """Initializer.
+
+        Args:
+            table (VersionTable|None): Versions of the Deliverable Package. Defaults to None.
+            error (str|None): Error message if the versions could not be fetched. Defaults to None.
+        """
+        latest = table.latest() if table is not None else None
+        self.error = error
+        self.latest = latest.version_fc if latest is not None else None
+        self.table = table
+        self.texts = {}
+        self.width = None
+        for asset in table.sorted(reverse=True) if table is not None else []:
+            self.texts[asset.version_fc] = "{} | {} | {} | {}".format(
+                asset.version_fc, asset.user, asset.date_created, asset.status)
+
+    def find(self, version):
+        """The record of a version.
+
+        Args:
+            version (int): Version number.
+        Returns:
+            AssetData|None: Record, None if the version is unknown.
+        """
+        for asset in self.table or []:
+            if asset.version_fc == version:
+                return asset
+        return None
+
+
+class RootStore(object):
+    """Flat columnar store of the root records shown by the Update dialog.
+    Every field is held in its own list indexed by record id, and repeated strings are
+    interned. Searched fields are indexed by word and filter fields by value, as bitsets of
+    record ids, and every change bumps the store revision. Records are grouped by kind.
+    Group and record ids are stable for the lifetime of the store, removed records leave a
+    tombstone and empty groups are hidden. Version data is not copied into records, it is
+    shared per Deliverable Package and referenced by dpack_id. Groups can hold pending roots,
+    known by name and uuid only, whose records are read on demand. Roots whose kind is not
+    read yet are held as unsorted roots, outside of any group.
+    """
+    FIELDS = (
+        "node",
+        "uuid",
+        "asset_type",
+        "dpack_id",
+        "version",
+        "user",
+        "date_created",
+        "file_type",
+        "status",
+        "task",
+    )
+    INTERNED_FIELDS = ("asset_type", "user", "file_type", "status", "task")
+    SEARCH_FIELDS = ("node", "user", "task")
+    BITSET_FIELDS = ("asset_type", "status")
+
+    def __init__(self):
+        """Initializer."""
+        self.revision = 0
+        self.clear()
+
+    def add(self, **values):
+        """Adds a record, creating its kind group if needed.
+
+        Args:
+            **values: Field values, see FIELDS.
+        Returns:
+            int: Record id.
+        """
+        rid = len(self.node)
+        for field in self.FIELDS:
+            self.set(rid, field, values.get(field))
+
+        gid = self.show_group(self.asset_type[rid])
+        self.live_bits |= 1 << rid
+        self.record_group.append(gid)
+        self.record_row.append(len(self.group_rows[gid]))
+        self.group_rows[gid].append(rid)
+        self.rows_by_dpack.setdefault(self.dpack_id[rid], []).append(rid)
+        self.rid_by_uuid[self.uuid[rid]] = rid
+        return rid
+
+    def clear(self):
+        """Removes all records and groups."""
+        for field in self.FIELDS:
+            setattr(self, field, [])
+        self.field_bits = {field: {} for field in self.BITSET_FIELDS}
+        self.groups = []
+        self.group_ids = {}
+        self.group_order = []
+        self.group_pending = []
+        self.group_rows = []
+        self.live_bits = 0
+        self.pending_uuids = {}
+        self.record_group = []
+        self.record_row = []
+        self.rid_by_uuid = {}
+        self.rows_by_dpack = {}
+        self.tokens = {}
+        self.unsorted = []
+        self.versions = {}
+        self._sorted_tokens = None
+        self.revision += 1
+
+    def add_pending(self, kind, node, uuid):
+        """Adds a pending root to the group of a kind.
+
+        Args:
+            kind (str): Kind.
+            node (str): Name of the root node.
+            uuid (str): UUID of the root node.
+        Returns:
+            int: Group id.
+        """
+        gid = self.show_group(kind)
+        self.group_pending[gid].append((node, uuid))
+        self.pending_uuids[uuid] = gid
+        return gid
+
+    def add_unsorted(self, node, uuid, kind_attr):
+        """Adds a root whose kind is not read yet.
+
+        Args:
+            node (str): Name of the root node.
+            uuid (str): UUID of the root node.
+            kind_attr (str): Kind attribute of the root node.
+        """
+        self.unsorted.append((node, uuid, kind_attr))
+        self.pending_uuids[uuid] = None
+
+    def discard_pending(self, uuid):
+        """Removes a pending or unsorted root.
+
+        Args:
+            uuid (str): UUID of the root node.
+        Returns:
+            int|None: Group id of the root, None if the root is not pending or unsorted.
+        """
+        if uuid not in self.pending_uuids:
+            return None
+        gid = self.pending_uuids.pop(uuid)
+        if gid is None:
+            self.unsorted = [p for p in self.unsorted if p[1] != uuid]
+        else:
+            self.group_pending[gid] = [p for p in self.group_pending[gid] if p[1] != uuid]
+        return gid
+
+    def group_is_empty(self, gid):
+        """Whether a group holds neither records nor pending roots.
+
+        Args:
+            gid (int): Group id.
+        Returns:
+            bool: True if the group is empty.
+        """
+        return not self.group_rows[gid] and not self.group_pending[gid]
+
+    def group_is_visible(self, kind):
+        """Whether the group of a kind is shown.
+
+        Args:
+            kind (str): Kind.
+        Returns:
+            bool: True if the group exists and holds records.
+        """
+        gid = self.group_ids.get(kind)
+        return gid is not None and gid in self.group_order
+
+    def hide_group(self, gid):
+        """Hides an empty group.
+
+        Args:
+            gid (int): Group id.
+        """
+        self.group_order.remove(gid)
+
+    def remove(self, rid):
+        """Removes a record.
+
+        Args:
+            rid (int): Record id.
+        Returns:
+            bool: True if the group of the record became empty.
+        """
+        gid = self.record_group[rid]
+        rows = self.group_rows[gid]
+        row = self.record_row[rid]
+        del rows[row]
+        for other in rows[row:]:
+            self.record_row[other] -= 1
+        self.rows_by_dpack[self.dpack_id[rid]].remove(rid)
+        del self.rid_by_uuid[self.uuid[rid]]
+        for field in self.SEARCH_FIELDS + self.BITSET_FIELDS:
+            self._unindex(rid, field, getattr(self, field)[rid])
+        self.live_bits &= ~(1 << rid)
+        self.revision += 1
+        self.record_group[rid] = -1
+        self.record_row[rid] = -1
+        self.node[rid] = None
+        return self.group_is_empty(gid)
+
+    def show_group(self, kind):
+        """Shows the group of a kind, creating it if needed.
+
+        Args:
+            kind (str): Kind.
+        Returns:
+            int: Group id.
+        """
+        gid = self.group_ids.get(kind)
+        if gid is None:
+            gid = len(self.groups)
+            self.group_ids[kind] = gid
+            self.groups.append(kind)
+            self.group_pending.append([])
+            self.group_rows.append([])
+        if gid not in self.group_order:
+            self.group_order.append(gid)
+        return gid
+
+    def search(self, text):
+        """The records matching a search text. Every word of the text must be the start of a word of
+        one of the SEARCH_FIELDS.
+
+        Args:
+            text (str): Search text.
+        Returns:
+            int: Bitset of record ids.
+        """
+        matches = self.live_bits
+        for term in tokenize(text):
+            if not matches:
+                break
+            matches &= self._prefix_bits(term)
+        return matches
+
+    def set(self, rid, field, value):
+        """Sets the value of a record field.
+
+        Args:
+            rid (int): Record id.
+            field (str): Field name.
+            value (object): Value.
+        """
+        if field in self.INTERNED_FIELDS and isinstance(value, str):
+            value = sys.intern(value)
+        column = getattr(self, field)
+        if rid == len(column):
+            column.append(value)
+        else:
+            self._unindex(rid, field, column[rid])
+            column[rid] = value
+        self._index(rid, field, value)
+        self.revision += 1
+
+    def set_versions(self, dpack_id, versions):
+        """Sets the version data of a Deliverable Package.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+            versions (DpackVersions): Version data.
+        """
+        self.versions[dpack_id] = versions
+        self.revision += 1
+
+    def take_pending(self, gid, count):
+        """Removes the first pending roots of a group.
+
+        Args:
+            gid (int): Group id.
+            count (int): Maximum number of roots to take.
+        Returns:
+            list[tuple[str, str]]: Names and UUIDs of the roots.
+        """
+        batch = self.group_pending[gid][:count]
+        del self.group_pending[gid][:count]
+        for node, uuid in batch:
+            del self.pending_uuids[uuid]
+        return batch
+
+    def take_unsorted(self, count):
+        """Removes the first unsorted roots.
+
+        Args:
+            count (int): Maximum number of roots to take.
+        Returns:
+            list[tuple[str, str, str]]: Names, UUIDs and kind attributes of the roots.
+        """
+        batch = self.unsorted[:count]
+        del self.unsorted[:count]
+        for node, uuid, kind_attr in batch:
+            del self.pending_uuids[uuid]
+        return batch
+
+    def _index(self, rid, field, value):
+        """Adds a record to the index of a field.
+
+        Args:
+            rid (int): Record id.
+            field (str): Field name.
+            value (object): Field value.
+        """
+        bit = 1 << rid
+        if field in self.BITSET_FIELDS:
+            bits = self.field_bits[field]
+            bits[value] = bits.get(value, 0) | bit
+        elif field in self.SEARCH_FIELDS:
+            for token in tokenize(value):
+                if token not in self.tokens:
+                    self.tokens[token] = bit
+                    self._sorted_tokens = None
+                else:
+                    self.tokens[token] |= bit
+
+    def _prefix_bits(self, prefix):
+        """The records with a word starting with a prefix.
+
+        Args:
+            prefix (str): Lower case prefix.
+        Returns:
+            int: Bitset of record ids.
+        """
+        if self._sorted_tokens is None:
+            self._sorted_tokens = sorted(self.tokens)
+        bits = 0
+        for i in range(bisect_left(self._sorted_tokens, prefix), len(self._sorted_tokens)):
+            token = self._sorted_tokens[i]
+            if not token.startswith(prefix):
+                break
+            bits |= self.tokens[token]
+        return bits
+
+    def _unindex(self, rid, field, value):
+        """Removes a record from the index of a field.
+
+        Args:
+            rid (int): Record id.
+            field (str): Field name.
+            value (object): Field value the record was indexed with.
+        """
+        mask = ~(1 << rid)
+        if field in self.BITSET_FIELDS:
+            bits = self.field_bits[field]
+            if value in bits:
+                bits[value] &= mask
+                if not bits[value]:
+                    del bits[value]
+        elif field in self.SEARCH_FIELDS:
+            for token in tokenize(value):
+                if token in self.tokens:
+                    self.tokens[token] &= mask
+                    if not self.tokens[token]:
+                        del self.tokens[token]
+                        self._sorted_tokens = None
+
+    def __len__(self):
+        """The number of records in the store.
+
+        Returns:
+            int: Record count.
+        """
+        return len(self.rid_by_uuid)
+
+
+def tokenize(value):
+    """The lower case words of a value, as indexed for search.
+
+    Args:
+        value (object): Value.
+    Returns:
+        set[str]: Words.
+    """
+    if not value:
+        return set()
+    return set(_WORD_RE.findall(str(value).lower()))
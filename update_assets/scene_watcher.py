@@ -0,0 +1,193 @@
+import logging
+
+import maya.OpenMaya as OpenMaya
+from PySide2.QtCore import QObject, QTimer, Signal
+
+from br2.dv_root_node.node_handler import EXTENSION_MARKER, ROOT_NODE_TYPE
+from br2.update_assets.maya_utils import get_all_dv_root_nodes
+
+
+LOGGER = logging.getLogger(__name__)
+REFERENCE_MESSAGES = (
+    "kAfterCreateReference",
+    "kAfterLoadReference",
+    "kAfterUnloadReference",
+    "kAfterRemoveReference",
+    "kAfterImportReference",
+)
+SCENE_RESET_MESSAGES = (
+    "kAfterNew",
+    "kAfterOpen",
+)
+
+
+class RootSceneWatcher(QObject):
+    """Watches the calling maya session for changes to DvRootNodes and extension roots.
+    Maya callbacks only record what changed. The changes are coalesced and emitted once
+    control returns to the Qt event loop, after the maya command that caused them is done.
+    Extension roots are tagged after their transform is created, so new transforms are only
+    checked for EXTENSION_MARKER once the command creating them is done.
+    """
+
+    # signals
+    roots_changed = Signal(list)
+    references_changed = Signal()
+    scene_reset = Signal()
+
+    def __init__(self, parent=None):
+        """Initializer.
+
+        Args:
+            parent (PySide2.QtCore.QObject): Parent object.
+        """
+        super(RootSceneWatcher, self).__init__(parent)
+
+        self._callback_ids = []
+        self._node_callback_ids = {}
+        self._added_transforms = []
+        self._dirty_uuids = set()
+        self._references_changed = False
+        self._scene_reset = False
+
+        self._flush_timer = QTimer(self)
+        self._flush_timer.setSingleShot(True)
+        self._flush_timer.setInterval(0)
+        self._flush_timer.timeout.connect(self.flush)
+
+    def flush(self):
+        """Emits the changes recorded since the last flush."""
+        if self._scene_reset:
+            self._scene_reset = False
+            self._references_changed = False
+            self._added_transforms = []
+            self._dirty_uuids.clear()
+            self.scene_reset.emit()
+            return
+        self._watch_extension_roots()
+        if self._references_changed:
+            self._references_changed = False
+            self.references_changed.emit()
+        if self._dirty_uuids:
+            uuids = sorted(self._dirty_uuids)
+            self._dirty_uuids.clear()
+            self.roots_changed.emit(uuids)
+
+    def start(self):
+        """Registers the maya callbacks."""
+        if self._callback_ids:
+            return
+        self._callback_ids.append(OpenMaya.MDGMessage.addNodeAddedCallback(self._on_node_added, ROOT_NODE_TYPE))
+        self._callback_ids.append(OpenMaya.MDGMessage.addNodeRemovedCallback(self._on_node_removed, ROOT_NODE_TYPE))
+        self._callback_ids.append(OpenMaya.MDGMessage.addNodeAddedCallback(self._on_transform_added, "transform"))
+        self._callback_ids.append(OpenMaya.MDGMessage.addNodeRemovedCallback(self._on_node_removed, "transform"))
+        for message in REFERENCE_MESSAGES:
+            self._callback_ids.append(OpenMaya.MSceneMessage.addCallback(
+                getattr(OpenMaya.MSceneMessage, message), self._on_references_changed))
+        for message in SCENE_RESET_MESSAGES:
+            self._callback_ids.append(OpenMaya.MSceneMessage.addCallback(
+                getattr(OpenMaya.MSceneMessage, message), self._on_scene_reset))
+        for node in get_all_dv_root_nodes():
+            selection = OpenMaya.MSelectionList()
+            selection.add(node)
+            mobject = OpenMaya.MObject()
+            selection.getDependNode(0, mobject)
+            self._watch_node(mobject)
+
+    def stop(self):
+        """Removes the maya callbacks."""
+        self._flush_timer.stop()
+        for callback_ids in [self._callback_ids] + list(self._node_callback_ids.values()):
+            for callback_id in callback_ids:
+                OpenMaya.MMessage.removeCallback(callback_id)
+        self._callback_ids = []
+        self._node_callback_ids = {}
+        self._added_transforms = []
+        self._dirty_uuids.clear()
+
+    def _mark_dirty(self, uuid):
+        """Records a change to a root and schedules a flush.
+
+        Args:
+            uuid (str): UUID of the changed root.
+        """
+        self._dirty_uuids.add(uuid)
+        self._flush_timer.start()
+
+    def _on_attribute_changed(self, msg, plug, other_plug, client_data):
+        """Attribute changed callback of a root node."""
+        if msg & OpenMaya.MNodeMessage.kAttributeSet:
+            self._mark_dirty(_uuid(plug.node()))
+
+    def _on_name_changed(self, mobject, previous_name, client_data):
+        """Name changed callback of a root node."""
+        self._mark_dirty(_uuid(mobject))
+
+    def _on_node_added(self, mobject, client_data):
+        """Node added callback for root nodes."""
+        self._watch_node(mobject)
+        self._mark_dirty(_uuid(mobject))
+
+    def _on_node_removed(self, mobject, client_data):
+        """Node removed callback for root nodes and transforms, some of which are extension roots."""
+        uuid = _uuid(mobject)
+        callback_ids = self._node_callback_ids.pop(uuid, None)
+        if callback_ids is None:
+            return
+        for callback_id in callback_ids:
+            OpenMaya.MMessage.removeCallback(callback_id)
+        self._mark_dirty(uuid)
+
+    def _on_transform_added(self, mobject, client_data):
+        """Node added callback for transforms, checked for EXTENSION_MARKER on the next flush."""
+        if OpenMaya.MFileIO.isReadingFile():
+            # Roots read from files are picked up by the references_changed and scene_reset handlers.
+            return
+        self._added_transforms.append(OpenMaya.MObjectHandle(mobject))
+        self._flush_timer.start()
+
+    def _on_references_changed(self, client_data):
+        """Scene callback for reference changes."""
+        self._references_changed = True
+        self._flush_timer.start()
+
+    def _on_scene_reset(self, client_data):
+        """Scene callback for new and opened scenes."""
+        self._scene_reset = True
+        self._flush_timer.start()
+
+    def _watch_extension_roots(self):
+        """Watches the transforms added since the last flush that were tagged as extension roots."""
+        handles = self._added_transforms
+        self._added_transforms = []
+        for handle in handles:
+            if not handle.isValid():
+                continue
+            mobject = handle.object()
+            if OpenMaya.MFnDependencyNode(mobject).hasAttribute(EXTENSION_MARKER):
+                self._watch_node(mobject)
+                self._dirty_uuids.add(_uuid(mobject))
+
+    def _watch_node(self, mobject):
+        """Registers the per node callbacks of a root node.
+
+        Args:
+            mobject (OpenMaya.MObject): Root node.
+        """
+        uuid = _uuid(mobject)
+        if uuid in self._node_callback_ids:
+            return
+        self._node_callback_ids[uuid] = [
+            OpenMaya.MNodeMessage.addAttributeChangedCallback(mobject, self._on_attribute_changed),
+            OpenMaya.MNodeMessage.addNameChangedCallback(mobject, self._on_name_changed),
+        ]
+
+
+def _uuid(mobject):
+    """The maya UUID of a node.
+
+    Args:
+        mobject (OpenMaya.MObject): Node.
+    Returns:
+        str: UUID.
+    """
+    return OpenMaya.MFnDependencyNode(mobject).uuid().asString()
@@ -0,0 +1,281 @@
+"""Stage-level timing of reference loads and version swaps.
+
+Each operation is timed by an OperationTimer, stage by stage, and tagged with the dpack_id,
+fc_id, size and type of the file it loads. Finished operations are logged as a single line
+and added to the TimingSession of the calling maya session, which keeps a histogram of the
+durations of every stage of every operation, and the recent records themselves. Comparing the
+reference stage with the file size, see the bytes_per_second of the records, tells slow
+storage apart from large files, and the other stages measure our own code.
+
+The session is only written to disk on request, see TimingSession.export, or by write_timings
+when the BR2_STAGE_TIMINGS environment variable is set, to a JSON file path or to "1", to
+write to the temp directory.
+"""
+
+
+import json
+import logging
+import os
+import tempfile
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+LOGGER = logging.getLogger(__name__)
+# Upper bounds of the histogram buckets in seconds, doubling from 1ms to about 2 minutes.
+HISTOGRAM_BOUNDS = tuple(0.001 * 2 ** i for i in range(18))
+MAX_RECORDS = 10000
+TOTAL_STAGE = "total"
+TIMINGS_ENV_VAR = "BR2_STAGE_TIMINGS"
+_SESSION = None
+
+
+class Histogram(object):
+    """Distribution of durations, in buckets of HISTOGRAM_BOUNDS."""
+
+    def __init__(self):
+        """Initializer."""
+        self.counts = [0] * (len(HISTOGRAM_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, seconds):
+        """Adds a duration.
+
+        Args:
+            seconds (float): Duration.
+        """
+        bucket = 0
+        while bucket < len(HISTOGRAM_BOUNDS) and seconds > HISTOGRAM_BOUNDS[bucket]:
+            bucket += 1
+        self.counts[bucket] += 1
+        self.count += 1
+        self.total += seconds
+        self.min = seconds if self.min is None else min(self.min, seconds)
+        self.max = seconds if self.max is None else max(self.max, seconds)
+
+    def percentile(self, percent):
+        """The upper bound of the bucket holding a percentile, at most the largest duration.
+
+        Args:
+            percent (float): Percentile, 0 to 100.
+        Returns:
+            float|None: Duration, None if the histogram is empty.
+        """
+        if not self.count:
+            return None
+        rank = percent / 100.0 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(HISTOGRAM_BOUNDS[bucket], self.max) if bucket < len(HISTOGRAM_BOUNDS) else self.max
+        return self.max
+
+    def as_dict(self):
+        """The histogram as a dict.
+
+        Returns:
+            dict: Bucket bounds and counts, and count, mean, min, max, p50 and p95 in seconds.
+        """
+        return {
+            "bounds": list(HISTOGRAM_BOUNDS),
+            "counts": list(self.counts),
+            "count": self.count,
+            "mean": self.total / self.count if self.count else None,
+            "min": self.min,
+            "max": self.max,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+        }
+
+
+class OperationTimer(object):
+    """Times the stages of one operation, e.g. a version swap."""
+
+    def __init__(self, operation, **tags):
+        """Initializer.
+
+        Args:
+            operation (str): Operation name.
+            **tags: Values identifying what the operation works on, e.g. dpack_id and fc_id.
+        """
+        self.operation = operation
+        self.tags = tags
+        self.stages = {}
+        self.error = None
+        self._start = time.perf_counter()
+
+    def tag(self, **tags):
+        """Adds tags.
+
+        Args:
+            **tags: Tag values.
+        """
+        self.tags.update(tags)
+
+    def tag_file(self, path):
+        """Tags the path, size and type of the file the operation loads.
+
+        Args:
+            path (str): File path.
+        """
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = None
+        self.tag(file_path=path, file_size=size, file_type=os.path.splitext(path)[1].lower())
+
+    @contextmanager
+    def stage(self, name):
+        """Times a stage. A stage that raises is timed too, and fails the operation.
+
+        Args:
+            name (str): Stage name. Stages run more than once add up.
+        Yields:
+            None
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error = f"{name}: {e}"
+            raise
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+    def finish(self, error=None):
+        """Ends the operation, logs it and adds it to the session.
+
+        Args:
+            error (str|None): Error message, if the operation failed. Defaults to the error of the
+                stage that raised, if any.
+        Returns:
+            dict: Record with operation, tags, stages, seconds (the sum of the stages), wall_seconds
+                (including any time between stages), bytes_per_second and error keys.
+        """
+        record = {
+            "operation": self.operation,
+            "tags": dict(self.tags),
+            "stages": dict(self.stages),
+            "seconds": sum(self.stages.values()),
+            "wall_seconds": time.perf_counter() - self._start,
+            "bytes_per_second": None,
+            "error": error or self.error,
+            "time": time.time(),
+        }
+        reference_seconds = self.stages.get("reference")
+        if reference_seconds and self.tags.get("file_size"):
+            record["bytes_per_second"] = self.tags["file_size"] / reference_seconds
+
+        LOGGER.info("%s %s %s total=%.3fs%s", self.operation,
+                    " ".join(f"{key}={value}" for key, value in sorted(self.tags.items()) if key != "file_path"),
+                    " ".join(f"{stage}={seconds:.3f}s" for stage, seconds in self.stages.items()),
+                    record["seconds"], f' error="{record["error"]}"' if record["error"] else "")
+        get_timing_session().add(record)
+        return record
+
+
+class TimingSession(object):
+    """Stage duration histograms and recent records of the operations of a maya session."""
+
+    def __init__(self, max_records=MAX_RECORDS):
+        """Initializer.
+
+        Args:
+            max_records (int): Number of records kept. Defaults to MAX_RECORDS.
+        """
+        self.histograms = {}
+        self.records = deque(maxlen=max_records)
+
+    def add(self, record):
+        """Adds the record of a finished operation.
+
+        Args:
+            record (dict): Record, see OperationTimer.finish.
+        """
+        self.records.append(record)
+        stages = dict(record["stages"], **{TOTAL_STAGE: record["seconds"]})
+        for stage, seconds in stages.items():
+            key = (record["operation"], stage)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].add(seconds)
+
+    def as_dict(self):
+        """The session as a dict.
+
+        Returns:
+            dict: Histograms, by operation then stage, and records.
+        """
+        histograms = {}
+        for (operation, stage), histogram in sorted(self.histograms.items()):
+            histograms.setdefault(operation, {})[stage] = histogram.as_dict()
+        return {"histograms": histograms, "records": list(self.records)}
+
+    def export(self, path=None):
+        """Writes the session as JSON.
+
+        Args:
+            path (str|None): JSON file path. Defaults to a file of the calling process in the temp directory.
+        Returns:
+            str: Written file path.
+        """
+        path = path or os.path.join(tempfile.gettempdir(), f"br2_stage_timings_{os.getpid()}.json")
+        with open(path, "w") as stream:
+            json.dump(self.as_dict(), stream, indent=2)
+        LOGGER.info('Wrote the stage timings of %d operations to "%s"', len(self.records), path)
+        return path
+
+    def summary(self):
+        """The count and duration percentiles of every stage of every operation, as text.
+
+        Returns:
+            str: Table.
+        """
+        lines = [f'{"operation":<24} {"stage":<16} {"count":>7} {"mean s":>9} {"p50 s":>9} {"p95 s":>9} {"max s":>9}']
+        for (operation, stage), histogram in sorted(self.histograms.items()):
+            lines.append(f"{operation:<24} {stage:<16} {histogram.count:>7} {histogram.total / histogram.count:>9.3f} "
+                         f"{histogram.percentile(50):>9.3f} {histogram.percentile(95):>9.3f} {histogram.max:>9.3f}")
+        return "\n".join(lines)
+
+
+def get_timings_path():
+    """The timings file path given by BR2_STAGE_TIMINGS.
+
+    Returns:
+        str|None: JSON file path, None if writing timings is off.
+    """
+    path = os.environ.get(TIMINGS_ENV_VAR, "")
+    if path in ("", "0"):
+        return None
+    if path == "1":
+        return os.path.join(tempfile.gettempdir(), f"br2_stage_timings_{os.getpid()}.json")
+    return path
+
+
+def get_timing_session():
+    """The timing session of the calling maya session.
+
+    Returns:
+        TimingSession: Session.
+    """
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = TimingSession()
+    return _SESSION
+
+
+def write_timings():
+    """Writes the timing session to the file given by BR2_STAGE_TIMINGS, if set and any operation was timed.
+
+    Returns:
+        str|None: Written file path, None if writing timings is off or nothing was timed.
+    """
+    path = get_timings_path()
+    if path is None or not get_timing_session().records:
+        return None
+    return get_timing_session().export(path)
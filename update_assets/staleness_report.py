@@ -0,0 +1,317 @@
+"""Headless report of out of date DvRoots across many scene files.
+
+Scene files, or directories holding them, are read in parallel in a pool of worker processes.
+Maya ASCII files are read without maya by ma_reader, Maya Binary files are opened in
+maya.standalone, and a scene crashing maya is reported as failed without stopping the report.
+The dpack_id, fc_id and version of every DvRoot found is compared against the latest version
+in the catalog, and the outdated roots are reported per scene as JSON or CSV.
+
+Usage:
+    mayapy -m br2.update_assets.staleness_report <scene|dir> [...] [-o report.json] [-f json|csv]
+"""
+
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+maya_path = r"C:\Users\john.russell\Code\git_stuff\dreamview-studios-inc\DreamViewStudios\application\maya"
+if maya_path not in sys.path:
+    sys.path.append(maya_path)
+from br2.dv_root_node.ma_reader import iter_scene_files, read_roots
+from br2.update_assets.test_db import get_versions_data, version_number
+
+
+LOGGER = logging.getLogger(__name__)
+_MAYA_INITIALIZED = False
+CSV_FIELDS = [
+    "scene",
+    "node",
+    "asset_name",
+    "dpack_id",
+    "fc_id",
+    "version",
+    "latest_version",
+    "latest_fc_id",
+]
+
+
+def read_scene_roots(scene):
+    """Reads the DvRoot metadata of a scene file. Runs in a worker process.
+
+    Args:
+        scene (str): Scene file path.
+    Returns:
+        list[dict]: Root data with node, uuid, asset_name, dpack_id, fc_id and version keys.
+    """
+    if scene.lower().endswith(".ma"):
+        return [{
+            "node": root.dag_path,
+            "uuid": root.uuid,
+            "asset_name": root.asset_name,
+            "dpack_id": root.dpack_id,
+            "fc_id": root.fc_id,
+            "version": root.version,
+        } for root in read_roots(scene)]
+
+    _init_maya()
+    import maya.cmds as cmds
+    from br2.dv_root_node.node_handler import MayaRootHandler, load_root_plugin, ls_root_nodes
+
+    load_root_plugin()
+    cmds.file(scene, open=True, force=True, loadReferenceDepth="none")
+    roots = []
+    for node in ls_root_nodes():
+        root = MayaRootHandler(node)
+        roots.append({
+            "node": root.dag_path,
+            "uuid": root.uuid,
+            "asset_name": root.asset_name,
+            "dpack_id": root.dpack_id,
+            "fc_id": root.fc_id,
+            "version": root.version,
+        })
+    return roots
+
+
+def _init_maya():
+    """Initializes maya in a worker process, the first time a Maya Binary scene is read."""
+    global _MAYA_INITIALIZED
+    if _MAYA_INITIALIZED:
+        return
+    import maya.standalone
+    maya.standalone.initialize(name="python")
+    _MAYA_INITIALIZED = True
+
+
+def _read_scene(scene):
+    """Reads a scene in a worker process, capturing timing and errors.
+
+    Args:
+        scene (str): Scene file path.
+    Returns:
+        dict: Scene result with scene, roots, seconds and error keys.
+    """
+    start = time.perf_counter()
+    try:
+        roots = read_scene_roots(scene)
+        error = None
+    except Exception as e:
+        roots = []
+        error = str(e)
+    return {"scene": scene, "roots": roots, "seconds": time.perf_counter() - start, "error": error}
+
+
+class StalenessChecker(object):
+    """Compares root versions against the latest catalog versions.
+    The latest version of each Deliverable Package is fetched from the catalog once and cached.
+    """
+
+    def __init__(self):
+        """Initializer."""
+        self._latest = {}
+
+    def latest(self, dpack_id):
+        """The latest catalog version of a Deliverable Package.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+        Returns:
+            AssetData|None: Latest version, None if the catalog has no versions.
+        """
+        if dpack_id not in self._latest:
+            self._latest[dpack_id] = get_versions_data(dpack_id).latest()
+        return self._latest[dpack_id]
+
+    def outdated_roots(self, roots):
+        """Filters the roots that are behind the latest catalog version.
+
+        Args:
+            roots (list[dict]): Root data as returned by read_scene_roots.
+        Returns:
+            list[dict]: Outdated roots, with latest_version and latest_fc_id keys added.
+        """
+        outdated = []
+        for root in roots:
+            latest = self.latest(root["dpack_id"])
+            if latest is None:
+                continue
+            version = version_number(root["version"])
+            if version is None or version < latest.version_fc:
+                outdated.append(dict(root, latest_version=latest.version_fc, latest_fc_id=latest.fc_id))
+        return outdated
+
+
+def build_report(scenes, workers=None):
+    """Builds the staleness report of the given scene files.
+
+    Args:
+        scenes (list[str]): Scene file paths.
+        workers (int|None): Number of worker processes. Defaults to the number of CPUs.
+    Returns:
+        dict: Report with a "scenes" list and a "summary" dict.
+    """
+    checker = StalenessChecker()
+    results = []
+    start = time.perf_counter()
+    for result in _iter_results(scenes, workers or os.cpu_count() or 1):
+        if result["error"] is not None:
+            LOGGER.error('Unable to read "%s": %s', result["scene"], result["error"])
+        results.append({
+            "scene": result["scene"],
+            "roots": len(result["roots"]),
+            "outdated": checker.outdated_roots(result["roots"]),
+            "seconds": round(result["seconds"], 3),
+            "error": result["error"],
+        })
+    results.sort(key=lambda r: r["scene"])
+
+    return {
+        "scenes": results,
+        "summary": {
+            "scenes": len(results),
+            "scenes_outdated": sum(1 for r in results if r["outdated"]),
+            "roots": sum(r["roots"] for r in results),
+            "roots_outdated": sum(len(r["outdated"]) for r in results),
+            "errors": sum(1 for r in results if r["error"] is not None),
+            "seconds": round(time.perf_counter() - start, 3),
+        },
+    }
+
+
+def _iter_results(scenes, workers):
+    """Reads scene files in a pool of worker processes. Scenes are handed to the pool as workers free up.
+    If a worker process dies, maya crashing while reading a Maya Binary scene, the pool is replaced and the
+    scenes it was running are retried in worker processes of their own, so only the scene crashing maya
+    fails. Retries count against the number of workers.
+
+    Args:
+        scenes (list[str]): Scene file paths.
+        workers (int): Number of worker processes.
+    Yields:
+        dict: Scene results, see _read_scene, in order of completion.
+    """
+    queued = deque(scenes)
+    executor = ProcessPoolExecutor(max_workers=workers)
+    pending = {}
+    isolated = {}
+    try:
+        while queued or pending:
+            while queued and len(pending) < workers:
+                scene = queued.popleft()
+                pending[executor.submit(_read_scene, scene)] = scene
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future not in pending:
+                    # Retried after its pool crashed.
+                    continue
+                scene = pending.pop(future)
+                pool = isolated.pop(future, None)
+                if pool is not None:
+                    pool.shutdown(wait=False)
+                try:
+                    result = future.result()
+                except BrokenProcessPool as e:
+                    if pool is not None:
+                        yield _failed_result(scene, f"Worker process died: {e}")
+                        continue
+                    crashed = [f for f in pending if f not in isolated and _crashed(f)]
+                    retries = [scene] + [pending.pop(f) for f in crashed]
+                    LOGGER.warning("A worker process died, retrying %d scene(s) alone", len(retries))
+                    executor.shutdown(wait=False)
+                    executor = ProcessPoolExecutor(max_workers=workers)
+                    for retry in retries:
+                        pool = ProcessPoolExecutor(max_workers=1)
+                        retry_future = pool.submit(_read_scene, retry)
+                        pending[retry_future] = retry
+                        isolated[retry_future] = pool
+                    continue
+                except Exception as e:
+                    # The scene result could not be sent back, the other scenes go on.
+                    result = _failed_result(scene, str(e))
+                yield result
+    finally:
+        executor.shutdown()
+        for pool in isolated.values():
+            pool.shutdown()
+
+
+def _crashed(future):
+    """Whether a scene read did not complete because its worker pool crashed.
+
+    Args:
+        future (concurrent.futures.Future): Scene read.
+    Returns:
+        bool: True if the read is not done yet or failed with BrokenProcessPool.
+    """
+    return not future.done() or isinstance(future.exception(), BrokenProcessPool)
+
+
+def _failed_result(scene, error):
+    """The result of a scene that could not be read.
+
+    Args:
+        scene (str): Scene file path.
+        error (str): Error message.
+    Returns:
+        dict: Scene result, see _read_scene.
+    """
+    return {"scene": scene, "roots": [], "seconds": 0.0, "error": error}
+
+
+def write_report(report, stream, fmt="json"):
+    """Writes a staleness report.
+
+    Args:
+        report (dict): Report as returned by build_report.
+        stream (io.TextIOBase): Output stream.
+        fmt (str): Output format, "json" or "csv". Defaults to "json".
+    """
+    if fmt == "json":
+        json.dump(report, stream, indent=2)
+        stream.write("\n")
+        return
+    writer = csv.DictWriter(stream, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for scene in report["scenes"]:
+        for root in scene["outdated"]:
+            writer.writerow(dict(root, scene=scene["scene"]))
+
+
+def main(argv=None):
+    """Command line entry point.
+
+    Args:
+        argv (list[str]|None): Arguments. Defaults to sys.argv.
+    Returns:
+        int: Exit code.
+    """
+    parser = argparse.ArgumentParser(description="Report out of date DvRoots in scene files.")
+    parser.add_argument("paths", nargs="+", help="Scene files or directories of scene files.")
+    parser.add_argument("-o", "--output", help="Report file. Defaults to stdout.")
+    parser.add_argument("-f", "--format", choices=["json", "csv"], default="json", help="Report format.")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Number of worker processes.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    scenes = list(iter_scene_files(args.paths))
+    LOGGER.info("Checking %d scene(s)", len(scenes))
+    report = build_report(scenes, workers=args.workers)
+
+    if args.output:
+        with open(args.output, "w", newline="") as stream:
+            write_report(report, stream, args.format)
+    else:
+        write_report(report, sys.stdout, args.format)
+    return 1 if report["summary"]["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+import logging
+import time
+from collections import OrderedDict
+
+import maya.utils
+from PySide2.QtCore import QObject, Signal
+
+from br2.dv_root_node.cmds_trace import trace_action
+from br2.update_assets.maya_utils import get_node_name
+from br2.update_assets.test_version_swap import SWAP_SKIPPED, SWAP_STAGES, iter_swap_version_steps
+
+
+LOGGER = logging.getLogger(__name__)
+
+
+class SwapJob(object):
+    """A requested version swap of a single root."""
+
+    # states
+    QUEUED = "queued"
+    RUNNING = "swapping"
+    DONE = "done"
+    SKIPPED = "skipped"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(self, uuid, version):
+        """Initializer.
+
+        Args:
+            uuid (str): UUID of the root node.
+            version (AssetData): Version to load.
+        """
+        self.uuid = uuid
+        self.version = version
+        self.state = self.QUEUED
+        self.stages_done = 0
+        self.node = None
+        self.error = None
+        self.started = None
+        self.elapsed = 0.0
+        self.stage_times = OrderedDict()
+
+    @property
+    def is_active(self):
+        """Whether the job is queued or running.
+
+        Returns:
+            bool: True if the job has not finished.
+        """
+        return self.state in (self.QUEUED, self.RUNNING)
+
+    @property
+    def progress(self):
+        """The fraction of the job's stages that are done.
+
+        Returns:
+            float: Progress, from 0.0 to 1.0.
+        """
+        if self.state == self.SKIPPED:
+            return 1.0
+        return self.stages_done / float(len(SWAP_STAGES))
+
+    def describe(self):
+        """A short description of the job's state.
+
+        Returns:
+            str: Description.
+        """
+        if self.state == self.RUNNING:
+            stage = min(self.stages_done, len(SWAP_STAGES) - 1)
+            return "{} v{}: {} ({}/{}) {:.1f}s".format(
+                self.state, self.version.version_fc, SWAP_STAGES[stage], stage + 1, len(SWAP_STAGES), self.elapsed)
+        if self.state == self.FAILED:
+            return "swap to v{} failed: {}".format(self.version.version_fc, self.error)
+        if self.state == self.DONE:
+            return "swapped to v{} in {:.1f}s".format(self.version.version_fc, self.elapsed)
+        if self.state == self.SKIPPED:
+            return "already at v{}, swapped with its instances".format(self.version.version_fc)
+        return "{} v{}".format(self.state, self.version.version_fc)
+
+
+class SwapJobQueue(QObject):
+    """Queue of version swaps executed on the main thread in deferred chunks.
+    Each swap stage runs in its own deferred call, so maya redraws and processes events
+    between stages. Requests for a root whose previous request has not started yet replace
+    that request.
+    """
+
+    # signals
+    job_updated = Signal(object)
+    job_finished = Signal(object)
+    queue_changed = Signal()
+
+    def __init__(self, parent=None):
+        """Initializer.
+
+        Args:
+            parent (PySide2.QtCore.QObject): Parent object.
+        """
+        super(SwapJobQueue, self).__init__(parent)
+
+        self._pending = OrderedDict()
+        self._running = None
+        self._steps = None
+        self._scheduled = False
+
+    @property
+    def pending_count(self):
+        """The number of jobs waiting to start.
+
+        Returns:
+            int: Job count.
+        """
+        return len(self._pending)
+
+    @property
+    def running_job(self):
+        """The job currently running.
+
+        Returns:
+            SwapJob|None: Job, None if the queue is idle.
+        """
+        return self._running
+
+    def cancel(self, uuid):
+        """Cancels the pending job of a root. Running jobs are not interrupted.
+
+        Args:
+            uuid (str): UUID of the root node.
+        Returns:
+            bool: True if a job was cancelled.
+        """
+        job = self._pending.pop(uuid, None)
+        if job is None:
+            return False
+        job.state = SwapJob.CANCELLED
+        self.job_finished.emit(job)
+        self.queue_changed.emit()
+        return True
+
+    def cancel_all(self):
+        """Cancels all pending jobs."""
+        for uuid in list(self._pending):
+            self.cancel(uuid)
+
+    def submit(self, uuid, version):
+        """Requests a version swap.
+
+        Args:
+            uuid (str): UUID of the root node.
+            version (AssetData): Version to load.
+        Returns:
+            SwapJob: The job handling the request.
+        """
+        job = self._pending.get(uuid)
+        if job is not None:
+            # Coalesce with the request that has not started yet.
+            job.version = version
+        else:
+            job = self._pending[uuid] = SwapJob(uuid, version)
+        self.job_updated.emit(job)
+        self.queue_changed.emit()
+        self._schedule()
+        return job
+
+    def _schedule(self):
+        """Schedules the next chunk of work."""
+        if not self._scheduled:
+            self._scheduled = True
+            maya.utils.executeDeferred(self._step)
+
+    @trace_action("Update: swap version")
+    def _step(self):
+        """Runs a single stage of the running job, starting the next pending job if none is running."""
+        self._scheduled = False
+        if self._running is None:
+            if not self._pending:
+                return
+            uuid, job = self._pending.popitem(last=False)
+            job.node = get_node_name(uuid)
+            job.started = time.perf_counter()
+            if job.node is None:
+                self._finish(job, SwapJob.FAILED, "root node not found")
+                self._schedule()
+                return
+            job.state = SwapJob.RUNNING
+            self._running = job
+            self._steps = iter_swap_version_steps(job.node, job.version)
+            self.queue_changed.emit()
+
+        job = self._running
+        stage_start = time.perf_counter()
+        try:
+            stage = next(self._steps)
+        except StopIteration:
+            self._finish(job, SwapJob.DONE)
+        except Exception as e:
+            LOGGER.exception('Failed to swap "%s" to version %s', job.node, job.version.version_fc)
+            self._finish(job, SwapJob.FAILED, str(e))
+        else:
+            if stage == SWAP_SKIPPED:
+                self._finish(job, SwapJob.SKIPPED)
+                self._schedule()
+                return
+            job.stage_times[stage] = time.perf_counter() - stage_start
+            job.stages_done += 1
+            job.elapsed = time.perf_counter() - job.started
+            self.job_updated.emit(job)
+        self._schedule()
+
+    def _finish(self, job, state, error=None):
+        """Finishes a job.
+
+        Args:
+            job (SwapJob): Job.
+            state (str): Final state.
+            error (str|None): Error message. Defaults to None.
+        """
+        job.state = state
+        job.error = error
+        job.elapsed = time.perf_counter() - job.started
+        if job is self._running:
+            self._running = None
+            self._steps = None
+        LOGGER.info('Swap of "%s" to version %s %s in %.2fs %s', job.node, job.version.version_fc, state,
+                    job.elapsed, dict(job.stage_times))
+        self.job_finished.emit(job)
+        self.queue_changed.emit()
@@ -1,5 +1,14 @@
+import json
+import os
+import sys
+from array import array
+from datetime import datetime, timezone
 
 
+_NO_DATE = float("nan")
+# JSON file of File Collection records to use instead of FILE_COLLECTIONS.
+CATALOG_ENV_VAR = "BR2_CATALOG"
+
 FILE_COLLECTIONS = [
     {
         "name_dpack": r"KDurant_Base_LookDev",
@@ -68,80 +77,318 @@ FILE_COLLECTIONS = [
 
 
 class AssetData(object):
-    def __init__(self, asset_dict):
-        self.dict = asset_dict
+    """Compact record of a single File Collection version.
+    Versions are held as integers and creation dates as parsed datetimes so that sorting and
+    comparing records never does string work. Strings repeated across many records (user,
+    status, project) are interned so each distinct value is stored once.
+    """
+    __slots__ = ("content_hash", "date_created", "dpack_id", "fc_id", "path_file", "project", "status", "user",
+                 "version_fc")
 
-        self.date_created1 = asset_dict.get("date_created")
-        self.dpack_id1 = asset_dict.get("id_dpack")
-        self.fc_id1 = asset_dict.get("id_fc")
-        self.path_file1 = asset_dict.get("path_file")
-        self.status1 = asset_dict.get("status")
-        self.user1 = asset_dict.get("user")
-        self.version_fc1 = asset_dict.get("version_fc")
+    def __init__(self, dpack_id, fc_id, version_fc, path_file="", date_created=None, user="", status="",
+                 project="", content_hash=""):
+        """Initializer.
 
-    @property
-    def date_created(self):
-        return self.date_created1
+        Args:
+            dpack_id (int): Deliverable Package ID.
+            fc_id (int): File Collection ID.
+            version_fc (int): Version number.
+            path_file (str): File path. Defaults to "".
+            date_created (datetime.datetime|None): Creation date. Defaults to None.
+            user (str): User name. Defaults to "".
+            status (str): Status. Defaults to "".
+            project (str): Project name. Defaults to "".
+            content_hash (str): Content hash of the file, see br2.check_in.content_hash. Defaults to "".
+        """
+        self.content_hash = content_hash
+        self.date_created = date_created
+        self.dpack_id = dpack_id
+        self.fc_id = fc_id
+        self.path_file = path_file
+        self.project = _intern(project)
+        self.status = _intern(status)
+        self.user = _intern(user)
+        self.version_fc = version_fc
+
+    @classmethod
+    def from_dict(cls, asset_dict):
+        """Creates a record from a catalog dict.
 
-    @date_created.setter
-    def date_created(self, val):
-        self.date_created1 = val
+        Args:
+            asset_dict (dict): Catalog File Collection data.
+        Returns:
+            AssetData: Record.
+        """
+        return cls(
+            asset_dict.get("id_dpack"),
+            asset_dict.get("id_fc"),
+            version_number(asset_dict.get("version_fc")),
+            path_file=asset_dict.get("path_file") or "",
+            date_created=parse_date(asset_dict.get("date_created")),
+            user=asset_dict.get("user") or "",
+            status=asset_dict.get("status") or "",
+            project=asset_dict.get("project") or "",
+            content_hash=asset_dict.get("content_hash") or "")
 
     @property
-    def dpack_id(self):
-        return self.dpack_id1
+    def sort_key(self):
+        """The key records are ordered by.
 
-    @dpack_id.setter
-    def dpack_id(self, val):
-        self.dpack_id1 = val
+        Returns:
+            tuple[int, int, int]: Deliverable Package ID, version number and File Collection ID.
+        """
+        return self.dpack_id or 0, self.version_fc or 0, self.fc_id or 0
 
-    @property
-    def fc_id(self):
-        return self.fc_id1
+    def __eq__(self, other):
+        """Defines the equality comparison operator for the instance.
 
-    @fc_id.setter
-    def fc_id(self, val):
-        self.fc_id1 = val
+        Args:
+            other (object): Object to compare.
+        Returns:
+            bool: True if other is an AssetData instance of the same File Collection version.
+        """
+        return self.__class__ == other.__class__ and self.sort_key == other.sort_key
 
-    @property
-    def path_file(self):
-        return self.path_file1
+    def __hash__(self):
+        """Hash consistent with __eq__.
 
-    @path_file.setter
-    def path_file(self, val):
-        self.path_file1 = val
+        Returns:
+            int: Hash.
+        """
+        return hash(self.sort_key)
 
-    @property
-    def status(self):
-        return self.status1
+    def __lt__(self, other):
+        """Orders records by Deliverable Package, then version.
 
-    @status.setter
-    def status(self, val):
-        self.status1 = val
+        Args:
+            other (AssetData): Record to compare.
+        Returns:
+            bool: True if the instance sorts before other.
+        """
+        return self.sort_key < other.sort_key
 
-    @property
-    def user(self):
-        return self.user1
+    def __repr__(self):
+        """Provides the string representation of the instance.
 
-    @user.setter
-    def user(self, val):
-        self.user1 = val
+        Returns:
+            str: String representation.
+        """
+        return f"{self.__class__.__name__}(dpack_id={self.dpack_id}, fc_id={self.fc_id}, version_fc={self.version_fc})"
 
-    @property
-    def version_fc(self):
-        return self.version_fc1
 
-    @version_fc.setter
-    def version_fc(self, val):
-        self.version_fc1 = val
+class VersionTable(object):
+    """Columnar container for large lists of File Collection versions.
+    Numeric fields are held in typed arrays and string fields in lists of interned strings, so
+    a row costs a few dozen bytes plus its file path. Rows are materialized as AssetData
+    records on access.
+    """
+
+    def __init__(self):
+        """Initializer."""
+        self.dpack_id = array("q")
+        self.fc_id = array("q")
+        self.version_fc = array("q")
+        self.date_created = array("d")
+        self.content_hash = []
+        self.path_file = []
+        self.project = []
+        self.status = []
+        self.user = []
+        self._dpack_rows = {}
+
+    @classmethod
+    def from_dicts(cls, asset_dicts):
+        """Creates a table from catalog dicts.
+
+        Args:
+            asset_dicts (iterable[dict]): Catalog File Collection data.
+        Returns:
+            VersionTable: Table.
+        """
+        table = cls()
+        for asset_dict in asset_dicts:
+            table.append(AssetData.from_dict(asset_dict))
+        return table
+
+    def append(self, asset):
+        """Appends a record to the table.
+
+        Args:
+            asset (AssetData): Record.
+        """
+        self._dpack_rows.setdefault(asset.dpack_id, []).append(len(self.fc_id))
+        self.dpack_id.append(asset.dpack_id or 0)
+        self.fc_id.append(asset.fc_id or 0)
+        self.version_fc.append(asset.version_fc or 0)
+        self.date_created.append(asset.date_created.timestamp() if asset.date_created else _NO_DATE)
+        self.content_hash.append(asset.content_hash)
+        self.path_file.append(asset.path_file)
+        self.project.append(_intern(asset.project))
+        self.status.append(_intern(asset.status))
+        self.user.append(_intern(asset.user))
+
+    def latest(self):
+        """The record with the highest version in the table.
+
+        Returns:
+            AssetData|None: Latest version, None if the table is empty.
+        """
+        if not self.version_fc:
+            return None
+        return self[max(range(len(self.version_fc)), key=self.version_fc.__getitem__)]
+
+    def select(self, dpack_id):
+        """A new table holding only the rows of a Deliverable Package.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+        Returns:
+            VersionTable: Table.
+        """
+        table = self.__class__()
+        for row in self._dpack_rows.get(dpack_id, []):
+            table.append(self[row])
+        return table
+
+    def sorted(self, reverse=False):
+        """The records of the table ordered by version.
+
+        Args:
+            reverse (bool): If True the latest version comes first. Defaults to False.
+        Returns:
+            list[AssetData]: Records.
+        """
+        rows = sorted(range(len(self.version_fc)), key=self.version_fc.__getitem__, reverse=reverse)
+        return [self[r] for r in rows]
+
+    def __getitem__(self, row):
+        """Materializes the record of a row.
+
+        Args:
+            row (int): Row index.
+        Returns:
+            AssetData: Record.
+        """
+        timestamp = self.date_created[row]
+        return AssetData(
+            self.dpack_id[row],
+            self.fc_id[row],
+            self.version_fc[row],
+            path_file=self.path_file[row],
+            date_created=None if timestamp != timestamp else datetime.fromtimestamp(timestamp, timezone.utc),
+            user=self.user[row],
+            status=self.status[row],
+            project=self.project[row],
+            content_hash=self.content_hash[row])
+
+    def __iter__(self):
+        """An iterator over the records of the table.
+
+        Yields:
+            AssetData: Record.
+        """
+        for row in range(len(self.fc_id)):
+            yield self[row]
+
+    def __len__(self):
+        """The number of rows in the table.
+
+        Returns:
+            int: Row count.
+        """
+        return len(self.fc_id)
+
+
+def parse_date(value):
+    """Parses a catalog ISO date string.
+
+    Args:
+        value (str|None): Date string, e.g. "2021-05-07 23:06:04+00:00".
+    Returns:
+        datetime.datetime|None: Date, None if no date is given.
+    """
+    if not value:
+        return None
+    return datetime.fromisoformat(value)
+
+
+def version_number(value):
+    """Converts a version specifier to its integer version number.
+
+    Args:
+        value (int|str|None): Version specifier, e.g. "26".
+    Returns:
+        int|None: Version number, None if value holds no number.
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _intern(value):
+    """Interns a repeated string value.
+
+    Args:
+        value (str|None): Value.
+    Returns:
+        str|None: Interned value.
+    """
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def load_file_collections(path):
+    """Reads File Collection records from a JSON file, e.g. a synthetic catalog, see
+    br2.benchmarks.scene_generator.
+
+    Args:
+        path (str): JSON file holding a list of records, in the format of FILE_COLLECTIONS.
+    Returns:
+        list[dict]: Records.
+    """
+    with open(path) as stream:
+        return json.load(stream)
+
+
+CATALOG = VersionTable.from_dicts(
+    load_file_collections(os.environ[CATALOG_ENV_VAR]) if os.environ.get(CATALOG_ENV_VAR) else FILE_COLLECTIONS)
 
 
 def get_file_collection_data(fc_id):
-    for f in FILE_COLLECTIONS:
-        if fc_id == f.get("id_fc"):
-            return AssetData(f)
+    for row, row_fc_id in enumerate(CATALOG.fc_id):
+        if fc_id == row_fc_id:
+            return CATALOG[row]
     return None
 
 
+def get_file_paths(fc_ids):
+    """The file paths of File Collections, found in a single pass over the catalog.
+
+    Args:
+        fc_ids (iterable[int]): File Collection IDs.
+    Returns:
+        dict: File path by fc_id, for the File Collections found in the catalog.
+    """
+    wanted = set(fc_ids)
+    paths = {}
+    for row, fc_id in enumerate(CATALOG.fc_id):
+        if fc_id in wanted and fc_id not in paths:
+            paths[fc_id] = CATALOG.path_file[row]
+    return paths
+
+
 def get_versions_data(dpack_id):
-    return [AssetData(f) for f in FILE_COLLECTIONS if f.get("dpack_id") == dpack_id]
+    return CATALOG.select(dpack_id)
+
+
+def publish_version(asset):
+    """Adds a new File Collection version to the catalog, assigning it a new File Collection ID.
+
+    Args:
+        asset (AssetData): Record of the version. Its fc_id is replaced.
+    Returns:
+        AssetData: Published record.
+    """
+    asset.fc_id = max(CATALOG.fc_id or [0]) + 1
+    CATALOG.append(asset)
+    return asset
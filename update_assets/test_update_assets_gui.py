@@ -1,18 +1,25 @@
 import sys
 
-from PySide2.QtCore import QItemSelectionModel, QSize, QSortFilterProxyModel, Qt, Signal
-from PySide2.QtGui import QBrush, QColor, QStandardItem, QStandardItemModel, QTextDocument
-from PySide2.QtWidgets import (QComboBox, QDialog, QHBoxLayout, QLabel, QStyledItemDelegate, QTreeView,
-                               QVBoxLayout, QWidget)
+from PySide2.QtCore import (QAbstractItemModel, QItemSelectionModel, QModelIndex, QSettings, QSize,
+                            QSortFilterProxyModel, Qt, QTimer, Signal)
+from PySide2.QtGui import QBrush, QColor, QFontMetrics, QStandardItem, QStandardItemModel
+from PySide2.QtWidgets import (QApplication, QCheckBox, QComboBox, QDialog, QHBoxLayout, QLabel, QLineEdit,
+                               QProgressBar, QPushButton, QStyledItemDelegate, QTreeView, QVBoxLayout, QWidget)
 from shiboken2 import wrapInstance
 
 maya_path = r"C:\Users\john.russell\Code\git_stuff\dreamview-studios-inc\DreamViewStudios\application\maya"
 if maya_path not in sys.path:
     sys.path.append(maya_path)
+from br2.dv_root_node.cmds_trace import trace_action, write_trace
 from br2.dv_root_node.node_handler import MayaRootHandler
-from br2.update_assets.maya_utils import get_all_dv_root_nodes, get_main_window_ptr
-from br2.update_assets.test_db import get_versions_data
-from br2.update_assets.test_version_swap import swap_version
+from br2.update_assets.catalog_fetcher import CatalogFetcher
+from br2.update_assets.maya_utils import (get_all_dv_root_uuids, get_all_dv_roots, get_dv_root_kind,
+                                         get_main_window_ptr, get_node_name)
+from br2.update_assets.root_store import DpackVersions, RootStore
+from br2.update_assets.scene_watcher import RootSceneWatcher
+from br2.update_assets.stage_timing import write_timings
+from br2.update_assets.swap_queue import SwapJob, SwapJobQueue
+from br2.update_assets.test_db import version_number
 
 
 COL_LBL_ASSET = "Asset"
@@ -29,6 +36,14 @@ COLUMN_HEADERS = [
     COL_LBL_KIND,
     COL_LBL_STATUS
 ]
+COL_ASSET, COL_VERSION, COL_USER, COL_DATE, COL_KIND, COL_STATUS = range(len(COLUMN_HEADERS))
+FETCH_BATCH_SIZE = 200
+SORT_BATCH_SIZE = 500
+SETTINGS_EXPANDED_KINDS = "update_assets/expanded_kinds"
+LOADING_VERSIONS_TEXT = "loading versions..."
+ALL_STATUSES_TEXT = "All Statuses"
+ALL_KINDS_TEXT = "All Kinds"
+SEARCH_DEBOUNCE_MSEC = 150
 
 
 class ImportWidget(QWidget):
@@ -43,17 +58,62 @@ class ImportWidget(QWidget):
         # UI widgets
         # self.cmbo_bx_tasks = None
         self.lbl_tasks = None
+        self.line_edit_search = None
+        self.cmbo_bx_status = None
+        self.cmbo_bx_kind = None
+        self.chk_bx_outdated = None
+        self.search_timer = None
+        self.lbl_swap_status = None
+        self.prgrs_bar_swap = None
+        self.btn_cancel_swaps = None
         self.tree_view = None
         self.source_model = None
+        self.scene_watcher = None
+        self.settings = QSettings("br2", "update_assets")
+        expanded_kinds = self.settings.value(SETTINGS_EXPANDED_KINDS) or []
+        if isinstance(expanded_kinds, str):
+            # QSettings returns single item lists as a plain string.
+            expanded_kinds = [expanded_kinds]
+        self.expanded_kinds = set(expanded_kinds)
 
         self.setup_ui()
 
+    def apply_filter(self, *args):
+        """Filters the tree by the search text, status, kind and outdated only settings. Filtering needs
+        the fields of every root, so the roots that are not read yet are read first.
+        """
+        self.search_timer.stop()
+        status = self.cmbo_bx_status.currentData()
+        kind = self.cmbo_bx_kind.currentData()
+        proxy_model = self.tree_view.model()
+        proxy_model.set_filter(self.line_edit_search.text(), status, kind, self.chk_bx_outdated.isChecked())
+        if proxy_model.is_filtering():
+            self.source_model.fetch_all()
+            self.tree_view.expandAll()
+        else:
+            self.restore_expansion()
+
     def connect_signals(self):
         """
 
         """
-        self.source_model.itemChanged.connect(self.source_model.swap_ver)
         self.source_model.rows_updated.connect(self.resize_columns)
+        self.source_model.modelReset.connect(self.restore_expansion)
+        self.tree_view.model().rowsInserted.connect(self.restore_expansion)
+        self.tree_view.expanded.connect(self.save_expansion)
+        self.tree_view.collapsed.connect(self.save_expansion)
+        self.scene_watcher.roots_changed.connect(self.source_model.sync_roots)
+        self.scene_watcher.references_changed.connect(self.source_model.reconcile)
+        self.scene_watcher.scene_reset.connect(self.source_model.populate)
+        self.source_model.swap_queue.queue_changed.connect(self.update_swap_status)
+        self.source_model.swap_queue.job_updated.connect(self.update_swap_status)
+        self.btn_cancel_swaps.clicked.connect(self.source_model.swap_queue.cancel_all)
+        self.source_model.rows_updated.connect(self.update_filter_choices)
+        self.line_edit_search.textChanged.connect(lambda text: self.search_timer.start())
+        self.search_timer.timeout.connect(self.apply_filter)
+        self.cmbo_bx_status.currentIndexChanged.connect(self.apply_filter)
+        self.cmbo_bx_kind.currentIndexChanged.connect(self.apply_filter)
+        self.chk_bx_outdated.toggled.connect(self.apply_filter)
 
     def resize_columns(self):
         """
@@ -64,15 +124,54 @@ class ImportWidget(QWidget):
         header.resizeSections()
         # header.resizeSections(header.ResizeToContents)
 
+    def restore_expansion(self, *args):
+        """Expands the kind groups that were expanded when the dialog was last used. Only expanded groups read
+        their roots, see ModelImport.fetchMore.
+        """
+        proxy_model = self.tree_view.model()
+        for row in range(proxy_model.rowCount()):
+            index = proxy_model.index(row, 0)
+            if index.data() in self.expanded_kinds and not self.tree_view.isExpanded(index):
+                self.tree_view.expand(index)
+
+    def save_expansion(self, index):
+        """Remembers whether a kind group is expanded.
+
+        Args:
+            index (PySide2.QtCore.QModelIndex):
+        """
+        if index.parent().isValid():
+            return
+        if self.tree_view.isExpanded(index):
+            self.expanded_kinds.add(index.data())
+        else:
+            self.expanded_kinds.discard(index.data())
+        self.settings.setValue(SETTINGS_EXPANDED_KINDS, sorted(self.expanded_kinds))
+
     def setup_ui(self):
         """
 
         """
         self.tree_view = QTreeView(self)
         self.tree_view.setAlternatingRowColors(True)
+        self.tree_view.setUniformRowHeights(True)
+        self.scene_watcher = RootSceneWatcher(self)
+
+        # Filters
+        self.line_edit_search = QLineEdit(self)
+        self.line_edit_search.setPlaceholderText("Search assets, users and tasks")
+        self.line_edit_search.setClearButtonEnabled(True)
+        self.cmbo_bx_status = QComboBox(self)
+        self.cmbo_bx_status.addItem(ALL_STATUSES_TEXT, None)
+        self.cmbo_bx_kind = QComboBox(self)
+        self.cmbo_bx_kind.addItem(ALL_KINDS_TEXT, None)
+        self.chk_bx_outdated = QCheckBox("Outdated Only", self)
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DEBOUNCE_MSEC)
 
         # Model
-        proxy_model = QSortFilterProxyModel(self.tree_view)
+        proxy_model = RootFilterProxyModel(self.tree_view)
         self.source_model = ModelImport(self.tree_view)
         proxy_model.setSourceModel(self.source_model)
         self.tree_view.setModel(proxy_model)
@@ -95,16 +194,79 @@ class ImportWidget(QWidget):
         # lyt_h_tasks.addWidget(self.cmbo_bx_tasks)
         # lyt_v_main.addLayout(lyt_h_tasks)
 
+        lyt_h_filters = QHBoxLayout()
+        lyt_h_filters.addWidget(self.line_edit_search)
+        lyt_h_filters.addWidget(self.cmbo_bx_status)
+        lyt_h_filters.addWidget(self.cmbo_bx_kind)
+        lyt_h_filters.addWidget(self.chk_bx_outdated)
+        lyt_v_main.addLayout(lyt_h_filters)
+
         lyt_v_main.addWidget(self.tree_view)
+
+        lyt_h_swap = QHBoxLayout()
+        self.lbl_swap_status = QLabel(self)
+        self.prgrs_bar_swap = QProgressBar(self)
+        self.prgrs_bar_swap.setRange(0, 100)
+        self.btn_cancel_swaps = QPushButton("Cancel Pending", self)
+        lyt_h_swap.addWidget(self.lbl_swap_status)
+        lyt_h_swap.addWidget(self.prgrs_bar_swap)
+        lyt_h_swap.addWidget(self.btn_cancel_swaps)
+        lyt_v_main.addLayout(lyt_h_swap)
         self.setLayout(lyt_v_main)
 
         self.connect_signals()
 
         self.source_model.populate()
-        self.tree_view.expandAll()
+        self.scene_watcher.start()
+        self.update_swap_status()
 
-
-class ModelImport(QStandardItemModel):
+    def shutdown(self):
+        """Stops watching the scene and cancels the catalog fetches still in flight and the version swaps not
+        started yet, e.g. when the dialog closes.
+        """
+        self.scene_watcher.stop()
+        self.source_model.sort_timer.stop()
+        self.source_model.fetcher.cancel()
+        self.source_model.swap_queue.cancel_all()
+        # Keep the cmds trace and stage timings of the dialog's session, if they are on, see
+        # br2.dv_root_node.cmds_trace and br2.update_assets.stage_timing.
+        write_trace()
+        write_timings()
+
+    def update_filter_choices(self):
+        """Updates the status and kind filter choices to the values found in the scene."""
+        store = self.source_model.store
+        _set_combo_box_choices(self.cmbo_bx_status, ALL_STATUSES_TEXT, sorted(store.field_bits["status"]))
+        kinds = sorted(store.groups[gid] for gid in store.group_order)
+        _set_combo_box_choices(self.cmbo_bx_kind, ALL_KINDS_TEXT, kinds)
+
+    def update_swap_status(self, *args):
+        """Shows the progress of the version swap queue. The status widgets are hidden while the queue is idle."""
+        swap_queue = self.source_model.swap_queue
+        job = swap_queue.running_job
+        pending = swap_queue.pending_count
+        active = job is not None or pending > 0
+        self.lbl_swap_status.setVisible(active)
+        self.prgrs_bar_swap.setVisible(active)
+        self.btn_cancel_swaps.setVisible(active)
+        if not active:
+            return
+        if job is not None:
+            self.lbl_swap_status.setText("{}: {} | {} pending".format(job.node, job.describe(), pending))
+            self.prgrs_bar_swap.setValue(int(job.progress * 100))
+        else:
+            self.lbl_swap_status.setText("{} pending".format(pending))
+            self.prgrs_bar_swap.setValue(0)
+        self.btn_cancel_swaps.setEnabled(pending > 0)
+
+
+class ModelImport(QAbstractItemModel):
+    """Item model of the Update dialog.
+    Roots are held in a flat columnar RootStore and grouped by kind. Display values are
+    computed on demand in data() and version data is shared per Deliverable Package, so no
+    per-cell objects are allocated. Group rows use internal id 0, root rows the id of their
+    group plus one.
+    """
     # roles
     asset_data_role = Qt.UserRole
     latest_version_role = Qt.UserRole + 1
@@ -112,6 +274,13 @@ class ModelImport(QStandardItemModel):
     row_type_role = Qt.UserRole + 3
     vers_size_hint_width_role = Qt.UserRole + 4
     vers_text_role = Qt.UserRole + 5
+    loading_role = Qt.UserRole + 6
+    dpack_role = Qt.UserRole + 7
+    swap_state_role = Qt.UserRole + 8
+
+    # row types
+    row_type_kind = 0
+    row_type_root = 1
 
     # signal
     rows_updated = Signal()
@@ -122,10 +291,227 @@ class ModelImport(QStandardItemModel):
         Args:
             parent (PySide2.QtCore.QObject):
         """
-        self.column_label_indexes = {}
-
         super(ModelImport, self).__init__(parent)
 
+        self.store = RootStore()
+        self.text_widths = TextWidthCache(QApplication.font())
+        self.default_fg_color = QBrush(QColor.fromRgba(4291348680))  # from Maya stylesheet
+        self.outdated_bg_color = QBrush(Qt.yellow)
+        self.outdated_fg_color = QBrush(Qt.blue)
+
+        self.fetcher = CatalogFetcher(self)
+        self.fetcher.versions_fetched.connect(self.set_versions_data)
+        self.fetcher.fetch_failed.connect(self.set_versions_failed)
+
+        # Root kinds are read in batches between events once the model is populated, see sort_roots.
+        self.sort_timer = QTimer(self)
+        self.sort_timer.setSingleShot(True)
+        self.sort_timer.setInterval(0)
+        self.sort_timer.timeout.connect(self.sort_roots)
+
+        # Version swaps run in deferred chunks, see swap_ver. Jobs are kept per root uuid until
+        # they succeed or are cancelled, so failures stay visible on their row.
+        self.swap_jobs = {}
+        self.swap_queue = SwapJobQueue(self)
+        self.swap_queue.job_updated.connect(self.set_swap_job)
+        self.swap_queue.job_finished.connect(self.finish_swap_job)
+
+    def add_root(self, node_name):
+        """Inserts the row of a root, and the row of its kind group if it is not shown yet.
+
+        Args:
+            node_name (str): Name of the root node.
+        """
+        values = self._read_root(node_name)
+        kind = values["asset_type"]
+        if not self.store.group_is_visible(kind):
+            row = len(self.store.group_order)
+            self.beginInsertRows(QModelIndex(), row, row)
+            self.store.show_group(kind)
+            self.endInsertRows()
+
+        gid = self.store.group_ids[kind]
+        row = len(self.store.group_rows[gid])
+        self.beginInsertRows(self.group_index(gid), row, row)
+        self.store.add(**values)
+        self.endInsertRows()
+
+        if values["dpack_id"] not in self.store.versions:
+            self.fetcher.fetch(values["dpack_id"])
+
+    def canFetchMore(self, parent):
+        """
+
+        Args:
+            parent (PySide2.QtCore.QModelIndex):
+
+        Returns:
+            bool: True if the group has roots that are not read yet.
+        """
+        if not parent.isValid() or parent.internalId():
+            return False
+        return bool(self.store.group_pending[self.store.group_order[parent.row()]])
+
+    def columnCount(self, parent=QModelIndex()):
+        """
+
+        Args:
+            parent (PySide2.QtCore.QModelIndex):
+
+        Returns:
+            int:
+        """
+        return len(COLUMN_HEADERS)
+
+    def data(self, index, role=Qt.DisplayRole):
+        """
+
+        Args:
+            index (PySide2.QtCore.QModelIndex):
+            role (int):
+
+        Returns:
+            object:
+        """
+        if not index.isValid():
+            return None
+        store = self.store
+        column = index.column()
+        gid = index.internalId() - 1
+        if gid < 0:
+            if role == self.row_type_role:
+                return self.row_type_kind
+            if role == Qt.DisplayRole and column == 0:
+                return store.groups[store.group_order[index.row()]]
+            return None
+
+        rid = store.group_rows[gid][index.row()]
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            if column == COL_ASSET:
+                return store.node[rid]
+            if column == COL_VERSION:
+                return store.version[rid]
+            if column == COL_USER:
+                return store.user[rid]
+            if column == COL_DATE:
+                return store.date_created[rid]
+            if column == COL_KIND:
+                return store.file_type[rid]
+            if column == COL_STATUS:
+                return store.status[rid]
+            return None
+        if role == Qt.BackgroundRole:
+            return self.outdated_bg_color if self.is_outdated(rid) else None
+        if role == Qt.ForegroundRole:
+            return self.outdated_fg_color if self.is_outdated(rid) else self.default_fg_color
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter if column == COL_VERSION else None
+        if role == self.row_type_role:
+            return self.row_type_root
+        if role == self.node_role:
+            return store.node[rid]
+        if role == self.dpack_role:
+            return store.dpack_id[rid]
+
+        if column != COL_VERSION:
+            return None
+        job = self.swap_jobs.get(store.uuid[rid])
+        if role == self.swap_state_role:
+            return job.describe() if job is not None else None
+        if role == Qt.ToolTipRole and job is not None and job.state == SwapJob.FAILED:
+            return job.describe()
+        versions = store.versions.get(store.dpack_id[rid])
+        if role == self.loading_role:
+            return versions is None
+        if versions is None:
+            return None
+        if role == self.asset_data_role:
+            return versions.table
+        if role == self.latest_version_role:
+            return versions.latest
+        if role == self.vers_size_hint_width_role:
+            return versions.width
+        if role == self.vers_text_role:
+            return versions.texts
+        if role == Qt.ToolTipRole and versions.error is not None:
+            return "Unable to load versions: {}".format(versions.error)
+        return None
+
+    def finish_swap_job(self, job):
+        """Updates the row of a root whose version swap finished.
+
+        Args:
+            job (SwapJob): Finished job.
+        """
+        if job.state == SwapJob.FAILED:
+            self.swap_jobs[job.uuid] = job
+        else:
+            self.swap_jobs.pop(job.uuid, None)
+        rid = self.store.rid_by_uuid.get(job.uuid)
+        if rid is None:
+            return
+        node_name = get_node_name(job.uuid)
+        if node_name is not None and job.state == SwapJob.DONE:
+            self.refresh_root(rid, node_name)
+            rid = self.store.rid_by_uuid.get(job.uuid)
+            if rid is None:
+                return
+        index = self.index_from_record(rid, COL_VERSION)
+        self.dataChanged.emit(index, index)
+        self.rows_updated.emit()
+
+    def fetch_all(self):
+        """Reads the pending roots of every group."""
+        self.sort_roots(count=None)
+        for gid in list(self.store.group_order):
+            while self.store.group_pending[gid] and gid in self.store.group_order:
+                self.fetchMore(self.group_index(gid))
+
+    def flags(self, index):
+        """
+
+        Args:
+            index (PySide2.QtCore.QModelIndex):
+
+        Returns:
+            PySide2.QtCore.Qt.ItemFlags:
+        """
+        flags = super(ModelImport, self).flags(index)
+        if index.isValid() and index.internalId() and index.column() == COL_VERSION:
+            versions = self.store.versions.get(self.store.dpack_id[self.record_id(index)])
+            if versions is not None and versions.texts:
+                flags |= Qt.ItemIsEditable
+        return flags
+
+    @trace_action("Update: read roots")
+    def fetchMore(self, parent):
+        """Reads the next batch of pending roots of a group.
+
+        Args:
+            parent (PySide2.QtCore.QModelIndex):
+        """
+        if not self.canFetchMore(parent):
+            return
+        gid = self.store.group_order[parent.row()]
+        values = []
+        for node_name, uuid in self.store.take_pending(gid, FETCH_BATCH_SIZE):
+            node_name = get_node_name(uuid)
+            if node_name is not None:
+                values.append(self._read_root(node_name))
+        if values:
+            row = len(self.store.group_rows[gid])
+            self.beginInsertRows(parent, row, row + len(values) - 1)
+            for value in values:
+                self.store.add(**value)
+            self.endInsertRows()
+
+        # Version data is fetched in the background, see set_versions_data.
+        for value in values:
+            if value["dpack_id"] not in self.store.versions:
+                self.fetcher.fetch(value["dpack_id"])
+        self._hide_group_if_empty(gid)
+        self.rows_updated.emit()
+
     def get_column_header_label(self, index):
         """
 
@@ -135,138 +521,500 @@ class ModelImport(QStandardItemModel):
         Returns:
             str:
         """
-        return self.horizontalHeaderItem(index.column()).text()
+        return COLUMN_HEADERS[index.column()]
+
+    def group_index(self, gid):
+        """
+
+        Args:
+            gid (int): Group id.
+
+        Returns:
+            PySide2.QtCore.QModelIndex:
+        """
+        return self.createIndex(self.store.group_order.index(gid), 0, 0)
+
+    def hasChildren(self, parent=QModelIndex()):
+        """
+
+        Args:
+            parent (PySide2.QtCore.QModelIndex):
+
+        Returns:
+            bool:
+        """
+        if not parent.isValid():
+            return bool(self.store.group_order)
+        if parent.internalId() or parent.column() != 0:
+            return False
+        return not self.store.group_is_empty(self.store.group_order[parent.row()])
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        """
+
+        Args:
+            section (int):
+            orientation (PySide2.QtCore.Qt.Orientation):
+            role (int):
+
+        Returns:
+            object:
+        """
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole:
+            return COLUMN_HEADERS[section]
+        return super(ModelImport, self).headerData(section, orientation, role)
+
+    def index(self, row, column, parent=QModelIndex()):
+        """
 
+        Args:
+            row (int):
+            column (int):
+            parent (PySide2.QtCore.QModelIndex):
+
+        Returns:
+            PySide2.QtCore.QModelIndex:
+        """
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        if not parent.isValid():
+            return self.createIndex(row, column, 0)
+        return self.createIndex(row, column, self.store.group_order[parent.row()] + 1)
+
+    def index_from_record(self, rid, column=0):
+        """
+
+        Args:
+            rid (int): Record id.
+            column (int):
+
+        Returns:
+            PySide2.QtCore.QModelIndex:
+        """
+        return self.createIndex(self.store.record_row[rid], column, self.store.record_group[rid] + 1)
+
+    def is_outdated(self, rid):
+        """Whether a root is behind the latest version of its Deliverable Package.
+
+        Args:
+            rid (int): Record id.
+
+        Returns:
+            bool:
+        """
+        versions = self.store.versions.get(self.store.dpack_id[rid])
+        if versions is None or versions.latest is None:
+            return False
+        return versions.latest != version_number(self.store.version[rid])
+
+    def parent(self, index):
+        """
+
+        Args:
+            index (PySide2.QtCore.QModelIndex):
+
+        Returns:
+            PySide2.QtCore.QModelIndex:
+        """
+        if not index.isValid() or not index.internalId():
+            return QModelIndex()
+        gid = index.internalId() - 1
+        return self.createIndex(self.store.group_order.index(gid), 0, 0)
+
+    @trace_action("Update: populate")
     def populate(self):
         """
 
         """
+        self.fetcher.cancel()
+        self.swap_queue.cancel_all()
+        self.swap_jobs.clear()
+        self.sort_timer.stop()
+
+        # Nothing is read from the roots up front. Their kinds are read in batches once the tree is
+        # shown, see sort_roots, and their rows when their group is expanded or scrolled, see fetchMore.
         self.beginResetModel()
-        self.clear()
-        self.setHorizontalHeaderLabels(COLUMN_HEADERS)
+        self.store.clear()
+        for node_name, uuid, kind_attr in get_all_dv_roots():
+            self.store.add_unsorted(node_name, uuid, kind_attr)
         self.endResetModel()
-
-        kinds = {}
-        for node_name in get_all_dv_root_nodes():
-            node_handler = MayaRootHandler(node_name)
-            kind = node_handler.asset_type
-            if kinds.get(kind) is None:
-                kinds[kind] = QStandardItem(kind)
-                self.invisibleRootItem().appendRow(kinds.get(kind))
-            item_kind = kinds.get(kind)
-
-            items_row = []
-            version_item = None
-            for c in range(self.columnCount()):
-                column = self.horizontalHeaderItem(c).text()
-                if column not in self.column_label_indexes:
-                    self.column_label_indexes[column] = c
-                item = QStandardItem()
-                if column != COL_LBL_VERSION:
-                    item.setEditable(False)
-                else:
-                    version_item = item
-                    item.setTextAlignment(Qt.AlignCenter)
-                items_row.append(item)
-            item_kind.appendRow(items_row)
-
-            # Get all versions data from asset.
-            current_row = item_kind.rowCount() - 1
-            index_version = self.index(
-                current_row, self.column_label_indexes[COL_LBL_VERSION], self.indexFromItem(item_kind))
-            versions_data = get_versions_data(node_handler.dpack_id)
-            latest_version = sorted([v.version_fc for v in versions_data])[-1]
-
-            version_text = {}
-            max_width_size = None
-            for asset in sorted(versions_data, key=lambda x: x.version_fc, reverse=True):
-                text = "{} | {} | {} | {}".format(asset.version_fc, asset.user, asset.date_created, asset.status)
-                version_text[asset.version_fc] = text
-                document = QTextDocument(text)
-                size = document.idealWidth() + 10  # width of combo box text plus arrow control
-                if max_width_size is None or size > max_width_size:
-                    max_width_size = size
-
-            self.blockSignals(True)
-            self.setData(index_version, versions_data, role=self.asset_data_role)
-            self.setData(index_version, latest_version, role=self.latest_version_role)
-            self.setData(index_version, node_name, role=self.node_role)
-            self.setData(index_version, max_width_size, role=self.vers_size_hint_width_role)
-            self.setData(index_version, version_text, role=self.vers_text_role)
-            self.blockSignals(False)
-
-            self.update_row(version_item, initialize=True)
+        self.sort_timer.start()
         self.rows_updated.emit()
 
-    def swap_ver(self, item):
+    def record_id(self, index):
         """
 
         Args:
-            item (PySide2.QtGui.QStandardItem):
+            index (PySide2.QtCore.QModelIndex): Index of a root row.
+
+        Returns:
+            int: Record id.
+        """
+        return self.store.group_rows[index.internalId() - 1][index.row()]
+
+    @trace_action("Update: reconcile")
+    def reconcile(self):
+        """Inserts and removes rows so that the model holds exactly the roots in the scene, e.g. after
+        references were loaded or unloaded.
+        """
+        scene_uuids = set(get_all_dv_root_uuids())
+        model_uuids = set(self.store.rid_by_uuid).union(self.store.pending_uuids)
+        self.sync_roots(sorted(scene_uuids.symmetric_difference(model_uuids)))
+
+    def refresh_root(self, rid, node_name=None):
+        """Re-reads a root from its node, emitting dataChanged only if any of its fields changed.
+
+        Args:
+            rid (int): Record id.
+            node_name (str|None): Name of the root node. Defaults to the stored name.
         """
-        index = self.indexFromItem(item)
-        model = index.model()
-        if self.get_column_header_label(index) != COL_LBL_VERSION:
+        store = self.store
+        values = self._read_root(node_name or store.node[rid])
+        if values["asset_type"] != store.asset_type[rid]:
+            # Kind changed, move the row to its new group.
+            self.remove_root(rid)
+            self.add_root(values["node"])
             return
-        versions = model.data(index, self.asset_data_role)
-        node = model.data(index, self.node_role)
-        version = item.text()
-        new_ver = [v for v in versions if v.version_fc == version][0]
 
-        swap_version(node, new_ver)
+        if values["dpack_id"] != store.dpack_id[rid]:
+            store.rows_by_dpack[store.dpack_id[rid]].remove(rid)
+            store.rows_by_dpack.setdefault(values["dpack_id"], []).append(rid)
+            if values["dpack_id"] not in store.versions:
+                self.fetcher.fetch(values["dpack_id"])
+
+        changed = False
+        for field, value in values.items():
+            if getattr(store, field)[rid] != value:
+                store.set(rid, field, value)
+                changed = True
+        if changed:
+            self.dataChanged.emit(self.index_from_record(rid, 0), self.index_from_record(rid, self.columnCount() - 1))
+
+    def remove_root(self, rid):
+        """Removes the row of a root, and the row of its kind group if it becomes empty.
+
+        Args:
+            rid (int): Record id.
+        """
+        gid = self.store.record_group[rid]
+        row = self.store.record_row[rid]
+        self.beginRemoveRows(self.group_index(gid), row, row)
+        self.store.remove(rid)
+        self.endRemoveRows()
+        self._hide_group_if_empty(gid)
+
+    def rowCount(self, parent=QModelIndex()):
+        """
+
+        Args:
+            parent (PySide2.QtCore.QModelIndex):
+
+        Returns:
+            int:
+        """
+        if not parent.isValid():
+            return len(self.store.group_order)
+        if parent.internalId() or parent.column() != 0:
+            return 0
+        return len(self.store.group_rows[self.store.group_order[parent.row()]])
+
+    def setData(self, index, value, role=Qt.EditRole):
+        """
+
+        Args:
+            index (PySide2.QtCore.QModelIndex):
+            value (object):
+            role (int):
+
+        Returns:
+            bool:
+        """
+        if role != Qt.EditRole or not index.isValid() or not index.internalId() or index.column() != COL_VERSION:
+            return False
+        return self.swap_ver(index, version_number(value))
+
+    def set_swap_job(self, job):
+        """Shows the state of a queued or running version swap on the row of its root.
+
+        Args:
+            job (SwapJob): Job.
+        """
+        self.swap_jobs[job.uuid] = job
+        rid = self.store.rid_by_uuid.get(job.uuid)
+        if rid is not None:
+            index = self.index_from_record(rid, COL_VERSION)
+            self.dataChanged.emit(index, index)
 
-        self.update_row(item)
+    def set_versions_data(self, dpack_id, versions_data):
+        """Applies fetched version data to all rows of the Deliverable Package.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+            versions_data (VersionTable): Versions of the Deliverable Package.
+        """
+        self.fetcher.finish(dpack_id)
+        versions = DpackVersions(versions_data)
+        for text in versions.texts.values():
+            size = self.text_widths.width(text) + 10  # width of combo box text plus arrow control
+            if versions.width is None or size > versions.width:
+                versions.width = size
+        self.store.set_versions(dpack_id, versions)
+        self._emit_dpack_changed(dpack_id)
         self.rows_updated.emit()
 
-    def update_row(self, version_item, initialize=False):
+    def set_versions_failed(self, dpack_id, error):
+        """Clears the loading state of the rows of a Deliverable Package whose fetch failed.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+            error (str): Error message.
         """
+        self.fetcher.finish(dpack_id)
+        self.store.set_versions(dpack_id, DpackVersions(error=error))
+        self._emit_dpack_changed(dpack_id)
+
+    def swap_ver(self, index, version):
+        """Queues a version swap. The row is refreshed once the swap finishes, see finish_swap_job.
 
         Args:
-            version_item (PySide2.QtGui.QStandardItem):
-            initialize (bool):
+            index (PySide2.QtCore.QModelIndex): Index of a root row.
+            version (int): Version number.
+
+        Returns:
+            bool: True if the version swap was queued.
         """
-        index = self.indexFromItem(version_item)
-        node_name = self.data(index, self.node_role)
-        node_handler = MayaRootHandler(node_name)
-        latest_ver = self.data(index, self.latest_version_role)
-        version = node_handler.version
-
-        bg_color = None
-        fg_color = QColor.fromRgba(4291348680)  # from Maya stylesheet
-        if latest_ver != version:
-            bg_color = Qt.yellow
-            fg_color = Qt.blue
-        for c in range(self.columnCount()):
-            idx = index.siblingAtColumn(c)
-            cur_item = self.itemFromIndex(idx)
-            column_header_label = self.get_column_header_label(idx)
-
-            # update colors
-            if initialize and column_header_label == COL_LBL_VERSION:
-                self.blockSignals(True)
-            cur_item.setBackground(QBrush(bg_color))
-            cur_item.setForeground(QBrush(fg_color))
-            if initialize and column_header_label == COL_LBL_VERSION:
-                self.blockSignals(False)
-
-            # update item text
-            if initialize:
-                if column_header_label == COL_LBL_ASSET:
-                    cur_item.setText(node_name)
-                elif column_header_label == COL_LBL_VERSION:
-                    self.blockSignals(True)
-                    cur_item.setText(version)
-                    self.blockSignals(False)
-                elif column_header_label == COL_LBL_KIND:
-                    cur_item.setText(node_handler.file_type)
-            if column_header_label in [COL_LBL_ASSET, COL_LBL_VERSION]:
+        rid = self.record_id(index)
+        versions = self.store.versions.get(self.store.dpack_id[rid])
+        new_ver = versions.find(version) if versions is not None else None
+        if new_ver is None:
+            return False
+
+        self.swap_queue.submit(self.store.uuid[rid], new_ver)
+        return True
+
+    @trace_action("Update: sync roots")
+    def sync_roots(self, uuids):
+        """Updates the rows of the given roots to match the scene, inserting, removing or refreshing
+        only the rows that changed.
+
+        Args:
+            uuids (list[str]): UUIDs of added, removed or changed roots.
+        """
+        for uuid in uuids:
+            node_name = get_node_name(uuid)
+            if uuid in self.store.pending_uuids:
+                # Roots that are not read yet are read when their group is fetched.
+                if node_name is None:
+                    self._hide_group_if_empty(self.store.discard_pending(uuid))
                 continue
-            if column_header_label == COL_LBL_USER:
-                cur_item.setText(node_handler.user)
-            elif column_header_label == COL_LBL_DATE:
-                cur_item.setText(node_handler.date_created)
-            elif column_header_label == COL_LBL_STATUS:
-                cur_item.setText(node_handler.status)
+            rid = self.store.rid_by_uuid.get(uuid)
+            if node_name is None:
+                if rid is not None:
+                    self.remove_root(rid)
+            elif rid is None:
+                self.add_root(node_name)
+            else:
+                self.refresh_root(rid, node_name)
+        self.rows_updated.emit()
+
+    @trace_action("Update: sort roots")
+    def sort_roots(self, count=SORT_BATCH_SIZE):
+        """Reads the kinds of the next unsorted roots and adds them to their groups as pending roots,
+        inserting the rows of new groups. Schedules the next batch while roots are left.
+
+        Args:
+            count (int|None): Maximum number of roots to sort. Defaults to SORT_BATCH_SIZE, None sorts all roots.
+        """
+        batch = self.store.take_unsorted(len(self.store.unsorted) if count is None else count)
+        fetched_gids = set()
+        for node_name, uuid, kind_attr in batch:
+            kind = get_dv_root_kind(uuid, kind_attr)
+            if kind is None:
+                continue
+            if self.store.group_is_visible(kind):
+                gid = self.store.add_pending(kind, node_name, uuid)
+            else:
+                row = len(self.store.group_order)
+                self.beginInsertRows(QModelIndex(), row, row)
+                gid = self.store.add_pending(kind, node_name, uuid)
+                self.endInsertRows()
+            if self.store.group_rows[gid]:
+                # The group was expanded already, the view won't ask for its new roots.
+                fetched_gids.add(gid)
+        for gid in fetched_gids:
+            self.fetchMore(self.group_index(gid))
+        if self.store.unsorted and count is not None:
+            self.sort_timer.start()
+        if batch:
+            self.rows_updated.emit()
+
+    def _hide_group_if_empty(self, gid):
+        """Removes the row of a group that holds no roots anymore.
+
+        Args:
+            gid (int): Group id.
+        """
+        if gid not in self.store.group_order or not self.store.group_is_empty(gid):
+            return
+        row = self.store.group_order.index(gid)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        self.store.hide_group(gid)
+        self.endRemoveRows()
+
+    def _read_root(self, node_name):
+        """Reads the fields of a root from its node.
+
+        Args:
+            node_name (str): Name of the root node.
+
+        Returns:
+            dict: Field values, see RootStore.FIELDS.
+        """
+        node_handler = MayaRootHandler(node_name)
+        return {
+            "node": node_name,
+            "uuid": node_handler.uuid,
+            "asset_type": node_handler.asset_type,
+            "dpack_id": node_handler.dpack_id,
+            "version": node_handler.version,
+            "user": node_handler.user,
+            "date_created": node_handler.date_created,
+            "file_type": node_handler.file_type,
+            "status": node_handler.status,
+            "task": node_handler.task,
+        }
+
+    def _emit_dpack_changed(self, dpack_id):
+        """Emits dataChanged for all rows of a Deliverable Package.
+
+        Args:
+            dpack_id (int): Deliverable Package ID.
+        """
+        last_column = self.columnCount() - 1
+        for rid in self.store.rows_by_dpack.get(dpack_id, []):
+            self.dataChanged.emit(self.index_from_record(rid, 0), self.index_from_record(rid, last_column))
+
+
+class RootFilterProxyModel(QSortFilterProxyModel):
+    """Filters the roots of a ModelImport by search text, status, kind and outdated state.
+    The matching roots are computed as a bitset from the indexes of the model's RootStore, once
+    per change of the filter or of the store, so accepting a row is a single bit test. Groups are
+    shown if any of their roots match.
+    """
+
+    def __init__(self, parent=None):
+        """
+
+        Args:
+            parent (PySide2.QtCore.QObject):
+        """
+        super(RootFilterProxyModel, self).__init__(parent)
+
+        self.search_text = ""
+        self.status = None
+        self.kind = None
+        self.outdated_only = False
+        self._matches = 0
+        self._groups = set()
+        self._revision = None
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        """
+
+        Args:
+            source_row (int):
+            source_parent (PySide2.QtCore.QModelIndex):
+
+        Returns:
+            bool:
+        """
+        if not self.is_filtering():
+            return True
+        store = self.sourceModel().store
+        self._update_matches()
+        if not source_parent.isValid():
+            return store.group_order[source_row] in self._groups
+        rid = store.group_rows[store.group_order[source_parent.row()]][source_row]
+        return bool(self._matches >> rid & 1)
+
+    def is_filtering(self):
+        """
+
+        Returns:
+            bool: True if any filter is set.
+        """
+        return bool(self.search_text.strip()) or self.status is not None or self.kind is not None or self.outdated_only
+
+    def set_filter(self, search_text, status=None, kind=None, outdated_only=False):
+        """Sets the filters and re-filters the rows.
+
+        Args:
+            search_text (str): Words matching the start of words of the root names, users or tasks.
+            status (str|None): Status of the roots to show, None for all.
+            kind (str|None): Kind of the roots to show, None for all.
+            outdated_only (bool): Whether to only show roots behind the latest version.
+        """
+        self.search_text = search_text
+        self.status = status
+        self.kind = kind
+        self.outdated_only = outdated_only
+        self._revision = None
+        self.invalidateFilter()
+
+    def _update_matches(self):
+        """Recomputes the matching roots if the filters or the store changed."""
+        model = self.sourceModel()
+        store = model.store
+        if self._revision == store.revision:
+            return
+        matches = store.search(self.search_text)
+        if self.status is not None:
+            matches &= store.field_bits["status"].get(self.status, 0)
+        if self.kind is not None:
+            matches &= store.field_bits["asset_type"].get(self.kind, 0)
+        if self.outdated_only:
+            outdated = 0
+            for rids in store.rows_by_dpack.values():
+                for rid in rids:
+                    if model.is_outdated(rid):
+                        outdated |= 1 << rid
+            matches &= outdated
+        groups = {store.record_group[rid] for rid in store.rid_by_uuid.values() if matches >> rid & 1}
+
+        if self._revision is not None and groups != self._groups:
+            # The store changed under a shown filter. Rows are re-filtered as they change, but their
+            # groups are not, so re-filter everything once the current change is processed.
+            QTimer.singleShot(0, self.invalidateFilter)
+        self._matches = matches
+        self._groups = groups
+        self._revision = store.revision
+
+
+class TextWidthCache(object):
+    """Memoized text width measurement. Each unique string is measured once."""
+
+    def __init__(self, font):
+        """Initializer.
+
+        Args:
+            font (PySide2.QtGui.QFont): Font the text is displayed with.
+        """
+        self.font_metrics = QFontMetrics(font)
+        self._widths = {}
+
+    def width(self, text):
+        """The width of a text.
+
+        Args:
+            text (str): Text.
+
+        Returns:
+            int: Width in pixels.
+        """
+        width = self._widths.get(text)
+        if width is None:
+            width = self._widths[text] = self.font_metrics.horizontalAdvance(text)
+        return width
 
 
 class TreeDelegate(QStyledItemDelegate):
@@ -278,6 +1026,9 @@ class TreeDelegate(QStyledItemDelegate):
         """
         super(TreeDelegate, self).__init__(parent)
 
+        # Combo box contents per dpack_id, as (version texts, item model) pairs.
+        self._editor_models = {}
+
     def createEditor(self, parent, option, index):
         """Returns the editor to be used for editing the data item with the given index. Note that the index contains
         information about the model being used. The editor’s parent widget is specified by parent, and the item options
@@ -291,12 +1042,57 @@ class TreeDelegate(QStyledItemDelegate):
         Returns:
             PySide2.QtWidgets.QWidget:
         """
-        idx = index.model().mapToSource(index)
-        model = idx.model()
-        if model.get_column_header_label(idx) == COL_LBL_VERSION:
+        if index.column() == COL_VERSION:
             return QComboBox(parent)
         return super(TreeDelegate, self).createEditor(parent, option, index)
 
+    def editor_model(self, index):
+        """The combo box contents of a version cell. Contents are built once per dpack and shared by all editors
+        until the dpack's versions change.
+
+        Args:
+            index (PySide2.QtCore.QModelIndex):
+
+        Returns:
+            PySide2.QtGui.QStandardItemModel:
+        """
+        dpack_id = index.data(ModelImport.dpack_role)
+        ver_text_dict = index.data(ModelImport.vers_text_role)
+        cached = self._editor_models.get(dpack_id)
+        if cached is not None and cached[0] is ver_text_dict:
+            return cached[1]
+
+        model = QStandardItemModel(self)
+        for i, ver in enumerate(sorted(ver_text_dict, reverse=True)):
+            item = QStandardItem(ver_text_dict[ver])
+            item.setData(ver, Qt.UserRole)
+            if i == 0:
+                # Set color
+                item.setBackground(QBrush(Qt.green))
+                item.setForeground(QBrush(Qt.magenta))
+            model.appendRow(item)
+        if cached is not None:
+            cached[1].deleteLater()
+        self._editor_models[dpack_id] = (ver_text_dict, model)
+        return model
+
+    def initStyleOption(self, option, index):
+        """Initializes option with the values of the given index. Rows whose versions are still being fetched
+        are marked as loading, and rows with a queued, running or failed version swap show its state.
+
+        Args:
+            option (PySide2.QtWidgets.QStyleOptionViewItem):
+            index (PySide2.QtCore.QModelIndex):
+        """
+        super(TreeDelegate, self).initStyleOption(option, index)
+        if index.column() != COL_VERSION:
+            return
+        if index.data(ModelImport.loading_role):
+            option.text = "{} ({})".format(option.text, LOADING_VERSIONS_TEXT)
+        swap_state = index.data(ModelImport.swap_state_role)
+        if swap_state:
+            option.text = "{} ({})".format(option.text, swap_state)
+
     def setEditorData(self, editor, index):
         """Sets the data for the item at the given index in the model to the contents of the given editor.
 
@@ -304,22 +1100,10 @@ class TreeDelegate(QStyledItemDelegate):
             editor (PySide2.QtWidgets.QWidget):
             index (PySide2.QtCore.QModelIndex):
         """
-        idx = index.model().mapToSource(index)
-        model = idx.model()
-        if model.get_column_header_label(idx) == COL_LBL_VERSION:
-            current_ver = model.data(idx, role=Qt.DisplayRole)
-            current_ver_index = None
+        if index.column() == COL_VERSION:
             editor.view().setAlternatingRowColors(True)
-            ver_text_dict = model.data(idx, role=model.vers_text_role)
-            for i, ver in enumerate(sorted(ver_text_dict, reverse=True)):
-                editor.addItem(ver_text_dict[ver], userData=ver)
-                if i == 0:
-                    # Set color
-                    editor.setItemData(i, QBrush(Qt.green), role=Qt.BackgroundRole)
-                    editor.setItemData(i, QBrush(Qt.magenta), role=Qt.ForegroundRole)
-                if current_ver == ver:
-                    current_ver_index = i
-            editor.setCurrentIndex(current_ver_index)
+            editor.setModel(self.editor_model(index))
+            editor.setCurrentIndex(editor.findData(version_number(index.data(Qt.DisplayRole)), Qt.UserRole))
             return
         return super(TreeDelegate, self).setEditorData(editor, index)
 
@@ -331,8 +1115,7 @@ class TreeDelegate(QStyledItemDelegate):
             model (PySide2.QtCore.QSortFilterProxyModel):
             index (PySide2.QtCore.QModelIndex):
         """
-        idx = model.mapToSource(index)
-        if model.sourceModel().get_column_header_label(idx) == COL_LBL_VERSION:
+        if index.column() == COL_VERSION:
             model.setData(index, editor.itemData(editor.currentIndex(), role=Qt.UserRole))
             return
         return super(TreeDelegate, self).setModelData(editor, model, index)
@@ -347,17 +1130,36 @@ class TreeDelegate(QStyledItemDelegate):
         Returns:
             PySide2.QtCore.QSize:
         """
-        proxy_model = index.model()
-        idx = proxy_model.mapToSource(index)
-        model = proxy_model.sourceModel()
-        if (model.get_column_header_label(idx) == COL_LBL_VERSION
-                and not model.itemFromIndex(idx.siblingAtColumn(0)).hasChildren()):
-            size = QSize(model.data(idx, role=model.vers_size_hint_width_role) + 10, option.fontMetrics.height())
-            return size
+        if index.column() == COL_VERSION:
+            width = index.data(ModelImport.vers_size_hint_width_role)
+            if width is not None:
+                return QSize(width + 10, option.fontMetrics.height())
 
         return super(TreeDelegate, self).sizeHint(option, index)
 
 
+def _set_combo_box_choices(combo_box, all_text, values):
+    """Replaces the choices of a filter combo box, keeping the current choice if it is still available.
+
+    Args:
+        combo_box (PySide2.QtWidgets.QComboBox):
+        all_text (str): Text of the choice that disables the filter.
+        values (list[str]): Values to choose from.
+    """
+    if [combo_box.itemData(i) for i in range(1, combo_box.count())] == values:
+        return
+    current = combo_box.currentData()
+    combo_box.blockSignals(True)
+    combo_box.clear()
+    combo_box.addItem(all_text, None)
+    for value in values:
+        combo_box.addItem(value, value)
+    combo_box.setCurrentIndex(max(combo_box.findData(current), 0) if current is not None else 0)
+    combo_box.blockSignals(False)
+    if combo_box.currentData() != current:
+        combo_box.currentIndexChanged.emit(combo_box.currentIndex())
+
+
 def get_maya_main_window():
     """Get the Maya main window.
 
@@ -373,6 +1175,7 @@ if __name__ == "__main__":
     dialog = QDialog(get_maya_main_window())
     dialog.setWindowTitle("Update")
     import_widget = ImportWidget(dialog)
+    dialog.finished.connect(import_widget.shutdown)
     lyt_v_dialog = QVBoxLayout()
     lyt_v_dialog.addWidget(import_widget)
     dialog.setLayout(lyt_v_dialog)
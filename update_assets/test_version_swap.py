@@ -1,12 +1,23 @@
+import logging
+import os
 import sys
 
 maya_path = r"C:\Users\john.russell\Code\git_stuff\dreamview-studios-inc\DreamViewStudios\application\maya"
 if maya_path not in sys.path:
     sys.path.append(maya_path)
 
+from br2.dv_root_node.cmds_trace import cmds
 from br2.dv_root_node.node_handler import MayaRootHandler
+from br2.update_assets.instancing import add_instances, get_content_file, get_instance_roots
+from br2.update_assets.representation import get_representation_path
+from br2.update_assets.stage_timing import OperationTimer
+from br2.update_assets.test_db import AssetData
 
-import maya.cmds as cmds
+
+LOGGER = logging.getLogger(__name__)
+SWAP_STAGES = ("unload", "reference", "update root")
+# Yielded instead of the stages by swaps of roots that already hold the version.
+SWAP_SKIPPED = "skipped"
 
 
 class Asset(object):
@@ -14,61 +25,138 @@ class Asset(object):
         pass
 
 
-def reference_and_reparent(filepath, parent_node=None):
+def reference_and_reparent(filepath, parent_node=None, timer=None):
     """Imports the maya scene residing at filepath, and re-parents the contents to parent_node.
 
     Args:
         filepath (str): Filepath.
         parent_node (None|str): Name of parent node to which contents are to re-parent.
+        timer (OperationTimer|None): Timer of the calling operation. Defaults to timing the load as
+            a "reference_and_reparent" operation of its own.
 
     Returns:
         None|str: New reference node.
+
+    Raises:
+        RuntimeError: If the file could not be referenced.
     """
-    existing_ref_nodes = cmds.ls(type="reference")
-    top_level_nodes_before = cmds.ls(assemblies=True)
-    file_type = cmds.file(filepath, query=True, type=True)[0]
+    own_timer = timer is None
+    if own_timer:
+        timer = OperationTimer("reference_and_reparent")
+    timer.tag_file(filepath)
     try:
-        imported_nodes = cmds.file(
-            filepath,
-            reference=True,
-            type=file_type,
-            ignoreVersion=True,
-            mergeNamespacesOnClash=True,
-            namespace=":",
-            groupLocator=False,
-            returnNewNodes=True,
-            options="v=1")
-    except RuntimeError:
-        print("Possible problem with referenced file: {}".format(filepath))
-        return
+        with timer.stage("discover nodes"):
+            existing_ref_nodes = cmds.ls(type="reference")
+            top_level_nodes_before = cmds.ls(assemblies=True)
+        with timer.stage("file type"):
+            file_type = cmds.file(filepath, query=True, type=True)[0]
+        try:
+            with timer.stage("reference"):
+                imported_nodes = cmds.file(
+                    filepath,
+                    reference=True,
+                    type=file_type,
+                    ignoreVersion=True,
+                    mergeNamespacesOnClash=True,
+                    namespace=":",
+                    groupLocator=False,
+                    returnNewNodes=True,
+                    options="v=1")
+        except RuntimeError as e:
+            if not set(cmds.ls(type="reference")) - set(existing_ref_nodes):
+                raise RuntimeError(f'Unable to reference "{filepath}": {e}') from e
+            # Maya raises for errors in the file it referenced anyway.
+            LOGGER.warning('Possible problem with referenced file: "%s": %s', filepath, e)
+            timer.error = None
+
+        with timer.stage("discover nodes"):
+            top_level_nodes_after = cmds.ls(assemblies=True)
+
+            imported_top_level_nodes = list(set(top_level_nodes_after) - set(top_level_nodes_before))
+
+        with timer.stage("reparent"):
+            if parent_node is not None:
+                for node in imported_top_level_nodes:
+                    if cmds.nodeType(node) == "transform":
+                        # TODO: Is there a way to lock just the transform attrs of nodes
+                        #   from the reference file.  Normal locking of individual
+                        #   attributes apparently isn't allowed.  And using 'file'
+                        #   command's -lockReferences flag prevent reparenting
+                        #   the contents.
+
+                        node_parent = cmds.listRelatives(node, parent=True, fullPath=True)
+                        if node_parent is None:
+                            cmds.parent(node, parent_node, relative=True)
+
+        with timer.stage("discover nodes"):
+            ref_nodes = cmds.ls(type="reference")
+            new_ref_nodes = list(set(ref_nodes) - set(existing_ref_nodes))
+
+        return new_ref_nodes[0]
+    finally:
+        if own_timer:
+            timer.finish()
 
-    top_level_nodes_after = cmds.ls(assemblies=True)
 
-    imported_top_level_nodes = list(set(top_level_nodes_after) - set(top_level_nodes_before))
+def swap_version(node, new_version):
+    """Swaps the version loaded under a root node, see iter_swap_version_steps.
 
-    if parent_node is not None:
-        for node in imported_top_level_nodes:
-            if cmds.nodeType(node) == "transform":
-                # TODO: Is there a way to lock just the transform attrs of nodes
-                #   from the reference file.  Normal locking of individual
-                #   attributes apparently isn't allowed.  And using 'file'
-                #   command's -lockReferences flag prevent reparenting
-                #   the contents.
+    Args:
+        node (str): Name of the root node.
+        new_version (AssetData): Version to load.
 
-                node_parent = cmds.listRelatives(node, parent=True, fullPath=True)
-                if node_parent is None:
-                    cmds.parent(node, parent_node, relative=True)
+    Returns:
+        bool: False if the swap was skipped, the root already holding the version.
+    """
+    for stage in iter_swap_version_steps(node, new_version):
+        if stage == SWAP_SKIPPED:
+            return False
+    return True
 
-    ref_nodes = cmds.ls(type="reference")
-    new_ref_nodes = list(set(ref_nodes) - set(existing_ref_nodes))
 
-    return new_ref_nodes[0]
+def iter_swap_version_steps(node, new_version):
+    """Swaps the version loaded under a root node one stage at a time, so callers can keep the
+    UI responsive between stages. The root keeps its representation, see br2.update_assets.representation.
+    Roots sharing the root's content through instancing are swapped along with it, see
+    br2.update_assets.instancing. Swapping them afterwards is skipped, as long as their content is read
+    from the version's file; swapping a root to the version it holds otherwise reloads it, e.g. to
+    repair its content. The swap is timed stage by stage, see br2.update_assets.stage_timing.
 
+    Args:
+        node (str): Name of the root node.
+        new_version (AssetData): Version to load.
 
-def swap_version(node, new_version):
-    unload_ref(node)
-    reference_and_reparent(new_version.path_file, node)
-    update_root_node(node, new_version)
+    Yields:
+        str: Name of the stage just completed, see SWAP_STAGES, or SWAP_SKIPPED alone if the swap was skipped.
+    """
+    root = MayaRootHandler(node)
+    instance_roots = get_instance_roots(node)
+    path = get_representation_path(new_version.path_file, root.representation)
+    if instance_roots and root.fc_id == new_version.fc_id and \
+            get_content_file(node) == os.path.normcase(os.path.normpath(path)):
+        LOGGER.info('"%s" already holds version %s, swapped along with its instances', node, new_version.version_fc)
+        yield SWAP_SKIPPED
+        return
+    timer = OperationTimer("swap_version", dpack_id=new_version.dpack_id, fc_id=new_version.fc_id,
+                           version=new_version.version_fc, instances=len(instance_roots))
+    finished = False
+    try:
+        with timer.stage("unload"):
+            representation = root.representation
+            unload_ref(node)
+        yield SWAP_STAGES[0]
+        reference_and_reparent(get_representation_path(new_version.path_file, representation), node, timer)
+        yield SWAP_STAGES[1]
+        with timer.stage("update root"):
+            update_root_node(node, new_version)
+        with timer.stage("instance"):
+            for instance_root in instance_roots:
+                add_instances(node, instance_root)
+                update_root_node(instance_root, new_version)
+        yield SWAP_STAGES[2]
+        finished = True
+    finally:
+        timer.finish(None if finished else timer.error or "interrupted")
 
 
 def unload_ref(node):
@@ -78,7 +166,7 @@ def unload_ref(node):
         try:
             rn = cmds.referenceQuery(c, referenceNode=True)
         except:
-            print("Not good: {}".format(c))
+            LOGGER.warning('Not a referenced node: "%s"', c)
             continue
         if rn and rn not in reference_nodes:
             reference_nodes.append(rn)
@@ -96,12 +184,15 @@ def unload_ref(node):
 
 def update_root_node(node, new_version):
     node_handler = MayaRootHandler(node)
-    node_handler.version = new_version.version_fc
+    node_handler.version = str(new_version.version_fc)
     node_handler.fc_id = new_version.fc_id
     node_handler.status = new_version.status
-    node_handler.date_created = new_version.date_created
+    node_handler.date_created = str(new_version.date_created or "")
     node_handler.user = new_version.user
-    
+    node_handler.content_hash = new_version.content_hash
+    # The root now holds the new version as published.
+    node_handler.mark_clean()
+
 
 if __name__ == "__main__":
     ver_26 = {
@@ -142,4 +233,4 @@ if __name__ == "__main__":
 
     node_ver = ver_27
 
-    swap_version(node, node_ver)
+    swap_version(node, AssetData.from_dict(node_ver))